@@ -0,0 +1,132 @@
+"""
+Handshakes/sec through ScopeMiddleware and AuthMiddleware: django's
+get_user in the database thread for every handshake against the cached and
+batched UserResolver.
+
+C clients of U users (a user has many tabs) connect at once. Sessions are
+cached in both cases so only the user resolution differs.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.mkdtemp(), 'db.sqlite3'),
+    }},
+    INSTALLED_APPS=[
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+        'django.contrib.sessions',
+    ],
+    SECRET_KEY='benchmark',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    # Every client of the burst may wait for a database thread
+    WEBSOCKET_DB_EXECUTOR={'MAX_QUEUE': 100000},
+)
+django.setup()
+
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user)
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.db.backends.signals import connection_created
+
+from django_websockets.middlewares import Middleware
+from django_websockets.middlewares.auth import AuthMiddleware
+from django_websockets.middlewares.scope import ScopeMiddleware
+from django_websockets.middlewares.users import get_user_resolver
+from django_websockets.middlewares.utils import database_sync_to_async
+
+queries = []
+
+
+class LegacyAuthMiddleware(Middleware):
+    """
+    AuthMiddleware before the UserResolver
+    """
+
+    async def __call__(self, websocket, call_next_middleware):
+        websocket.scope['user'] = await database_sync_to_async(get_user)(websocket.scope)
+        return await call_next_middleware()
+
+
+class FakeWebsocket:
+
+    def __init__(self, session_key):
+        self.request_headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}'}
+
+
+def create_sessions(count):
+    keys = []
+    for i in range(count):
+        user = User.objects.create_user(f'user_{i}', password='password')
+        store = SessionStore()
+        store[SESSION_KEY] = str(user.pk)
+        store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        store.create()
+        keys.append(store.session_key)
+    return keys
+
+
+def count_user_queries(execute, sql, params, many, context):
+    if 'auth_user' in sql:
+        queries.append(sql)
+    return execute(sql, params, many, context)
+
+
+def install_counter(sender, connection, **kwargs):
+    # Every database thread has its own connection
+    if count_user_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_user_queries)
+
+
+async def handshakes(auth_class, keys, clients):
+    scope_middleware, auth_middleware = ScopeMiddleware(), auth_class()
+
+    async def handshake(session_key):
+        websocket = FakeWebsocket(session_key)
+
+        async def end():
+            assert websocket.scope['user'].is_authenticated
+
+        await scope_middleware(
+            websocket, lambda: auth_middleware(websocket, end))
+
+    # Warms the session cache
+    await asyncio.gather(*[handshake(key) for key in keys])
+
+    # Users are resolved from scratch
+    get_user_resolver().clear()
+    queries.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*[handshake(keys[i % len(keys)]) for i in range(clients)])
+    return time.perf_counter() - started, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    keys = create_sessions(args.users)
+    connection_created.connect(install_counter)
+
+    for name, auth_class in [('get_user', LegacyAuthMiddleware), ('resolver', AuthMiddleware)]:
+        elapsed, count = asyncio.run(handshakes(auth_class, keys, args.clients))
+        print(f'{name:>9} clients={args.clients} users={args.users} '
+              f'user queries={count:6} handshakes/sec={args.clients / elapsed:9,.0f}')
+
+
+if __name__ == '__main__':
+    main()
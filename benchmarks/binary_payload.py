@@ -0,0 +1,58 @@
+"""
+Binary group messages through the transport encoding: the payload encoded
+as base64 text to fit the string field against the bytes data field.
+
+Each message is serialized as a WSMessage, parsed back as a worker does and
+its payload restored. Reports the size on the wire and the time per
+message for a few payload sizes.
+"""
+import argparse
+import base64
+import os
+import time
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.groups import GroupMessage
+
+
+def base64_hop(payload):
+    data = GroupMessage('frame', base64.b64encode(payload).decode('ascii')).to_bytes()
+    message = GroupMessage.from_bytes(data)
+    assert base64.b64decode(message.message) == payload
+    return len(data)
+
+
+def bytes_hop(payload):
+    data = GroupMessage('frame', payload).to_bytes()
+    message = GroupMessage.from_bytes(data)
+    assert message.message == payload
+    return len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 4096, 65536])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        payload = os.urandom(size)
+        for name, hop in [('base64', base64_hop), ('bytes', bytes_hop)]:
+            started = time.perf_counter()
+            for _ in range(args.messages):
+                wire = hop(payload)
+            elapsed = time.perf_counter() - started
+            print(f'{name:>7} payload={size:6} B wire={wire:6} B '
+                  f'per message={elapsed / args.messages * 1e6:7.2f} us')
+
+
+if __name__ == '__main__':
+    main()
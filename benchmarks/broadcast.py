@@ -0,0 +1,131 @@
+"""
+Broadcast to a large group: a handler encoding and sending the message for
+every consumer against the broadcast fast path, where the frame is
+serialized once and written to every socket.
+
+N consumers run on real websockets protocols whose transports discard the
+bytes written. The time is measured from group_message until every socket
+received the message.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import time
+
+from websockets.legacy.protocol import WebSocketCommonProtocol
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+
+
+class NullTransport(asyncio.Transport):
+
+    def __init__(self, counter):
+        super().__init__()
+        self.counter = counter
+
+    def write(self, data):
+        self.counter[0] += 1
+
+    def is_closing(self):
+        return False
+
+    def get_write_buffer_size(self):
+        return 0
+
+    def set_write_buffer_limits(self, high=None, low=None): ...
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def pause_reading(self): ...
+
+    def resume_reading(self): ...
+
+    def abort(self): ...
+
+    def close(self): ...
+
+
+def open_websocket(counter):
+    websocket = WebSocketCommonProtocol()
+    websocket.is_client = False
+    websocket.scope = {}
+    websocket.connection_made(NullTransport(counter))
+    websocket.connection_open()
+    return websocket
+
+
+class HandlerConsumer(BaseConsumer):
+    backend: BaseGroupBackend = None
+
+    def get_group_queue(self):
+        return self.backend.create_queue()
+
+    async def connect(self):
+        await self.backend.group_add('room', self)
+
+    async def chat(self, event):
+        await self.send(json.dumps({'type': 'chat', 'message': event['message']}))
+
+
+class BroadcastConsumer(HandlerConsumer):
+    broadcast_types = ('chat',)
+
+
+async def run(mode, members, messages):
+    backend = BaseGroupBackend(prefix=f'bench_{mode}')
+    consumer_class = type(
+        'Consumer', (BroadcastConsumer if mode == 'broadcast' else HandlerConsumer,),
+        {'backend': backend})
+    app = consumer_class.as_handler()
+
+    counter = [0]
+    websockets = [open_websocket(counter) for _ in range(members)]
+    tasks = [asyncio.create_task(app(websocket)) for websocket in websockets]
+    await asyncio.sleep(0.5)
+
+    elapsed = []
+    for index in range(messages):
+        counter[0] = 0
+        if mode == 'broadcast':
+            # Encoded once by the sender
+            message = GroupMessage('chat', json.dumps({'type': 'chat', 'message': f'hello {index}'}))
+        else:
+            message = GroupMessage('chat', f'hello {index}')
+        started = time.perf_counter()
+        await backend.group_message('room', message)
+        while counter[0] < members:
+            await asyncio.sleep(0)
+        elapsed.append(time.perf_counter() - started)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for websocket in websockets:
+        websocket.transfer_data_task.cancel()
+        websocket.close_connection_task.cancel()
+    await asyncio.sleep(0)
+    gc.collect()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--members', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=20)
+    args = parser.parse_args()
+
+    for mode in ['handler', 'broadcast']:
+        elapsed = sorted(asyncio.run(run(mode, args.members, args.messages)))
+        median = elapsed[len(elapsed) // 2]
+        print(f'{mode:>9} members={args.members} '
+              f'median={median * 1000:8.1f} ms '
+              f'per member={median / args.members * 1e6:6.2f} us '
+              f'deliveries={args.members / median:12,.0f}/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Group messages across a cluster of N nodes, each a process running its
+forwarder and W workers with R rooms of C consumers. A client connected to
+the first node sends M messages to random rooms of every node, so most of
+them are relayed to the forwarder of another node.
+
+Compares relaying every message on its own against batching them per peer,
+and reports the messages/sec until every consumer received its messages.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import TransportConfig, gGPCTransportLayer
+
+
+class FakeWebsocket:
+    scope = {}
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def close(self, code=1000, reason=''):
+        self.closed.set()
+
+    async def __aiter__(self):
+        await self.closed.wait()
+        return
+        yield
+
+
+class RoomConsumer(BaseConsumer):
+
+    def __init__(self, layer, room, joined, received):
+        self.layer = layer
+        self.room = room
+        self.joined = joined
+        self.received = received
+
+    def get_group_queue(self):
+        return self.layer.backend.create_queue()
+
+    async def connect(self):
+        await self.layer.group_add(self.room, self)
+        self.joined.append(1)
+
+    async def chat(self, event):
+        with self.received.get_lock():
+            self.received.value += 1
+
+
+def node_config(directory, name, nodes, peer_batch_size):
+    return TransportConfig({
+        'address': f'unix:{directory}/{name}.sock',
+        'node': name,
+        'cluster_address': f'unix:{directory}/{name}.cluster.sock',
+        'peers': {
+            peer: f'unix:{directory}/{peer}.cluster.sock'
+            for peer in nodes if peer != name},
+        'peer_batch_size': peer_batch_size,
+    })
+
+
+def node(directory, name, nodes, peer_batch_size, workers, rooms, consumers, ready, stop, received):
+    async def run():
+        config = node_config(directory, name, nodes, peer_batch_size)
+        namespaces = [f'worker_{i}' for i in range(workers)]
+        master = gGPCTransportLayer(BaseGroupBackend(), config)
+        layers = {
+            namespace: gGPCTransportLayer(BaseGroupBackend(prefix=namespace), config)
+            for namespace in namespaces
+        }
+        servers = [asyncio.create_task(master.as_forwarder('master', namespaces))]
+        await asyncio.sleep(0.2)
+        servers.extend(
+            asyncio.create_task(layer.as_server(namespace))
+            for namespace, layer in layers.items())
+        await asyncio.sleep(0.5)
+
+        joined = []
+        websockets = []
+        tasks = []
+        for i, layer in enumerate(layers.values()):
+            for j in range(rooms):
+                for _ in range(consumers):
+                    websocket = FakeWebsocket()
+                    websockets.append(websocket)
+                    tasks.append(asyncio.create_task(RoomConsumer(
+                        layer, f'{name}_room_{i}_{j}', joined, received)(websocket)))
+        while len(joined) < len(tasks):
+            await asyncio.sleep(0.01)
+        ready.set()
+
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        for websocket in websockets:
+            await websocket.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for layer in [*layers.values(), master]:
+            await layer.stop()
+        await asyncio.gather(*servers, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+async def send(config, rooms, messages):
+    client = gGPCTransportLayer(BaseGroupBackend(), config)
+    for _ in range(messages):
+        await client.group_send(random.choice(rooms), {'type': 'chat', 'message': 'hello'})
+    await client.stop()
+
+
+def run(nodes, peer_batch_size, workers, rooms, consumers, messages):
+    directory = tempfile.mkdtemp()
+    names = [f'node_{i}' for i in range(nodes)]
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    readies = []
+    counters = []
+    processes = []
+    for name in names:
+        ready = context.Event()
+        received = context.Value('q', 0)
+        process = context.Process(target=node, args=(
+            directory, name, names, peer_batch_size, workers, rooms, consumers,
+            ready, stop, received))
+        process.start()
+        readies.append(ready)
+        counters.append(received)
+        processes.append(process)
+
+    for ready in readies:
+        ready.wait()
+    # Lets the forwarders report their groups to each other
+    time.sleep(1.5)
+
+    room_names = [
+        f'{name}_room_{i}_{j}'
+        for name in names for i in range(workers) for j in range(rooms)]
+    random.seed(0)
+    config = TransportConfig({
+        'address': f'unix:{directory}/{names[0]}.sock', 'batch_size': 128,
+        'fire_and_forget': True})
+    started = time.perf_counter()
+    asyncio.run(send(config, room_names, messages))
+    while sum(counter.value for counter in counters) < messages * consumers:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for process in processes:
+        process.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--rooms', type=int, default=4)
+    parser.add_argument('--consumers', type=int, default=5)
+    parser.add_argument('--messages', type=int, default=5000)
+    args = parser.parse_args()
+
+    for name, peer_batch_size in [('unbatched', 1), ('batched', 128)]:
+        elapsed = run(
+            args.nodes, peer_batch_size, args.workers, args.rooms, args.consumers, args.messages)
+        print(f'{name:>10} nodes={args.nodes} workers={args.workers} messages={args.messages} '
+              f'rate={args.messages / elapsed:8,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Bytes on the wire and CPU cost of compressing group messages: JSON payloads
+of a few sizes sent uncompressed against zlib at some levels.
+
+A message crosses the wire once from the client to the forwarder and once
+more to each of W workers, each of them decompressing it. Reports the
+bytes of a message for all hops, the time to compress it once and to
+decompress it in every worker.
+"""
+import argparse
+import json
+import random
+import time
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.groups import GroupMessage
+
+
+def json_payload(size):
+    """
+    A chat-like JSON document of about *size* bytes
+    """
+    random.seed(size)
+    words = ['hello', 'world', 'price', 'update', 'user', 'room', 'typing', 'online']
+    items = []
+    while len(json.dumps(items)) < size:
+        items.append({
+            'id': random.randint(1, 10 ** 9),
+            'user': f'user_{random.randint(1, 5000)}',
+            'text': ' '.join(random.choice(words) for _ in range(random.randint(3, 12))),
+            'price': round(random.uniform(1, 1000), 2),
+            'online': random.random() > 0.5,
+        })
+    return json.dumps(items)
+
+
+def measure(message, threshold, level, workers, repeat):
+    # Warms up the protobuf and zlib modules
+    GroupMessage.from_bytes(message.to_bytes(threshold, level))
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        data = message.to_bytes(threshold, level)
+    encode = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        assert GroupMessage.from_bytes(data) == message
+    decode = (time.perf_counter() - started) / repeat
+    return len(data) * (1 + workers), encode, decode * workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2048, 10240, 51200])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        message = GroupMessage('chat_message', json_payload(size))
+        cases = [('none', None, -1)] + [(f'zlib-{level}', 0, level) for level in args.levels]
+        for name, threshold, level in cases:
+            wire, encode, decode = measure(message, threshold, level, args.workers, args.repeat)
+            print(f'{name:>7} payload={len(message.message):6} B wire={wire:7} B '
+                  f'compress={encode * 1e6:7.1f} us '
+                  f'decompress={decode * 1e6:7.1f} us (workers={args.workers})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Database calls of a handshake burst: database_sync_to_async on the single
+thread sensitive thread, closing the connection after every call, against
+the sized DatabaseExecutor keeping a connection per thread.
+
+C calls, each a query followed by --latency seconds standing for the round
+trip to a database server, start at once. Reports the time until all of
+them are done, the connections opened, the executor wait times and, with a
+queue smaller than the burst, the calls rejected.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.mkdtemp(), 'db.sqlite3'),
+    }},
+    INSTALLED_APPS=[],
+    SECRET_KEY='benchmark',
+)
+django.setup()
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from django_websockets.middlewares.utils import (
+    DatabaseExecutor, DatabaseExecutorSaturated, database_sync_to_async)
+
+connections_opened = [0]
+
+
+def on_connection_created(sender, connection, **kwargs):
+    connections_opened[0] += 1
+
+
+def query(latency):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    time.sleep(latency)
+
+
+async def burst(calls, latency, executor=None):
+    if executor is None:
+        to_async = database_sync_to_async(query, thread_sensitive=True)
+    else:
+        to_async = database_sync_to_async(query, executor=executor)
+
+    async def call():
+        try:
+            await to_async(latency)
+        except DatabaseExecutorSaturated:
+            return False
+        return True
+
+    connections_opened[0] = 0
+    started = time.perf_counter()
+    results = await asyncio.gather(*[call() for _ in range(calls)])
+    return time.perf_counter() - started, results.count(False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.001)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    connection_created.connect(on_connection_created)
+
+    elapsed, _ = asyncio.run(burst(args.calls, args.latency))
+    print(f'{"sync thread":>12} calls={args.calls} connections={connections_opened[0]:5} '
+          f'time={elapsed:6.2f} s')
+
+    for max_queue in [args.calls, args.calls // 4]:
+        executor = DatabaseExecutor(max_workers=args.workers, max_queue=max_queue)
+        elapsed, rejected = asyncio.run(burst(args.calls, args.latency, executor))
+        metrics = executor.metrics()
+        executor.shutdown()
+        print(f'{"executor":>12} calls={args.calls} connections={connections_opened[0]:5} '
+              f'time={elapsed:6.2f} s workers={args.workers} queue={max_queue:5} '
+              f'rejected={rejected:5} wait avg={metrics["wait_avg"] * 1000:7.1f} ms '
+              f'max={metrics["wait_max"] * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Cost of dispatching a group message to its handler: the handler looked up
+and validated with inspect for every message against the dispatch table
+built once per consumer class. Both give the handler a dict copy.
+
+Processes N messages of a few types on one consumer, as its group inbox
+does, with handlers that do nothing.
+"""
+import argparse
+import asyncio
+import inspect
+import time
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups import GroupMessage
+
+TYPES = ['chat_message', 'presence', 'typing', 'notification']
+
+
+class Consumer(BaseConsumer):
+
+    async def connect(self): ...
+
+    async def chat_message(self, message): ...
+
+    async def presence(self, message): ...
+
+    async def typing(self, message): ...
+
+    async def notification(self, message): ...
+
+
+async def legacy_process(consumer, message):
+    """
+    What BaseConsumer.__process did for every message
+    """
+    method = getattr(consumer, message.type, None)
+    if not method or \
+       not inspect.iscoroutinefunction(method) \
+       or len(inspect.signature(method).parameters.keys()) != 1:
+        return
+    await method({**message})
+
+
+async def run(process, consumer, messages):
+    started = time.perf_counter()
+    for message in messages:
+        await process(consumer, message)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    consumer = Consumer()
+    messages = [
+        GroupMessage(TYPES[i % len(TYPES)], 'x' * 64) for i in range(args.messages)]
+    table_process = lambda consumer, message: consumer._BaseConsumer__process(message)
+
+    for name, process in [('inspect', legacy_process), ('table', table_process)]:
+        elapsed = asyncio.run(run(process, consumer, messages))
+        print(f'{name:>8} messages={args.messages} '
+              f'per message={elapsed / args.messages * 1e6:6.2f} us '
+              f'messages/sec={args.messages / elapsed:11,.0f}')
+
+
+if __name__ == '__main__':
+    main()
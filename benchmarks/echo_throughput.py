@@ -0,0 +1,55 @@
+"""
+Echo throughput of a running server.
+
+Opens C client connections and sends M messages on each one, waiting for every
+reply. Run it against the same project with and without --direct and with a
+growing --workers to compare the proxied and direct modes. The route must
+answer every received frame with one frame.
+"""
+import argparse
+import asyncio
+import time
+
+import websockets
+
+
+async def client(uri, unix, messages, payload):
+    if unix:
+        connection = websockets.unix_connect(unix, uri, origin='http://localhost')
+    else:
+        connection = websockets.connect(uri, origin='http://localhost')
+
+    async with connection as websocket:
+        for _ in range(messages):
+            await websocket.send(payload)
+            await websocket.recv()
+
+
+async def run(uri, unix, connections, messages, size):
+    payload = 'x' * size
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(uri, unix, messages, payload)
+        for _ in range(connections)
+    ])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('uri', help='e.g. ws://localhost:7000/ws/echo/')
+    parser.add_argument('--unix', help='Unix socket path of the server')
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--size', type=int, default=64)
+    args = parser.parse_args()
+
+    elapsed = asyncio.run(run(
+        args.uri, args.unix, args.connections, args.messages, args.size))
+    total = args.connections * args.messages
+    print(f'connections={args.connections} messages={total} '
+          f'elapsed={elapsed:.2f}s rate={total / elapsed:,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
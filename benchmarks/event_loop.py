@@ -0,0 +1,102 @@
+"""
+Websocket messages/sec of a server process on the asyncio event loop
+against uvloop, set with set_event_loop_policy() as the server does for the
+master and the workers.
+
+The server echoes every message. P client processes, always on asyncio,
+open C connections each and send M messages per connection, waiting for
+every echo before sending the next message. Run it with more CPUs than
+client processes, or the clients share the server CPU.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+
+import websockets
+
+from django_websockets.server.horchestration import ASYNCIO, UVLOOP, set_event_loop_policy
+
+
+def server(path, event_loop, ready, stop):
+    async def run():
+        async def echo(websocket):
+            async for message in websocket:
+                await websocket.send(message)
+
+        async with websockets.unix_serve(echo, path=path):
+            ready.set()
+            await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+
+    set_event_loop_policy(event_loop)
+    asyncio.run(run())
+
+
+def clients(path, connections, messages, size, connected, start):
+    async def client(websocket):
+        payload = 'x' * size
+        for _ in range(messages):
+            await websocket.send(payload)
+            await websocket.recv()
+
+    async def run():
+        # Connects one by one, not to overflow the listen backlog
+        sockets = [
+            await websockets.unix_connect(path, 'ws://localhost/')
+            for _ in range(connections)]
+        connected.release()
+        await asyncio.get_running_loop().run_in_executor(None, start.wait)
+        await asyncio.gather(*[client(websocket) for websocket in sockets])
+        for websocket in sockets:
+            await websocket.close()
+
+    asyncio.run(run())
+
+
+def run(event_loop, processes, connections, messages, size):
+    path = f'{tempfile.mkdtemp()}/echo.sock'
+    context = multiprocessing.get_context('spawn')
+    ready, stop, start = context.Event(), context.Event(), context.Event()
+    server_process = context.Process(target=server, args=(path, event_loop, ready, stop))
+    server_process.start()
+    ready.wait()
+
+    connected = context.Semaphore(0)
+    client_processes = [
+        context.Process(target=clients, args=(
+            path, connections, messages, size, connected, start))
+        for _ in range(processes)]
+    for process in client_processes:
+        process.start()
+    for _ in client_processes:
+        connected.acquire()
+    started = time.perf_counter()
+    start.set()
+    for process in client_processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    server_process.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=256)
+    args = parser.parse_args()
+
+    total = args.processes * args.connections * args.messages
+    for event_loop in [ASYNCIO, UVLOOP]:
+        elapsed = run(event_loop, args.processes, args.connections, args.messages, args.size)
+        print(f'{event_loop:>8} connections={args.processes * args.connections} '
+              f'messages={total} size={args.size} B '
+              f'rate={total / elapsed:8,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
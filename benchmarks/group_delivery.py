@@ -0,0 +1,126 @@
+"""
+Group message latency: consumer inbox vs. the old 1 second round-robin poll.
+
+A single consumer joins N groups and one message is sent to a random group at
+a time. The latency is measured from group_send until the handler is called.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from django_websockets.consumers import BaseConsumer, StopConsumer
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+
+
+class FakeWebsocket:
+    scope = {}
+
+    async def recv(self):
+        await asyncio.Future()
+
+    async def __aiter__(self):
+        while True:
+            yield await self.recv()
+
+
+class LatencyConsumer(BaseConsumer):
+
+    def __init__(self, groups, backend, latencies):
+        self.groups = groups
+        self.backend = backend
+        self.latencies = latencies
+
+    async def connect(self):
+        for group in self.groups:
+            await self.backend.group_add(group, self)
+
+    async def probe(self, event):
+        self.latencies.append(time.perf_counter() - float(event['message']))
+
+
+async def legacy_consumer(queues, latencies):
+    """
+    The delivery loop used before the inbox: every group is waited with a
+    timeout of 1 second and all of them must finish before the next round.
+    """
+    async def process_group(queue):
+        try:
+            message = await asyncio.wait_for(queue.get(), timeout=1)
+            latencies.append(time.perf_counter() - float(message.message))
+        except asyncio.TimeoutError:
+            pass
+
+    while True:
+        await asyncio.gather(*[process_group(queue) for queue in queues])
+
+
+async def probe(send, groups, latencies, messages, interval):
+    for _ in range(messages):
+        await send(random.choice(groups), GroupMessage('probe', str(time.perf_counter())))
+        await asyncio.sleep(interval)
+
+    # Wait the last delivery
+    deadline = time.perf_counter() + 2
+    while len(latencies) < messages and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def run_inbox(num_groups, messages, interval):
+    backend = BaseGroupBackend(prefix='bench')
+    groups = [f'group_{i}' for i in range(num_groups)]
+    latencies = []
+    consumer = LatencyConsumer(groups, backend, latencies)
+    task = asyncio.create_task(consumer(FakeWebsocket()))
+    await asyncio.sleep(0.1)
+    await probe(backend.group_message, groups, latencies, messages, interval)
+    try:
+        await consumer.dispose()
+    except StopConsumer:
+        pass
+    await asyncio.gather(task, return_exceptions=True)
+    return latencies
+
+
+async def run_legacy(num_groups, messages, interval):
+    groups = [f'group_{i}' for i in range(num_groups)]
+    queues = {group: asyncio.Queue() for group in groups}
+    latencies = []
+
+    async def send(group, message):
+        await queues[group].put(message)
+
+    task = asyncio.create_task(legacy_consumer(list(queues.values()), latencies))
+    await probe(send, groups, latencies, messages, interval)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return latencies
+
+
+def report(name, num_groups, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float('nan')
+    print(f'{name:>7} groups={num_groups:<4} n={len(latencies):<5} '
+          f'mean={statistics.mean(latencies) * 1000:9.3f}ms '
+          f'p99={p99 * 1000:9.3f}ms max={latencies[-1] * 1000:9.3f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--groups', type=int, nargs='+', default=[1, 10, 30, 100])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.013,
+                        help='Seconds between messages')
+    args = parser.parse_args()
+
+    for num_groups in args.groups:
+        report('legacy', num_groups, asyncio.run(
+            run_legacy(num_groups, args.messages, args.interval)))
+        report('inbox', num_groups, asyncio.run(
+            run_inbox(num_groups, args.messages, args.interval)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Memory and speed of GroupMessage: the old class, whose instances carried a
+__dict__ and went through __getattribute__ and WSMessage(**message),
+against the immutable __slots__ one and its direct protobuf conversions.
+
+Reports the heap of N queued messages, then the time per message to
+create one, read its fields as a mapping and convert it to and from a
+WSMessage and bytes.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from django.conf import settings
+
+settings.configure(
+    WEBSOCKET_TRANSPORT_BACKENDS={
+        'default': {
+            'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+            'CONFIG': {},
+        }
+    },
+)
+
+from django_websockets.groups import GroupMessage
+from django_websockets.transport.proto.wstransport_pb2 import WSMessage
+
+
+class LegacyGroupMessage(object):
+    """
+    GroupMessage before __slots__
+    """
+    slots = ('type', 'message', 'params')
+
+    def __init__(self, type, message, params=None):
+        self.type = type
+        self.message = message
+        self.params = params
+        self._frame = None
+
+    def keys(self):
+        return self.slots
+
+    def values(self):
+        return [self.type, self.message, self.params]
+
+    def __getitem__(self, item):
+        return self.__getattribute__(item)
+
+
+def heap(message_class, count, payloads):
+    gc.collect()
+    tracemalloc.start()
+    messages = [message_class('chat_message', payloads[i % len(payloads)]) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return size
+
+
+def per_message(function, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=1000000)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    payloads = ['x' * 64 for _ in range(100)]
+    for name, message_class in [('legacy', LegacyGroupMessage), ('slots', GroupMessage)]:
+        size = heap(message_class, args.messages, payloads)
+        print(f'{name:>7} messages={args.messages} heap={size / 2 ** 20:7.1f} MiB '
+              f'per message={size / args.messages:5.0f} B')
+
+    legacy = LegacyGroupMessage('chat_message', payloads[0], 'params')
+    message = GroupMessage('chat_message', payloads[0], 'params')
+    proto = message.to_proto()
+    data = message.to_bytes()
+
+    def legacy_from_proto():
+        # Params were dropped on the way
+        return LegacyGroupMessage(proto.type, proto.message)
+
+    cases = [
+        ('create', lambda: LegacyGroupMessage('chat_message', payloads[0]),
+         lambda: GroupMessage('chat_message', payloads[0])),
+        ('mapping', lambda: {**legacy},
+         lambda: {**message}),
+        ('to_proto', lambda: WSMessage(**legacy),
+         message.to_proto),
+        ('from_proto', legacy_from_proto,
+         lambda: GroupMessage.from_proto(proto)),
+        ('to_bytes', lambda: WSMessage(**legacy).SerializeToString(),
+         message.to_bytes),
+        ('from_bytes', lambda: LegacyGroupMessage(**{
+            field.name: value for field, value in WSMessage.FromString(data).ListFields()}),
+         lambda: GroupMessage.from_bytes(data)),
+    ]
+    for name, legacy_case, case in cases:
+        print(f'{name:>10} legacy={per_message(legacy_case, args.calls):6.2f} us '
+              f'slots={per_message(case, args.calls):6.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Group registry at scale: C consumers join G groups each out of a pool of P
+groups, messages are sent to random groups and every consumer disconnects.
+
+Reports the time and the Python heap used by each phase and what is left
+in the registry once everyone is gone.
+"""
+import argparse
+import asyncio
+import gc
+import random
+import time
+import tracemalloc
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+
+
+class FakeWebsocket:
+    scope = {}
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def close(self, code=1000, reason=''):
+        self.closed.set()
+
+    async def __aiter__(self):
+        await self.closed.wait()
+        return
+        yield
+
+
+class MemberConsumer(BaseConsumer):
+
+    def __init__(self, backend, groups, joined):
+        self.backend = backend
+        self.groups = groups
+        self.joined = joined
+
+    def get_group_queue(self):
+        return self.backend.create_queue()
+
+    async def connect(self):
+        for group in self.groups:
+            await self.backend.group_add(group, self)
+        self.joined.append(1)
+
+    async def ping(self, event): ...
+
+
+def heap():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def run(consumers, groups_per_consumer, pool, messages):
+    backend = BaseGroupBackend(prefix='bench')
+    groups = [f'group_{i}' for i in range(pool)]
+    websockets = [FakeWebsocket() for _ in range(consumers)]
+    joined = []
+
+    tracemalloc.start()
+    baseline = heap()
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(MemberConsumer(
+            backend, random.sample(groups, groups_per_consumer), joined)(websocket))
+        for websocket in websockets
+    ]
+    while len(joined) < consumers:
+        await asyncio.sleep(0.01)
+    print(f'join        {time.perf_counter() - started:8.2f} s  '
+          f'heap={(heap() - baseline) / 2**20:8.1f} MiB  '
+          f'groups={backend.num_groups} memberships={backend.memberships}')
+
+    started = time.perf_counter()
+    for _ in range(messages):
+        await backend.group_message(random.choice(groups), GroupMessage('ping', 'x'))
+    elapsed = time.perf_counter() - started
+    print(f'fan-out     {elapsed / messages * 1e6:8.1f} us per message to '
+          f'{backend.memberships / backend.num_groups:.0f} members')
+    await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    for websocket in websockets:
+        await websocket.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f'disconnect  {time.perf_counter() - started:8.2f} s  '
+          f'groups={backend.num_groups} memberships={backend.memberships}')
+
+    del tasks, websockets
+    print(f'leftover    heap={(heap() - baseline) / 2**20:8.1f} MiB')
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--consumers', type=int, default=10000)
+    parser.add_argument('--groups-per-consumer', type=int, default=100)
+    parser.add_argument('--pool', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(run(
+        args.consumers, args.groups_per_consumer, args.pool, args.messages))
+
+
+if __name__ == '__main__':
+    main()
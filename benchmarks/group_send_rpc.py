@@ -0,0 +1,113 @@
+"""
+Group messages/sec through the gRPC transport: one unary SendMessage per
+message against batched SendMessages streams.
+
+A forwarder and W workers run in this process and a client process sends M
+messages. The rate is measured until every worker received all of them.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import TransportConfig, gGPCTransportLayer
+
+
+class CountingBackend(BaseGroupBackend):
+
+    def __init__(self, counter):
+        super().__init__(prefix='bench')
+        self.counter = counter
+
+    async def group_message(self, name, message):
+        self.counter.append(1)
+
+
+def client(address, messages, batch_size, size):
+    async def run():
+        layer = gGPCTransportLayer(BaseGroupBackend(), TransportConfig({
+            'address': address,
+            'batch_size': batch_size,
+        }))
+        message = GroupMessage('chat_message', 'x' * size)
+        # One sender waiting for every batch ack would send a message per
+        # batch interval
+        wait = None if batch_size <= 1 else False
+        for _ in range(messages):
+            await layer.group_send('room', message, wait)
+        await layer.stop()
+
+    asyncio.run(run())
+
+
+async def run(workers, messages, batch_size, size):
+    directory = tempfile.mkdtemp()
+    address = f'unix:{directory}/rpc.sock'
+    # The counting workers have no group members to report, every message
+    # goes to all of them
+    config = TransportConfig({
+        'address': address, 'num_connections': 1000, 'interest_routing': False})
+    namespaces = [f'worker_{i}' for i in range(workers)]
+
+    counters = {namespace: [] for namespace in namespaces}
+    layers = {
+        namespace: gGPCTransportLayer(CountingBackend(counters[namespace]), config)
+        for namespace in namespaces
+    }
+    forwarder = gGPCTransportLayer(BaseGroupBackend(), config)
+    servers = [
+        asyncio.create_task(layer.as_server(namespace))
+        for namespace, layer in layers.items()
+    ]
+    servers.append(asyncio.create_task(forwarder.as_forwarder('master', namespaces)))
+    await asyncio.sleep(0.5)
+
+    # The clock starts on the first delivery so the client start up isn't measured
+    process = multiprocessing.get_context('spawn').Process(
+        target=client, args=(address, messages, batch_size, size))
+    process.start()
+    started = None
+    while any(len(counter) < messages for counter in counters.values()):
+        await asyncio.sleep(0.001)
+        if started is None and any(counters.values()):
+            started = time.perf_counter()
+        if not process.is_alive() and process.exitcode:
+            raise RuntimeError('client failed')
+    elapsed = time.perf_counter() - started
+    await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+    for layer in [*layers.values(), forwarder]:
+        await layer.stop()
+    await asyncio.gather(*servers, return_exceptions=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16, 128])
+    args = parser.parse_args()
+
+    for batch_size in args.batch_sizes:
+        elapsed = asyncio.run(run(args.workers, args.messages, batch_size, args.size))
+        name = 'unary' if batch_size <= 1 else f'batch={batch_size}'
+        print(f'{name:>10} workers={args.workers} messages={args.messages} '
+              f'rate={args.messages / elapsed:10,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
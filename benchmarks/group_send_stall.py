@@ -0,0 +1,138 @@
+"""
+Event loop stall of a client sending group messages through the gRPC
+transport: the old blocking SendMessage against the grpc.aio sender,
+waiting for each ack or fire-and-forget.
+
+A forwarder and W workers run in this process. In a client process one
+task sends M messages while another one, standing for the other sockets of
+the worker, ticks every millisecond and records how late each tick is.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+import grpc as sync_grpc
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import TransportConfig, gGPCTransportLayer
+from django_websockets.transport.proto import wstransport_pb2, wstransport_pb2_grpc
+
+
+class CountingBackend(BaseGroupBackend):
+
+    def __init__(self, counter):
+        super().__init__(prefix='bench')
+        self.counter = counter
+
+    async def group_message(self, name, message):
+        self.counter.append(1)
+
+
+def client(address, mode, messages, size, results):
+    async def ticker(lags, done):
+        while not done.is_set():
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lags.append(max(time.perf_counter() - expected, 0))
+
+    async def run():
+        layer = gGPCTransportLayer(BaseGroupBackend(), TransportConfig({
+            'address': address,
+            'fire_and_forget': mode == 'forget',
+        }))
+        message = GroupMessage('chat_message', 'x' * size)
+        # The old client path: a blocking stub called from the coroutine
+        stub = wstransport_pb2_grpc.WSGroupManagerStub(
+            sync_grpc.insecure_channel(address))
+
+        lags, done = [], asyncio.Event()
+        ticking = asyncio.create_task(ticker(lags, done))
+        await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        for _ in range(messages):
+            if mode == 'sync':
+                stub.SendMessage(wstransport_pb2.WSSendMessageRequest(
+                    group='room', message=wstransport_pb2.WSMessage(**message)))
+            else:
+                await layer.group_send('room', message)
+        await layer.stop()
+        elapsed = time.perf_counter() - started
+
+        done.set()
+        await ticking
+        results.put((elapsed, lags))
+
+    asyncio.run(run())
+
+
+async def run(mode, workers, messages, size):
+    directory = tempfile.mkdtemp()
+    address = f'unix:{directory}/rpc.sock'
+    # The counting workers have no group members to report, every message
+    # goes to all of them
+    config = TransportConfig({
+        'address': address, 'num_connections': 1000, 'interest_routing': False})
+    namespaces = [f'worker_{i}' for i in range(workers)]
+
+    counters = {namespace: [] for namespace in namespaces}
+    layers = {
+        namespace: gGPCTransportLayer(CountingBackend(counters[namespace]), config)
+        for namespace in namespaces
+    }
+    forwarder = gGPCTransportLayer(BaseGroupBackend(), config)
+    servers = [
+        asyncio.create_task(layer.as_server(namespace))
+        for namespace, layer in layers.items()
+    ]
+    servers.append(asyncio.create_task(forwarder.as_forwarder('master', namespaces)))
+    await asyncio.sleep(0.5)
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(
+        target=client, args=(address, mode, messages, size, results))
+    process.start()
+    loop = asyncio.get_running_loop()
+    elapsed, lags = await loop.run_in_executor(None, results.get)
+    await loop.run_in_executor(None, process.join)
+    while any(len(counter) < messages for counter in counters.values()):
+        await asyncio.sleep(0.001)
+
+    for layer in [*layers.values(), forwarder]:
+        await layer.stop()
+    await asyncio.gather(*servers, return_exceptions=True)
+    return elapsed, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--modes', nargs='+', default=['sync', 'aio', 'forget'])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        elapsed, lags = asyncio.run(run(mode, args.workers, args.messages, args.size))
+        lags = sorted(lags) or [0]
+        p99 = lags[min(int(len(lags) * 0.99), len(lags) - 1)]
+        print(f'{mode:>7} messages={args.messages} send={elapsed * 1000:8.1f} ms '
+              f'ticks={len(lags):6} lag mean={statistics.mean(lags) * 1000:7.2f} ms '
+              f'p99={p99 * 1000:7.2f} ms max={lags[-1] * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
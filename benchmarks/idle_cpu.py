@@ -0,0 +1,92 @@
+"""
+CPU spent by idle connections: consumer receiving loop vs. the old 100 ms
+recv() polling loop.
+
+N consumers wait for client frames that never arrive and the process CPU time
+is sampled during a fixed window.
+"""
+import argparse
+import asyncio
+import time
+
+from django_websockets.consumers import BaseConsumer, StopConsumer
+
+
+class IdleWebsocket:
+    scope = {}
+
+    async def recv(self):
+        await asyncio.Future()
+
+    async def __aiter__(self):
+        while True:
+            yield await self.recv()
+
+
+class IdleConsumer(BaseConsumer):
+
+    async def connect(self): ...
+
+    async def receive(self, data): ...
+
+
+async def legacy_recv(websocket, closing):
+    """
+    The receiving loop used before: recv() wrapped in a 100 ms wait_for().
+    """
+    while not closing:
+        try:
+            await asyncio.wait_for(websocket.recv(), timeout=0.1)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            continue
+
+
+async def measure(window):
+    # Let every connection reach its idle state
+    await asyncio.sleep(0.5)
+    started_cpu, started = time.process_time(), time.perf_counter()
+    await asyncio.sleep(window)
+    return (time.process_time() - started_cpu) / (time.perf_counter() - started)
+
+
+async def run_legacy(connections, window):
+    closing = []
+    tasks = [asyncio.create_task(legacy_recv(IdleWebsocket(), closing))
+             for _ in range(connections)]
+    cpu = await measure(window)
+    closing.append(True)
+    await asyncio.gather(*tasks)
+    return cpu
+
+
+async def run_consumer(connections, window):
+    consumers = [IdleConsumer() for _ in range(connections)]
+    tasks = [asyncio.create_task(consumer(IdleWebsocket()))
+             for consumer in consumers]
+    cpu = await measure(window)
+    for consumer in consumers:
+        try:
+            await consumer.dispose()
+        except StopConsumer:
+            pass
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--window', type=float, default=5,
+                        help='Seconds sampled for each run')
+    args = parser.parse_args()
+
+    for connections in args.connections:
+        for name, run in (('legacy', run_legacy), ('consumer', run_consumer)):
+            cpu = asyncio.run(run(connections, args.window))
+            print(f'{name:>8} connections={connections:<6} '
+                  f'cpu={cpu * 100:6.1f}% '
+                  f'per_connection={cpu / connections * 1e6:8.3f}us/s')
+
+
+if __name__ == '__main__':
+    main()
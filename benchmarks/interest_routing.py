@@ -0,0 +1,154 @@
+"""
+Group messages forwarded to W workers with small rooms: every message sent
+to every worker against the workers reporting their groups to the forwarder,
+which only forwards them the messages of the rooms they have members in.
+
+Every worker has R rooms of C consumers, a client sends M messages to random
+rooms. Reports the time, the SendMessage calls the workers received and how
+many of them were for a room without members in the worker.
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+import warnings
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import TransportConfig, gGPCTransportLayer
+
+
+class FakeWebsocket:
+    scope = {}
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def close(self, code=1000, reason=''):
+        self.closed.set()
+
+    async def __aiter__(self):
+        await self.closed.wait()
+        return
+        yield
+
+
+class CountingLayer(gGPCTransportLayer):
+
+    calls = 0
+    wasted = 0
+
+    async def SendMessage(self, request, context=None):
+        self.calls += 1
+        if not self.backend.group_size(request.group):
+            self.wasted += 1
+        return await super().SendMessage(request, context)
+
+
+class RoomConsumer(BaseConsumer):
+
+    def __init__(self, layer, rooms, joined, received):
+        self.layer = layer
+        self.rooms = rooms
+        self.joined = joined
+        self.received = received
+
+    def get_group_queue(self):
+        return self.layer.backend.create_queue()
+
+    async def connect(self):
+        for room in self.rooms:
+            await self.layer.group_add(room, self)
+        self.joined.append(1)
+
+    async def chat(self, event):
+        self.received.append(1)
+
+
+async def run(config, workers, rooms, consumers, messages):
+    config = TransportConfig(config)
+    namespaces = [f'worker_{i}' for i in range(workers)]
+    master = gGPCTransportLayer(BaseGroupBackend(), config)
+    layers = {
+        namespace: CountingLayer(BaseGroupBackend(prefix=namespace), config)
+        for namespace in namespaces
+    }
+    servers = [asyncio.create_task(master.as_forwarder('master', namespaces))]
+    await asyncio.sleep(0.2)
+    servers.extend(
+        asyncio.create_task(layer.as_server(namespace))
+        for namespace, layer in layers.items())
+    await asyncio.sleep(0.5)
+
+    # Every room has its consumers in a single worker
+    room_names = []
+    joined, received = [], []
+    websockets = []
+    tasks = []
+    for namespace, layer in layers.items():
+        for i in range(rooms):
+            room = f'{namespace}_room_{i}'
+            room_names.append(room)
+            for _ in range(consumers):
+                websocket = FakeWebsocket()
+                websockets.append(websocket)
+                tasks.append(asyncio.create_task(
+                    RoomConsumer(layer, [room], joined, received)(websocket)))
+    while len(joined) < len(tasks):
+        await asyncio.sleep(0.01)
+
+    client = gGPCTransportLayer(BaseGroupBackend(), config)
+    random.seed(0)
+    started = time.perf_counter()
+    for _ in range(messages):
+        await client.group_send(random.choice(room_names), {'type': 'chat', 'message': 'hello'})
+    while len(received) < messages * consumers:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    calls = sum(layer.calls for layer in layers.values())
+    wasted = sum(layer.wasted for layer in layers.values())
+
+    for websocket in websockets:
+        await websocket.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await client.stop()
+    for layer in [*layers.values(), master]:
+        await layer.stop()
+    await asyncio.gather(*servers, return_exceptions=True)
+    return elapsed, calls, wasted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rooms', type=int, default=8)
+    parser.add_argument('--consumers', type=int, default=5)
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Broadcasting makes the workers warn about the rooms they don't have
+    warnings.simplefilter('ignore')
+    directory = tempfile.mkdtemp()
+    for name, routing in [('broadcast', False), ('interest', True)]:
+        elapsed, calls, wasted = asyncio.run(run({
+            'address': f'unix:{directory}/rpc.sock',
+            'interest_routing': routing,
+        }, args.workers, args.rooms, args.consumers, args.messages))
+        print(f'{name:>10} workers={args.workers} messages={args.messages} '
+              f'time={elapsed:6.2f} s rate={args.messages / elapsed:8,.0f} msg/s '
+              f'worker calls={calls:7} wasted={wasted:7}')
+
+
+if __name__ == '__main__':
+    main()
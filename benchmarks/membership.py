@@ -0,0 +1,57 @@
+"""
+Reading the workers the master proxies connections to and the forwarder
+forwards group messages to: a multiprocessing.Manager list, read through
+its proxy, against the WorkerMembership of the supervisor process.
+
+Reports the time to read the workers as the forwarder does for every
+message, and to pick a worker with RoundRobQueue while the supervisor
+changes the membership every K picks.
+"""
+import argparse
+import multiprocessing
+import time
+
+from django_websockets.server.horchestration import RoundRobQueue, WorkerMembership
+
+
+def read(workers, reads):
+    started = time.perf_counter()
+    for _ in range(reads):
+        [*workers] if workers else []
+    return (time.perf_counter() - started) / reads
+
+
+def pick(workers, picks, change_every):
+    queue = RoundRobQueue(workers)
+    started = time.perf_counter()
+    for i in range(picks):
+        if i % change_every == 0:
+            if isinstance(workers, WorkerMembership):
+                workers.discard('worker_0')
+                workers.add('worker_0')
+            else:
+                workers.remove('worker_0')
+                workers.append('worker_0')
+                queue.refresh()
+        queue.next()
+    return (time.perf_counter() - started) / picks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--reads', type=int, default=20000)
+    parser.add_argument('--change-every', type=int, default=1000)
+    args = parser.parse_args()
+
+    names = [f'worker_{i}' for i in range(args.workers)]
+    manager = multiprocessing.Manager()
+    for name, workers in [('manager', manager.list(names)),
+                          ('membership', WorkerMembership(names))]:
+        print(f'{name:>10} read={read(workers, args.reads) * 1e6:8.2f} us '
+              f'pick={pick(workers, args.reads, args.change_every) * 1e6:8.2f} us')
+    manager.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Handshake to consumer latency: the middlewares imported and instantiated on
+every connection against the stack built once per process.
+
+A storm of N concurrent connections goes through WEBSOCKET_MIDDLEWARE and
+RouteMiddleware up to the consumer connect(). The latency is measured from
+the start of the stack until connect() is called.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import types
+from functools import partial
+
+import django
+from django.conf import settings
+
+settings.configure(
+    WEBSOCKET_MIDDLEWARE=[
+        '__main__.HeadersMiddleware',
+        '__main__.ScopeStubMiddleware',
+        'django_websockets.middlewares.route.RouteMiddleware',
+    ],
+    WEBSOCKET_ROUTE_MODULE='bench_routing',
+    WEBSOCKET_TRANSPORT_BACKENDS={
+        'default': {
+            'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+            'CONFIG': {}
+        }
+    },
+)
+django.setup()
+
+from django.urls import path
+from django.utils.module_loading import import_string
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.middlewares import (
+    Middleware, active_middlewares, call_middleware_stack, reload_middleware_stack)
+
+
+class HeadersMiddleware(Middleware):
+
+    async def __call__(self, websocket, call_next_middleware):
+        websocket.scope = {
+            'HEADERS': websocket.request_headers,
+            'connected_at': websocket.connected_at,
+        }
+        return await call_next_middleware()
+
+
+class ScopeStubMiddleware(Middleware):
+
+    async def __call__(self, websocket, call_next_middleware):
+        websocket.scope['session'] = {}
+        return await call_next_middleware()
+
+
+class EchoConsumer(BaseConsumer):
+
+    async def connect(self):
+        self.scope['connected_at'].append(time.perf_counter())
+        await self.close()
+
+
+routing = types.ModuleType('bench_routing')
+routing.urlpatterns = [
+    path(f'ws/other_{i}/<str:name>/', EchoConsumer.as_handler()) for i in range(20)
+] + [path('ws/chat/<str:room>/', EchoConsumer.as_handler())]
+sys.modules['bench_routing'] = routing
+
+
+class FakeWebsocket:
+
+    def __init__(self, connected_at):
+        self.path = 'ws/chat/lobby/'
+        self.request_headers = {}
+        self.connected_at = connected_at
+
+    async def send(self, message): ...
+
+    async def close(self, *args): ...
+
+    async def __aiter__(self):
+        return
+        yield
+
+
+async def legacy_call_middleware_stack(websocket, idx=0):
+    """
+    The stack before it was built once: a middleware is imported and
+    instantiated for every connection
+    """
+    if len(active_middlewares) > idx:
+        return await import_string(settings.WEBSOCKET_MIDDLEWARE[idx])()(
+            websocket, partial(legacy_call_middleware_stack, websocket, idx + 1))
+
+
+async def connect(stack, latencies):
+    connected_at = []
+    started = time.perf_counter()
+    await stack(FakeWebsocket(connected_at))
+    latencies.append(connected_at[0] - started)
+
+
+async def run(stack, connections):
+    latencies = []
+    await asyncio.gather(*[connect(stack, latencies) for _ in range(connections)])
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    for name, stack in [('legacy', legacy_call_middleware_stack), ('built', call_middleware_stack)]:
+        reload_middleware_stack()
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            latencies = sorted(asyncio.run(run(stack, args.connections)))
+            elapsed = time.perf_counter() - started
+        print(f'{name:>7} connections={args.connections} '
+              f'median={statistics.median(latencies) * 1000:8.2f} ms '
+              f'per connection={elapsed / args.connections * 1e6:7.1f} us '
+              f'storm={elapsed * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Deploying new code to W workers holding C client connections: restarting
+every worker against WorkerSupervisor.reload() replacing them one at a
+time.
+
+Every worker runs a websockets server on a unix socket and drains like the
+server workers on SIGTERM, closing its connections with 1001. A client
+closed by its worker reconnects at once to a worker picked from the
+membership, as the master does. Reports the most reconnections in any
+100 ms, the connection attempts refused and the time until every client is
+connected to a new worker.
+"""
+import argparse
+import asyncio
+import collections
+import signal
+import tempfile
+import time
+
+import websockets
+
+from django_websockets.server.horchestration import RoundRobQueue, WorkerMembership, WorkerSupervisor
+
+
+def worker(directory, namespace, ready, generation):
+    async def run():
+        loop = asyncio.get_running_loop()
+        stopping = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stopping.set)
+
+        async def hello(websocket):
+            await websocket.send(str(generation))
+            await websocket.wait_closed()
+
+        async with websockets.unix_serve(hello, path=f'{directory}/{namespace}.sock') as server:
+            ready.send(namespace)
+            ready.close()
+            await stopping.wait()
+            server.server.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+class Clients(object):
+
+    def __init__(self, directory, membership):
+        self.directory = directory
+        self.queue = RoundRobQueue(membership)
+        self.generations = {}
+        self.reconnects = []
+        self.refused = 0
+
+    async def client(self, index):
+        while True:
+            try:
+                worker = self.queue.next()
+                async with websockets.unix_connect(
+                        f'{self.directory}/{worker}.sock', 'ws://localhost/') as websocket:
+                    self.generations[index] = int(await websocket.recv())
+                    await websocket.wait_closed()
+            except (OSError, ZeroDivisionError, websockets.InvalidHandshake,
+                    websockets.ConnectionClosed):
+                # No worker accepting connections
+                self.refused += 1
+                await asyncio.sleep(0.01)
+                continue
+            self.reconnects.append(time.monotonic())
+
+
+async def deploy(name, workers, clients, timeout):
+    directory = tempfile.mkdtemp()
+    membership = WorkerMembership()
+    generation = 0
+    supervisor = WorkerSupervisor(
+        worker, lambda namespace, ready: (directory, namespace, ready, generation),
+        [f'worker_{i}' for i in range(workers)], membership)
+    supervisor.start()
+    while len(membership) < workers:
+        await asyncio.sleep(0.01)
+
+    pool = Clients(directory, membership)
+    tasks = [asyncio.create_task(pool.client(i)) for i in range(clients)]
+    while len(pool.generations) < clients:
+        await asyncio.sleep(0.01)
+
+    generation = 1
+    started = time.monotonic()
+    if name == 'restart':
+        await supervisor.stop(timeout)
+        supervisor = WorkerSupervisor(
+            worker, lambda namespace, ready: (directory, namespace, ready, generation),
+            [f'worker_{i}' for i in range(workers)], membership)
+        supervisor.start()
+    else:
+        await supervisor.reload(timeout)
+    while any(client_generation != 1 for client_generation in pool.generations.values()):
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - started
+
+    windows = collections.Counter(int((at - started) * 10) for at in pool.reconnects)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await supervisor.stop(timeout)
+    return elapsed, max(windows.values()), pool.refused
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=5)
+    args = parser.parse_args()
+
+    for name in ['restart', 'reload']:
+        elapsed, peak, refused = asyncio.run(
+            deploy(name, args.workers, args.clients, args.timeout))
+        print(f'{name:>8} workers={args.workers} clients={args.clients} '
+              f'peak reconnects={peak:6}/100 ms refused={refused:6} time={elapsed:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Route resolution with N websocket routes: the RouteMiddleware loop, which
+resolves the path against every pattern, against the compiled Router with
+and without its LRU cache hit.
+
+Paths are drawn uniformly from the routes, so the average match sits in
+the middle of the list.
+"""
+import argparse
+import random
+import time
+
+from django.conf import settings
+
+settings.configure()
+
+import django
+
+django.setup()
+
+from django.urls import path, re_path
+
+from django_websockets.middlewares.router import Router
+
+
+def handler(websocket, *args, **kwargs): ...
+
+
+def build_routes(count):
+    routes = []
+    for i in range(count):
+        if i % 4 == 3:
+            routes.append(re_path(rf'^/ws/legacy_{i}/(?P<key>[0-9a-f]+)/$', handler))
+        else:
+            routes.append(path(f'/ws/app_{i}/<str:room>/<int:page>/', handler))
+    return routes
+
+
+def sample_path(i):
+    if i % 4 == 3:
+        return f'/ws/legacy_{i}/{random.randrange(1 << 32):x}/'
+    return f'/ws/app_{i}/room_{random.randrange(1000)}/{random.randrange(100)}/'
+
+
+def loop_resolve(routes, path):
+    """
+    The RouteMiddleware loop: every pattern is tried, even after a match
+    """
+    found = None
+    for pattern in routes:
+        resolver_match = pattern.resolve(path)
+        if resolver_match:
+            found = found or resolver_match
+    return found
+
+
+def measure(resolve, paths):
+    started = time.perf_counter()
+    for path in paths:
+        resolve(path)
+    return (time.perf_counter() - started) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--routes', type=int, nargs='+', default=[20, 200, 1000])
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    for count in args.routes:
+        routes = build_routes(count)
+        paths = [sample_path(random.randrange(count)) for _ in range(args.lookups)]
+
+        loop = measure(lambda path: loop_resolve(routes, path), paths)
+        # Every path is new, so the cache never hits
+        router = Router(routes, cache_size=1024)
+        compiled = measure(router.resolve, paths)
+        # A few hot paths, always cached
+        hot = paths[:100]
+        cached = measure(router.resolve, hot * (args.lookups // len(hot)))
+
+        print(f'routes={count:<5} loop={loop * 1e6:8.2f} us  '
+              f'router={compiled * 1e6:6.2f} us  cached={cached * 1e6:6.2f} us  '
+              f'speedup={loop / compiled:6.1f}x / {loop / cached:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
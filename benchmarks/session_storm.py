@@ -0,0 +1,122 @@
+"""
+Session loading during a reconnect storm: a SessionStore loaded in the
+database thread for every handshake against load_session() and its cache.
+
+C clients, spread over S sessions, reconnect at once. Reports the session
+queries made and the time until every handshake has its session.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+
+import django
+from django.conf import settings
+
+settings.configure(
+    DATABASES={'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.mkdtemp(), 'db.sqlite3'),
+    }},
+    INSTALLED_APPS=[
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+        'django.contrib.sessions',
+    ],
+    SECRET_KEY='benchmark',
+    SESSION_ENGINE='bench_sessions',
+    WEBSOCKET_SESSION_CACHE_TTL=30,
+    # Every client of the burst may wait for a database thread
+    WEBSOCKET_DB_EXECUTOR={'MAX_QUEUE': 100000},
+)
+
+from django.contrib.sessions.backends import db
+
+queries = [0]
+
+
+class SessionStore(db.SessionStore):
+
+    def _get_session_from_db(self):
+        queries[0] += 1
+        return super()._get_session_from_db()
+
+    async def _aget_session_from_db(self):
+        queries[0] += 1
+        return await super()._aget_session_from_db()
+
+
+sys.modules['bench_sessions'] = types.ModuleType('bench_sessions')
+sys.modules['bench_sessions'].SessionStore = SessionStore
+
+django.setup()
+
+from django.core.management import call_command
+
+from django_websockets.middlewares.session import get_session_cache, load_session
+from django_websockets.middlewares.utils import database_sync_to_async
+
+
+async def legacy_load(session_key):
+    """
+    What a handshake cost before: a store loaded in the database thread
+    """
+    store = SessionStore(session_key)
+    store._session_cache = await database_sync_to_async(store.load)()
+    return store
+
+
+def create_sessions(count):
+    keys = []
+    for i in range(count):
+        store = SessionStore()
+        store['_auth_user_id'] = str(i)
+        store.create()
+        keys.append(store.session_key)
+    return keys
+
+
+async def storm(load, keys, clients):
+    queries[0] = 0
+    get_session_cache().clear()
+    started = time.perf_counter()
+    sessions = await asyncio.gather(*[
+        load(keys[i % len(keys)]) for i in range(clients)])
+    elapsed = time.perf_counter() - started
+    assert all(session.get('_auth_user_id') is not None for session in sessions)
+    return elapsed, queries[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=50000)
+    parser.add_argument('--sessions', type=int, default=5000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    keys = create_sessions(args.sessions)
+
+    for name, load in [('legacy', legacy_load), ('cached', load_session)]:
+        elapsed, count = asyncio.run(storm(load, keys, args.clients))
+        print(f'{name:>7} clients={args.clients} sessions={args.sessions} '
+              f'queries={count:6} time={elapsed:7.2f} s')
+
+    # Reconnecting again while the sessions are still cached
+    async def reconnect():
+        await storm(load_session, keys, args.sessions)
+        queries[0] = 0
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            load_session(keys[i % len(keys)]) for i in range(args.clients)])
+        return time.perf_counter() - started, queries[0]
+
+    elapsed, count = asyncio.run(reconnect())
+    print(f'{"warm":>7} clients={args.clients} sessions={args.sessions} '
+          f'queries={count:6} time={elapsed:7.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Group messages/sec from a client process to W workers: the gRPC transport,
+unary and batched through the master forwarder, against the shared memory
+transport where every worker reads the messages from the ring buffer.
+
+The workers run in this process and a client process sends M messages of
+S bytes. The rate is measured until every worker received all of them.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+settings.configure(WEBSOCKET_TRANSPORT_BACKENDS={
+    'default': {
+        'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+        'CONFIG': {}
+    }
+})
+
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import TransportConfig, gGPCTransportLayer
+from django_websockets.transport.shm import SharedMemoryTransportLayer
+
+
+class CountingBackend(BaseGroupBackend):
+
+    def __init__(self, counter):
+        super().__init__(prefix='bench')
+        self.counter = counter
+
+    async def group_message(self, name, message):
+        self.counter.append(1)
+
+
+def client(layer_class, config, messages, size):
+    async def run():
+        layer = layer_class(BaseGroupBackend(), TransportConfig(config))
+        message = GroupMessage('chat_message', 'x' * size)
+        for _ in range(messages):
+            await layer.group_send('room', message)
+        await layer.stop()
+
+    asyncio.run(run())
+
+
+async def run(layer_class, config, workers, messages, size):
+    config = TransportConfig(config)
+    namespaces = [f'worker_{i}' for i in range(workers)]
+
+    counters = {namespace: [] for namespace in namespaces}
+    layers = {
+        namespace: layer_class(CountingBackend(counters[namespace]), config)
+        for namespace in namespaces
+    }
+    master = layer_class(BaseGroupBackend(), config)
+    servers = [asyncio.create_task(master.as_forwarder('master', namespaces))]
+    await asyncio.sleep(0.2)
+    servers.extend(
+        asyncio.create_task(layer.as_server(namespace))
+        for namespace, layer in layers.items())
+    await asyncio.sleep(0.5)
+
+    # The clock starts on the first delivery so the client start up isn't measured
+    process = multiprocessing.get_context('spawn').Process(
+        target=client, args=(layer_class, dict(config), messages, size))
+    process.start()
+    started = None
+    while any(len(counter) < messages for counter in counters.values()):
+        await asyncio.sleep(0.001)
+        if started is None and any(counters.values()):
+            started = time.perf_counter()
+        if not process.is_alive() and process.exitcode:
+            raise RuntimeError('client failed')
+    elapsed = time.perf_counter() - started
+    await asyncio.get_running_loop().run_in_executor(None, process.join)
+
+    for layer in [*layers.values(), master]:
+        await layer.stop()
+    await asyncio.gather(*servers, return_exceptions=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--transports', nargs='+', default=['grpc', 'grpc-batch', 'shm'])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    # The counting workers have no group members to report, every message
+    # goes to all of them
+    cases = [
+        ('grpc', gGPCTransportLayer, {
+            'address': f'unix:{directory}/rpc.sock', 'num_connections': 1000,
+            'interest_routing': False}),
+        ('grpc-batch', gGPCTransportLayer, {
+            'address': f'unix:{directory}/rpc.sock', 'num_connections': 1000,
+            'batch_size': 128, 'fire_and_forget': True, 'interest_routing': False}),
+        ('shm', SharedMemoryTransportLayer, {
+            'path': os.path.join(directory, 'shm')}),
+    ]
+    for name, layer_class, config in cases:
+        if name not in args.transports:
+            continue
+        elapsed = asyncio.run(run(layer_class, config, args.workers, args.messages, args.size))
+        print(f'{name:>10} workers={args.workers} messages={args.messages} '
+              f'rate={args.messages / elapsed:10,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Worker memory during a broadcast storm with one slow reader: the unbounded
+inbox against the bounded group queues and their overflow policies.
+
+F fast consumers and one slow consumer join a group and M messages are
+broadcast. Memory held by the Python heap is sampled along the way.
+"""
+import argparse
+import asyncio
+import tracemalloc
+
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+
+
+class FakeWebsocket:
+    scope = {}
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+        self.close_code = None
+
+    async def close(self, code=1000, reason=''):
+        if not self.closed.is_set():
+            self.close_code = code
+            self.closed.set()
+
+    async def __aiter__(self):
+        await self.closed.wait()
+        return
+        yield
+
+
+class StormConsumer(BaseConsumer):
+
+    def __init__(self, backend, delay):
+        self.backend = backend
+        self.delay = delay
+
+    def get_group_queue(self):
+        return self.backend.create_queue()
+
+    async def connect(self):
+        await self.backend.group_add('storm', self)
+
+    async def storm(self, event):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+
+async def run(policy, max_queue_size, fast, messages, size, samples):
+    if policy == 'unbounded':
+        backend = BaseGroupBackend(prefix=f'bench_{policy}')
+    else:
+        backend = BaseGroupBackend(
+            prefix=f'bench_{policy}', max_queue_size=max_queue_size,
+            overflow_policy=policy)
+
+    consumers = [StormConsumer(backend, 0) for _ in range(fast)]
+    slow = StormConsumer(backend, 0.01)
+    websockets = [FakeWebsocket() for _ in range(fast + 1)]
+    tasks = [
+        asyncio.create_task(consumer(websocket))
+        for consumer, websocket in zip([*consumers, slow], websockets)
+    ]
+    await asyncio.sleep(0.1)
+
+    payload = 'x' * size
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    memory = []
+    for index in range(messages):
+        await backend.group_message(
+            'storm', GroupMessage('storm', f'{index}{payload}'))
+        # Fast consumers keep up, the slow one doesn't
+        await asyncio.sleep(0)
+        if (index + 1) % (messages // samples) == 0:
+            memory.append(tracemalloc.get_traced_memory()[0] - baseline)
+    tracemalloc.stop()
+
+    counters = backend.group_counters('storm')
+    for websocket in websockets:
+        await websocket.close()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return memory, counters, websockets[-1].close_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fast', type=int, default=10)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=1024)
+    parser.add_argument('--max-queue-size', type=int, default=100)
+    parser.add_argument('--samples', type=int, default=4)
+    parser.add_argument('--policies', nargs='+', default=[
+        'unbounded', 'drop_oldest', 'drop_newest', 'coalesce', 'disconnect'])
+    args = parser.parse_args()
+
+    for policy in args.policies:
+        memory, counters, close_code = asyncio.run(run(
+            policy, args.max_queue_size, args.fast, args.messages, args.size,
+            args.samples))
+        print(f'{policy:>11} memory(KiB)=' +
+              ' '.join(f'{m / 1024:8.0f}' for m in memory) +
+              ' ' + ' '.join(f'{k}={v}' for k, v in counters.items()) +
+              f' slow_close={close_code}')
+
+
+if __name__ == '__main__':
+    main()
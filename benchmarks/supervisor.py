@@ -0,0 +1,161 @@
+"""
+Restarting a worker killed with SIGKILL: the old supervisor loop checking
+the workers every 2 seconds against the WorkerSupervisor watching their
+process sentinels.
+
+Every worker runs a websockets server on a unix socket and reports when it
+accepts connections. Reports the time from the kill until the supervisor
+sees the exit and until the worker is back in the membership, over K kills.
+The old loop adds the workers as soon as they are started, not when they
+accept connections.
+Then runs a worker crashing at start and reports the restart delays.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import tempfile
+import time
+
+import websockets
+
+from django_websockets.server.horchestration import WorkerMembership, WorkerSupervisor
+
+
+def worker(directory, namespace, ready, crash=False):
+    async def run():
+        if crash:
+            raise RuntimeError('crashed at start')
+
+        async def echo(websocket):
+            async for message in websocket:
+                await websocket.send(message)
+
+        async with websockets.unix_serve(echo, path=f'{directory}/{namespace}.sock'):
+            if ready:
+                ready.send(namespace)
+                ready.close()
+            await asyncio.Future()
+
+    asyncio.run(run())
+
+
+class PollingSupervisor(object):
+    """
+    Supervisor loop before WorkerSupervisor, checking the workers every
+    *interval* seconds
+    """
+
+    def __init__(self, directory, namespaces, membership, interval=2):
+        self.directory = directory
+        self.namespaces = namespaces
+        self.membership = membership
+        self.interval = interval
+        self.processes = {}
+        self.exited_at = {}
+        self.context = multiprocessing.get_context('spawn')
+
+    async def run(self):
+        while True:
+            for namespace in self.namespaces:
+                process = self.processes.get(namespace)
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        self.membership.discard(namespace)
+                        self.exited_at[namespace] = time.monotonic()
+                    process = self.context.Process(
+                        target=worker, args=(self.directory, namespace, None))
+                    process.start()
+                    self.processes[namespace] = process
+                    break
+            else:
+                for namespace in self.namespaces:
+                    self.membership.add(namespace)
+                await asyncio.sleep(self.interval)
+
+    def kill(self):
+        for process in self.processes.values():
+            process.kill()
+            process.join()
+
+
+async def wait_for(predicate):
+    while not predicate():
+        await asyncio.sleep(0.001)
+
+
+async def restarts(name, workers, kills):
+    directory = tempfile.mkdtemp()
+    namespaces = [f'worker_{i}' for i in range(workers)]
+    membership = WorkerMembership()
+    if name == 'polling':
+        supervisor = PollingSupervisor(directory, namespaces, membership)
+        task = asyncio.create_task(supervisor.run())
+    else:
+        supervisor = WorkerSupervisor(
+            worker, lambda namespace, ready: (directory, namespace, ready),
+            namespaces, membership, stable_after=0)
+        supervisor.start()
+    await wait_for(lambda: len(membership) == workers)
+
+    random.seed(0)
+    detected, restarted = [], []
+    for i in range(kills):
+        namespace = namespaces[i % workers]
+        # At any point of the polling interval
+        await asyncio.sleep(random.uniform(0.3, 2.3))
+        killed_at = time.monotonic()
+        os.kill(supervisor.processes[namespace].pid, signal.SIGKILL)
+        await wait_for(lambda: supervisor.exited_at.get(namespace, 0) > killed_at)
+        detected.append(supervisor.exited_at[namespace] - killed_at)
+        await wait_for(lambda: namespace in membership)
+        restarted.append(time.monotonic() - killed_at)
+
+    if name == 'polling':
+        task.cancel()
+        supervisor.kill()
+    else:
+        await supervisor.stop(1)
+    return detected, restarted
+
+
+async def crash_loop(crashes):
+    directory = tempfile.mkdtemp()
+    supervisor = WorkerSupervisor(
+        worker, lambda namespace, ready: (directory, namespace, ready, True),
+        ['worker_0'], WorkerMembership())
+    supervisor.start()
+    starts = []
+    while len(starts) < crashes:
+        started_at = supervisor.started_at['worker_0']
+        if not starts or started_at != starts[-1]:
+            starts.append(started_at)
+        await asyncio.sleep(0.001)
+    await supervisor.stop(1)
+    return [after - before for before, after in zip(starts, starts[1:])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--kills', type=int, default=10)
+    parser.add_argument('--crashes', type=int, default=6)
+    args = parser.parse_args()
+
+    for name in ['polling', 'sentinel']:
+        detected, restarted = asyncio.run(restarts(name, args.workers, args.kills))
+        print(f'{name:>10} kills={args.kills} '
+              f'exit seen mean={statistics.mean(detected) * 1e3:7.1f} ms '
+              f'max={max(detected) * 1e3:7.1f} ms '
+              f'back in membership mean={statistics.mean(restarted) * 1e3:7.1f} ms '
+              f'max={max(restarted) * 1e3:7.1f} ms')
+
+    delays = asyncio.run(crash_loop(args.crashes))
+    print(f'{"crashing":>10} restart delays=' + ' '.join(f'{delay:.2f}s' for delay in delays))
+
+
+if __name__ == '__main__':
+    main()
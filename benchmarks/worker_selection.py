@@ -0,0 +1,88 @@
+"""
+Picking the worker of a proxied connection from a Manager list of W
+workers: the old RoundRobQueue copying the list through the manager on
+every call, against the local copy of the current one.
+
+Then simulates C connections arriving while others close, a fraction of
+them long-lived, and reports how the open connections are spread over the
+workers with each balance.
+"""
+import argparse
+import heapq
+import multiprocessing
+import random
+import time
+
+from django_websockets.server.horchestration import BALANCES, RoundRobQueue
+
+
+class ListRoundRobQueue(object):
+    """
+    RoundRobQueue before the local copy
+    """
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self.idx = 0
+
+    def next(self):
+        try:
+            return [
+                *self._iterator
+            ][self.idx % len(self._iterator)]
+        finally:
+            self.idx += 1
+
+
+def selection(workers_list, picks):
+    for name, queue in [('manager', ListRoundRobQueue(workers_list)),
+                        ('local', RoundRobQueue(workers_list))]:
+        started = time.perf_counter()
+        for _ in range(picks):
+            queue.next()
+        elapsed = time.perf_counter() - started
+        print(f'{name:>18} per pick={elapsed / picks * 1e6:8.2f} us')
+
+
+def spread(workers_list, balance, connections, long_lived):
+    """
+    Opens the connections one per tick. Short ones last 1 to 20 ticks, the
+    long-lived ones outlive the simulation
+    """
+    random.seed(0)
+    queue = RoundRobQueue(workers_list, balance)
+    closing = []
+    for tick in range(connections):
+        while closing and closing[0][0] <= tick:
+            queue.release(heapq.heappop(closing)[1])
+        worker = queue.acquire()
+        # Every W-th connection is long-lived, so round robin lands them
+        # on the same workers
+        if tick % len(queue) == 0 and random.random() < long_lived * len(queue):
+            continue
+        heapq.heappush(closing, (tick + random.randint(1, 20), worker))
+    return queue.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--picks', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=100000)
+    parser.add_argument('--long-lived', type=float, default=0.05)
+    args = parser.parse_args()
+
+    manager = multiprocessing.Manager()
+    workers_list = manager.list([f'worker_{i}' for i in range(args.workers)])
+    selection(workers_list, args.picks)
+
+    for balance in BALANCES:
+        connections = spread(workers_list, balance, args.connections, args.long_lived)
+        counts = sorted(connections.values())
+        print(f'{balance:>18} open connections min={counts[0]:6} max={counts[-1]:6} '
+              f'total={sum(counts):6}')
+    manager.shutdown()
+
+
+if __name__ == '__main__':
+    main()
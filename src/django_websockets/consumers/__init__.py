@@ -1,13 +1,15 @@
 import inspect
 import traceback
-from typing import AsyncIterable, Awaitable, Callable, Coroutine, Dict, Iterable, Set, Type, Union
+from typing import AsyncIterable, Awaitable, Callable, Coroutine, Dict, Iterable, Type, Union
 import warnings
 import websockets
+from websockets.protocol import State
 from websockets.server import WebSocketServerProtocol
 from websockets.typing import Data
 import asyncio
 import functools
 from django_websockets.groups import GroupMessage
+from django_websockets.groups.queues import GroupQueue, QueueOverflow
 
 
 
@@ -21,11 +23,24 @@ class BaseConsumer(object):
 
     consumer_class: Type["BaseConsumer"]
 
-    # Maps all queues that this consumer is listening
-    # and the listening task it self
-    __group_lock: asyncio.Lock = asyncio.Lock()
-    __group_queues: Dict[str, asyncio.Queue] = dict()
-    __group_callbacks: Dict[str, Awaitable[Callable[...,bool]]] = dict()
+    # Group message types sent to the client as they are, without calling a
+    # handler. The frame is serialized once and shared by all consumers.
+    broadcast_types: Iterable[str] = ()
+
+    # Group message handlers by type, validated once per class
+    __handlers: Dict[str, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handlers = {}
+        for klass in reversed(cls.__mro__):
+            for name, attribute in vars(klass).items():
+                handlers.pop(name, None)
+                # Handlers are async methods receiving the message
+                if inspect.iscoroutinefunction(attribute) \
+                   and len(inspect.signature(attribute).parameters) == 2:
+                    handlers[name] = attribute
+        cls.__handlers = handlers
 
     def get_process_message_timeout(self) -> int:
         """
@@ -41,6 +56,21 @@ class BaseConsumer(object):
         except:
             return 0
 
+    def get_group_queue(self) -> GroupQueue:
+        """
+        Creates the inbox of the group messages. It's bounded by the
+        `max_queue_size`, `overflow_policy` and `coalesce_key` config of the
+        default channel layer.
+        """
+        from django.core.exceptions import ImproperlyConfigured
+        try:
+            channel_layer = self.channel_layer
+        except ImproperlyConfigured:
+            channel_layer = None
+        if channel_layer is None:
+            return GroupQueue()
+        return channel_layer.backend.create_queue()
+
     @property
     def channel_layer(self):
         from django_websockets.transport import get_channel_layer
@@ -58,10 +88,8 @@ class BaseConsumer(object):
                     ))
                 return
 
-        method = getattr(self, message.type, None)
-        if not method or \
-           not inspect.iscoroutinefunction(method) \
-           or len(inspect.signature(method).parameters.keys()) != 1:
+        handler = self.__handlers.get(message.type)
+        if handler is None:
             warnings.warn(
                 "Consumer '{}' received a group message of type '{}' but doesn't have a async method with this name that receives a Union[str|bytes]"
                 .format(
@@ -70,7 +98,11 @@ class BaseConsumer(object):
                 ))
             return
         try:
-            await method({**message})
+            # The message is shared by all the consumers of the group, so
+            # every handler gets its own dict to read or change, as in channels
+            await handler(self, {**message})
+        except StopConsumer:
+            raise
         except Exception as e:
             traceback.print_exc()
             warnings.warn(
@@ -80,65 +112,64 @@ class BaseConsumer(object):
                         str(e))
             )
 
+    def _get_group_queue(self) -> asyncio.Queue:
+        """
+        Returns the inbox where the group messages for this consumer must be put.
+        All groups share the same inbox so the messages are delivered in the order they arrive.
+        """
+        return self.__group_inbox
+
     async def _listen_to_group(self, group_name:str, group_queue: asyncio.Queue, on_stop: Awaitable[Callable]) -> bool:
         """
-        Adds start a queue listening task and add it to the groups and listeners maps.
-        Returns false if already listening and true otherwise
+        Register the group and the callback used to leave it.
+        Returns false if the queue isn't this consumer's inbox and true otherwise
         """
-        
-        async with self.__group_lock:
-            if self.__closing:
-                # Consumer is closing, so return false to make the queue to be removed
-                warnings.warn('Trying go add a closing connection to group.')
-                return False
-            
-            # check if already listening
-            if group_name in self.__group_queues:
-                if self.__group_queues[group_name]:
-                    # Check if the queue is the same
-                    if self.__group_queues[group_name] == group_queue:
-                        return True
-                    else:
-                        return False
-                else:
-                    # For some reason its empty, só add the new queue
-                    self.__group_queues[group_name] = group_queue
-                    return True
-            
-            self.__group_queues[group_name] = group_queue
+
+        if self.__closing:
+            # Consumer is closing, so return false to make the queue to be removed
+            warnings.warn('Trying go add a closing connection to group.')
+            return False
+
+        if group_queue is not self.__group_inbox:
+            return False
+
+        # check if already listening
+        if group_name not in self.__group_callbacks:
             self.__group_callbacks[group_name] = on_stop
-            
+
         return True
 
     async def _stop_listen_to_group(self, group_name:str, run_callback=True):
         """
-        Pop the task from the groups and listeners maps and wait for the task to finish
+        Pop the group from the listeners map and run its leaving callback
         """
-        callback = None
-        async with self.__group_lock:
-            callback = self.__group_callbacks.pop(group_name, None)
-            self.__group_queues.pop(group_name, None)
-            
+        callback = self.__group_callbacks.pop(group_name, None)
+
         if run_callback and callback:
             callback_coroutine = callback()
             await callback_coroutine
-        
+
         return group_name
 
-        
+    async def __stop_listen_to_groups(self):
+        """
+        Leave all groups. The callbacks only update the backends' registries,
+        so they run one after the other instead of as a task per group
+        """
+        while self.__group_callbacks:
+            await self._stop_listen_to_group(next(iter(self.__group_callbacks)))
+
     async def __dispose(self):
         """
         Mark consumer as closing and cleanup all tasks
         """
         self.__closing = True
 
-        async with self.__group_lock:
-            tasks = [self._stop_listen_to_group(group_name)
-                     for group_name in self.__group_queues]
-            
-        await asyncio.gather(
-            *tasks,
-            return_exceptions=False)
+        # Wakes up the receiving loop when disposed by another task
+        if self.__recv_task and self.__recv_task is not asyncio.current_task():
+            self.__recv_task.cancel()
+
+        await self.__stop_listen_to_groups()
         raise StopConsumer
         
     async def dispose(self):
@@ -175,120 +206,98 @@ class BaseConsumer(object):
             raise TypeError(
                 "method receive(self, data) must be a corroutine")
 
-        while not self.__closing:
-            try:
+        # No polling here: the iterator wakes up only when a frame arrives and
+        # the consumer shutdown is handled by cancelling this task
+        try:
+            async for message in websocket:
                 try:
-                    message = await asyncio.wait_for(
-                        websocket.recv(),
-                        timeout=0.1
-                    )
-                except (asyncio.TimeoutError, asyncio.CancelledError):
-                    continue
-                else:
                     await self.receive(message)
-            except websockets.ConnectionClosed:
-                return
-            except:
-                traceback.print_exc()
-
-    async def __process_group(self, group_name):
-        try:
-            if group_name not in self.__group_queues:
-                warnings.warn(
-                    "Processing a group that has no queue {}".format(group_name))
-                return
-            
-            queue = self.__group_queues[group_name]
-            message = await asyncio.wait_for(
-                queue.get(),
-                timeout=1
-            )
-            await self.__process(message)
-            
-        except asyncio.TimeoutError:
-            pass
-        except asyncio.CancelledError:
+                except (StopConsumer, websockets.ConnectionClosed):
+                    raise
+                except:
+                    traceback.print_exc()
+        except websockets.ConnectionClosed:
             return
-        except:
-            traceback.print_exc()
-        
 
-    async def __recv_group(self):
+    async def __send_frame(self, websocket: WebSocketServerProtocol, message: GroupMessage):
+        """
+        Writes the shared frame of a broadcast message. Falls back to send()
+        when an extension (e.g. permessage-deflate) transforms the frames
+        of this connection or a fragmented message is being sent
         """
-        Wait for messages on the queue and processes it
+        if websocket.state is State.OPEN \
+           and not websocket.extensions \
+           and websocket._fragmented_message_waiter is None:
+            websocket.transport.write(message.frame)
+            # Only waits when the transport asked to pause writing
+            if websocket._paused:
+                await websocket.drain()
+        else:
+            await websocket.send(message.message)
+
+    async def __recv_group(self, websocket: WebSocketServerProtocol):
+        """
+        Wait for messages on the inbox and processes them as soon as they arrive
         """
 
         try:
-            # Store the groups handled in each interation
-            running_groups: Set[str] = set()
-
-            while not self.__closing:
+            while True:
                 try:
-                    # Make a copy of all current groups name
-                    async with self.__group_lock:
-                        for group_name in self.__group_queues.keys():
-                            running_groups.add(group_name)
-
-                    if not running_groups:
-                        await asyncio.sleep(0.1)
-                        continue
-
-                    # Execute ther recv for every group
-                    await asyncio.gather(
-                        *[self.__process_group(group_name) for group_name in running_groups],
-                        return_exceptions=False)
-
-                    # Get the list of groups that needs to be removed
-                    async with self.__group_lock:
-                        groups_to_remove = [
-                            group_name
-                            for group_name in running_groups
-                            if group_name not in self.__group_queues
-                        ]
-
-                    if groups_to_remove:
-                        # Cleanup groups
-                        for removed_group in await asyncio.gather(*[
-                            self._stop_listen_to_group(group_name) for group_name in groups_to_remove],
-                            return_exceptions=False):
-
-                            running_groups.remove(removed_group)
+                    message = await self.__group_inbox.get()
+                except QueueOverflow:
+                    # Too slow to read its group messages, so it is disconnected
+                    warnings.warn(
+                        "Consumer '{}' overflowed its group queue, closing the connection."
+                        .format(self.__class__.__name__))
+                    await websocket.close(1013, "Group messages overflow")
+                    break
+                try:
+                    if isinstance(message, GroupMessage) \
+                       and message.type in self.broadcast_types:
+                        await self.__send_frame(websocket, message)
+                    else:
+                        await self.__process(message)
+                except (StopConsumer, websockets.ConnectionClosed):
+                    break
                 except asyncio.CancelledError:
-                    pass
+                    raise
                 except:
                     traceback.print_exc()
-                        
-        except:
-            traceback.print_exc()
+        except asyncio.CancelledError:
+            pass
         finally:
-            # Stores the groups to prevent deathlock
-            async with self.__group_lock:
-                groups = list(self.__group_queues.keys())
-
-            await asyncio.gather(
-                *[self._stop_listen_to_group(group_name)
-                  for group_name in groups],
-                  return_exceptions=False
-            )
+            await self.__stop_listen_to_groups()
 
     async def __call__(self, websocket: WebSocketServerProtocol, *args, **kwargs):
         if not asyncio.iscoroutinefunction(self.connect):
             raise TypeError(
                 "method connect(scope, *args, **kwargs) must be a corroutine")
         self.__closing = False
+        self.__recv_task: asyncio.Task = None
+        self.__group_inbox = self.get_group_queue()
+        self.__group_callbacks: Dict[str, Awaitable[Callable]] = dict()
         self.scope = websocket.scope
-        group_task = asyncio.create_task(self.__recv_group())
+        group_task = asyncio.create_task(self.__recv_group(websocket))
         try:
             await self.connect()
-            await self.__recv(websocket)
+            if not self.__closing:
+                self.__recv_task = asyncio.create_task(self.__recv(websocket))
+                await self.__recv_task
         except StopConsumer:
-            pass            
+            pass
+        except asyncio.CancelledError:
+            # Receiving task cancelled by dispose()
+            if not self.__closing:
+                raise
         finally:
-            traceback.print_exc()
             group_task.cancel()
-            await self.close()
-            while not group_task.done():
-                await asyncio.sleep(0.1)
+            await asyncio.gather(group_task, return_exceptions=True)
+            try:
+                await self.close()
+            except StopConsumer:
+                # Raised by dispose(). It must not reach the server, where it's
+                # logged as a failure and its traceback keeps the consumer alive
+                pass
 
     # Is it necessary?
     # Kept for channel compatibility
@@ -1,23 +1,183 @@
 from typing import Union, Optional
+import zlib
+from websockets.frames import Frame, Opcode
+
+
+_pb2 = None
+
+
+def _wstransport_pb2():
+    # Imported on first use: importing the transport package imports this one
+    global _pb2
+    if _pb2 is None:
+        from django_websockets.transport.proto import wstransport_pb2
+        _pb2 = wstransport_pb2
+    return _pb2
 
 
 class GroupMessage(object):
+    """
+    Immutable message sent to a group. The same instance is queued for
+    every member, so it has no __dict__ and can't be changed once created.
+
+    It can be read as a mapping of its fields, e.g. `message['type']` or
+    `{**message}`.
+    """
+
+    __slots__ = ('type', 'message', 'params', '_frame')
+
+    # Fields of the mapping protocol
     slots = ('type', 'message', 'params')
 
     def __init__(self, type: str, message: Union[str, bytes], params:Optional[Union[str, bytes]]=None):
-        self.type = type
-        self.message = message
-        self.params = params
+        _set_type(self, type)
+        _set_message(self, message)
+        _set_params(self, params)
+        _set_frame(self, None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GroupMessage is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("GroupMessage is immutable")
+
+    def __reduce__(self):
+        return GroupMessage, (self.type, self.message, self.params)
+
+    def __eq__(self, other):
+        if not isinstance(other, GroupMessage):
+            return NotImplemented
+        return self.type == other.type \
+            and self.message == other.message \
+            and self.params == other.params
+
+    def __hash__(self):
+        return hash((self.type, self.message, self.params))
+
+    def __repr__(self):
+        return 'GroupMessage(type={!r}, message={!r}, params={!r})'.format(
+            self.type, self.message, self.params)
+
+    @classmethod
+    def from_proto(cls, proto) -> "GroupMessage":
+        """
+        Creates the message from a WSMessage, decompressing its payload.
+        A binary payload is kept as bytes
+        """
+        if proto.WhichOneof('payload') != 'data':
+            message = proto.message
+        elif proto.encoding:
+            message = zlib.decompress(proto.data)
+            if proto.text:
+                message = message.decode('utf-8')
+        else:
+            message = proto.data
+
+        return cls(
+            proto.type,
+            message,
+            proto.params if proto.HasField('params') else None)
+
+    def to_proto(self, compress_threshold: Optional[int] = None, compress_level=-1):
+        """
+        Returns the message as a WSMessage, with the payload in its data
+        field when it's binary.
+
+        With a *compress_threshold*, payloads of at least that size are
+        compressed with zlib at *compress_level* if it makes them smaller.
+        """
+        pb2 = _wstransport_pb2()
+        message = self.message
+        text = isinstance(message, str)
+
+        if compress_threshold is not None \
+           and message is not None \
+           and len(message) >= compress_threshold:
+            data = message.encode('utf-8') if text else bytes(message)
+            compressed = zlib.compress(data, compress_level)
+            if len(compressed) < len(data):
+                return pb2.WSMessage(
+                    type=self.type, data=compressed, params=self.params,
+                    encoding=pb2.ZLIB, text=text)
+
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            return pb2.WSMessage(type=self.type, data=bytes(message), params=self.params)
+        return pb2.WSMessage(type=self.type, message=message, params=self.params)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GroupMessage":
+        """
+        Creates the message from a serialized WSMessage
+        """
+        return cls.from_proto(_wstransport_pb2().WSMessage.FromString(data))
+
+    def to_bytes(self, compress_threshold: Optional[int] = None, compress_level=-1) -> bytes:
+        """
+        Returns the message as a serialized WSMessage, see to_proto()
+        """
+        return self.to_proto(compress_threshold, compress_level).SerializeToString()
+
+    @property
+    def frame(self) -> bytes:
+        """
+        The message as a server websocket frame. It's serialized on first use
+        and shared by every connection it's broadcast to
+        """
+        if self._frame is None:
+            if self.message is None:
+                # Sent as an empty text message, as it arrives through the
+                # transport
+                frame = Frame(Opcode.TEXT, b'')
+            elif isinstance(self.message, str):
+                frame = Frame(Opcode.TEXT, self.message.encode('utf-8'))
+            else:
+                frame = Frame(Opcode.BINARY, bytes(self.message))
+            _set_frame(self, frame.serialize(mask=False))
+        return self._frame
 
     def keys(self):
         return self.slots
-    
+
     def values(self):
         return [
             self.type,
             self.message,
             self.params
         ]
-    
+
+    def items(self):
+        return zip(self.slots, self.values())
+
+    def get(self, item, default=None):
+        if item == 'type':
+            return self.type
+        if item == 'message':
+            return self.message
+        if item == 'params':
+            return self.params
+        return default
+
     def __getitem__(self, item):
-        return self.__getattribute__(item)
+        if item == 'type':
+            return self.type
+        if item == 'message':
+            return self.message
+        if item == 'params':
+            return self.params
+        raise KeyError(item)
+
+    def __contains__(self, item):
+        return item in self.slots
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+
+# The slots are set through their descriptors, __setattr__ refuses it
+_set_type = GroupMessage.type.__set__
+_set_message = GroupMessage.message.__set__
+_set_params = GroupMessage.params.__set__
+_set_frame = GroupMessage._frame.__set__
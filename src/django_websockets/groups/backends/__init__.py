@@ -1,42 +1,101 @@
 import asyncio
 from functools import partial
-from typing import Dict, NoReturn, Set
+import sys
+from typing import Callable, Dict, List, NoReturn, Optional
 import warnings
 from django_websockets.consumers import BaseConsumer
 
 from django_websockets.groups import GroupMessage
+from django_websockets.groups.queues import DELIVERED, DROP_OLDEST, OUTCOMES, GroupQueue
+from django_websockets.groups.registry import GroupRegistry
 
 class BaseGroupBackend(object):
-    __group_listeners_lock: asyncio.Lock = asyncio.Lock()
-    __group_listeners: Dict[str, Set[asyncio.Queue]] = {}
 
-    def __init__(self, prefix=""):
+    def __init__(self, prefix="", max_queue_size=0, overflow_policy=DROP_OLDEST, coalesce_key=None):
         self.__prefix = prefix or ""
+        self.__registry = GroupRegistry()
+        self.max_queue_size = max_queue_size or 0
+        self.overflow_policy = overflow_policy or DROP_OLDEST
+        self.coalesce_key = coalesce_key
+        # Called with a group name and true when the group gets its first
+        # member, false when its last one leaves
+        self.interest_listener: Optional[Callable[[str, bool], None]] = None
+        # Fails early on a wrong policy
+        self.create_queue()
 
     def __get_group_name(self, group_base_name):
         """
-        Wraps group name with a prefix to prevent name clash
+        Wraps group name with a prefix to prevent name clash.
+        Interned so every membership of a group shares the same string
         """
-        return f'{self.__prefix}.__group.{group_base_name}'
-    
-    async def __on_stop(self, group_name, queue: asyncio.Queue()):
+        return sys.intern(f'{self.__prefix}.__group.{group_base_name}')
+
+    def __get_base_name(self, group_name):
+        return group_name[len(self.__get_group_name('')):]
+
+    def create_queue(self) -> GroupQueue:
+        """
+        Creates a consumer inbox bounded by the backend queue settings
+        """
+        return GroupQueue(
+            self.max_queue_size, self.overflow_policy, self.coalesce_key)
+
+    def group_counters(self, name) -> Dict[str, int]:
+        """
+        Returns how many messages sent to the group were delivered, dropped,
+        coalesced or hit a disconnected consumer
+        """
+        counter = self.__registry.counter(self.__get_group_name(name))
+        return {outcome.value: counter[outcome.value] for outcome in OUTCOMES}
+
+    def group_size(self, name) -> int:
+        """
+        Returns the number of consumers listening to the group
+        """
+        return self.__registry.group_size(self.__get_group_name(name))
+
+    def consumer_groups(self, consumer: BaseConsumer) -> List[str]:
+        """
+        Returns the groups the consumer is listening to
+        """
+        return [
+            self.__get_base_name(group_name)
+            for group_name in self.__registry.groups(consumer._get_group_queue())]
+
+    def group_names(self) -> List[str]:
+        """
+        Returns the groups having at least a member
+        """
+        return [self.__get_base_name(group_name) for group_name in self.__registry]
+
+    @property
+    def queued_messages(self) -> int:
+        """
+        Group messages waiting in the inboxes of the consumers
+        """
+        return sum(queue.qsize() for queue in self.__registry.all_members())
+
+    @property
+    def num_groups(self) -> int:
+        return len(self.__registry)
+
+    @property
+    def memberships(self) -> int:
+        return self.__registry.memberships
+
+    def __notify_interest(self, group_name, joined):
+        if self.interest_listener is not None:
+            self.interest_listener(self.__get_base_name(group_name), joined)
+
+    def __discard(self, group_name, queue):
+        if self.__registry.discard(group_name, queue) and group_name not in self.__registry:
+            self.__notify_interest(group_name, False)
+
+    async def __on_stop(self, group_name, queue: asyncio.Queue):
         """
         Removes the queue from the group listeners
         """
-        print("onStop {}".format(group_name))
-        async with self.__group_listeners_lock:
-            # Was group even created?
-            if group_name not in self.__group_listeners:
-                return
-
-            # Is group empty?
-            if self.__group_listeners[group_name]:
-                return
-            
-            try:
-                self.__group_listeners[group_name].remove(queue)
-            except KeyError:
-                pass
+        self.__discard(group_name, queue)
 
     async def group_add(self, group_name: str, consumer: BaseConsumer) -> NoReturn:
         """
@@ -46,16 +105,17 @@ class BaseGroupBackend(object):
         # Wraped group name
         group_name = self.__get_group_name(group_name)
         
-        async with self.__group_listeners_lock:
-            if group_name not in self.__group_listeners:
-                self.__group_listeners[group_name]: Set[asyncio.Queue] = set()
-        
-        queue = asyncio.Queue()
+        # Every group delivers to the consumer's inbox
+        queue = consumer._get_group_queue()
     
         # Callback to remove queue from list
         on_stop = partial(self.__on_stop, group_name, queue)
 
-        self.__group_listeners[group_name].add(queue)
+        if group_name not in self.__registry:
+            self.__registry.add(group_name, queue)
+            self.__notify_interest(group_name, True)
+        else:
+            self.__registry.add(group_name, queue)
         
         response = await consumer._listen_to_group(group_name, queue, on_stop)
         # if consumer returns false, call on_stop()
@@ -70,12 +130,11 @@ class BaseGroupBackend(object):
         # Wraped group name
         group_name = self.__get_group_name(group_name)
 
-        async with self.__group_listeners_lock:
-            try:
-                await consumer._stop_listen_to_group(group_name, False)
-                await self.__on_stop(group_name, consumer)
-            except RuntimeError:
-                pass
+        try:
+            await consumer._stop_listen_to_group(group_name, False)
+            self.__discard(group_name, consumer._get_group_queue())
+        except RuntimeError:
+            pass
 
     async def group_message(self, name, message: GroupMessage):
         """
@@ -85,16 +144,16 @@ class BaseGroupBackend(object):
         # Wraped group name
         group_name = self.__get_group_name(name)
 
-        if group_name not in self.__group_listeners:
+        if group_name not in self.__registry:
             warnings.warn(
                 "Sending a message for a not existing group {}".format(name))
             return
-        
-        if not self.__group_listeners[group_name]:
-            warnings.warn(
-                "Empty group listener {}".format(name))
-            return
-
 
-        for queue in self.__group_listeners[group_name]:
-            await queue.put(message)
+        # Never waits for a slow consumer, its queue applies the overflow policy
+        counter = self.__registry.counter(group_name)
+        for queue in self.__registry.members(group_name):
+            if isinstance(queue, GroupQueue):
+                counter[queue.offer(message).value] += 1
+            else:
+                queue.put_nowait(message)
+                counter[DELIVERED.value] += 1
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, Callable, Union
+
+from django_websockets.utils import Atom
+
+# Overflow policies, applied when a message arrives at a full queue
+DROP_OLDEST = Atom('drop_oldest')
+DROP_NEWEST = Atom('drop_newest')
+COALESCE = Atom('coalesce')
+DISCONNECT = Atom('disconnect')
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE, DISCONNECT)
+
+# Outcomes of GroupQueue.offer()
+DELIVERED = Atom('delivered')
+DROPPED = Atom('dropped')
+COALESCED = Atom('coalesced')
+DISCONNECTED = Atom('disconnected')
+
+OUTCOMES = (DELIVERED, DROPPED, COALESCED, DISCONNECTED)
+
+
+class QueueOverflow(Exception):
+    """
+    Raised by GroupQueue.get() once a queue with the disconnect policy has
+    overflowed
+    """
+
+
+class _Overflow: ...
+
+
+class GroupQueue(asyncio.Queue):
+    """
+    Queue of group messages with an optional bound.
+
+    When *maxsize* is reached, *policy* decides what happens to a new message:
+
+    *drop_oldest*: the oldest queued message is discarded.
+
+    *drop_newest*: the new message is discarded.
+
+    *coalesce*: the new message replaces the queued message with the same
+    key, or the oldest one if no message has it. *key* is the name of a
+    message field or a callable receiving the message, the type by default.
+
+    *disconnect*: the queue is emptied and get() raises QueueOverflow, so
+    the consumer can close the connection.
+    """
+
+    def __init__(self, maxsize=0, policy: Union[Atom, str] = DROP_OLDEST,
+                 key: Union[str, Callable[[Any], Any], None] = None):
+        super().__init__(maxsize or 0)
+        if policy not in POLICIES:
+            raise ValueError(
+                "Overflow policy must be one of {}, not '{}'".format(
+                    ", ".join(p.value for p in POLICIES), policy))
+
+        self.policy = next(p for p in POLICIES if p == policy)
+        if callable(key):
+            self.key = key
+        else:
+            key = key or 'type'
+            self.key = lambda message: message[key]
+        self.overflowed = False
+
+    def offer(self, message) -> Atom:
+        """
+        Puts the message without waiting, applying the overflow policy if
+        the queue is full. Returns the outcome
+        """
+        if self.overflowed:
+            return DISCONNECTED
+
+        if not self.full():
+            self.put_nowait(message)
+            return DELIVERED
+
+        if self.policy is DROP_NEWEST:
+            return DROPPED
+
+        if self.policy is DISCONNECT:
+            self.overflowed = True
+            self._queue.clear()
+            self.put_nowait(_Overflow)
+            return DISCONNECTED
+
+        if self.policy is COALESCE:
+            key = self.key(message)
+            for index, queued in enumerate(self._queue):
+                if self.key(queued) == key:
+                    self._queue[index] = message
+                    return COALESCED
+
+        self.get_nowait()
+        self.put_nowait(message)
+        return DROPPED
+
+    async def get(self):
+        message = await super().get()
+        if message is _Overflow:
+            raise QueueOverflow
+        return message
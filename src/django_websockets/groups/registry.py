@@ -0,0 +1,123 @@
+from collections import Counter
+from typing import Dict, Hashable, Iterator, List, Set
+
+
+class GroupRegistry(object):
+    """
+    Group memberships indexed both ways: the members of every group and the
+    groups of every member. Adding, discarding and looking up a membership
+    are O(1), dropping a member is O(its groups) and a group is removed as
+    soon as its last member leaves.
+
+    Members must be hashable, the backends use the consumers' inboxes.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, Set[Hashable]] = {}
+        self._members: Dict[Hashable, Set[str]] = {}
+        self._counters: Dict[str, Counter] = {}
+        self._memberships = 0
+
+    def add(self, group: str, member: Hashable) -> bool:
+        """
+        Adds the member to the group, creating it if needed.
+        Returns false if it was already a member
+        """
+        members = self._groups.get(group)
+        if members is None:
+            members = self._groups[group] = set()
+            self._counters[group] = Counter()
+        elif member in members:
+            return False
+
+        members.add(member)
+        self._members.setdefault(member, set()).add(group)
+        self._memberships += 1
+        return True
+
+    def discard(self, group: str, member: Hashable) -> bool:
+        """
+        Removes the member from the group and the group if it's empty.
+        Returns false if it wasn't a member
+        """
+        members = self._groups.get(group)
+        if members is None or member not in members:
+            return False
+
+        members.discard(member)
+        if not members:
+            del self._groups[group]
+            del self._counters[group]
+
+        groups = self._members[member]
+        groups.discard(group)
+        if not groups:
+            del self._members[member]
+
+        self._memberships -= 1
+        return True
+
+    def discard_member(self, member: Hashable) -> List[str]:
+        """
+        Removes the member from all its groups. Returns the groups it left
+        """
+        groups = self._members.pop(member, None)
+        if not groups:
+            return []
+
+        for group in groups:
+            members = self._groups[group]
+            members.discard(member)
+            if not members:
+                del self._groups[group]
+                del self._counters[group]
+
+        self._memberships -= len(groups)
+        return list(groups)
+
+    def members(self, group: str) -> Set[Hashable]:
+        """
+        Members of the group. The set must not be changed
+        """
+        return self._groups.get(group, set())
+
+    def groups(self, member: Hashable) -> Set[str]:
+        """
+        Groups of the member. The set must not be changed
+        """
+        return self._members.get(member, set())
+
+    def all_members(self) -> Iterator[Hashable]:
+        """
+        Members of any group
+        """
+        return iter(self._members)
+
+    def counter(self, group: str) -> Counter:
+        """
+        Delivery counters of the group, living as long as it does
+        """
+        return self._counters.get(group, Counter())
+
+    def group_size(self, group: str) -> int:
+        return len(self._groups.get(group, ()))
+
+    @property
+    def memberships(self) -> int:
+        """
+        Total of memberships of all groups
+        """
+        return self._memberships
+
+    @property
+    def num_members(self) -> int:
+        return len(self._members)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __contains__(self, group: str) -> bool:
+        return group in self._groups
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._groups)
@@ -1,6 +1,6 @@
-import asyncio
 from django.core.management import BaseCommand
 from django_websockets.server.arguments import BindType, workers
+from django_websockets.server.horchestration import AUTO, BALANCES, LOOPS, ROUND_ROBIN
 from django_websockets.server.main import main
 
 
@@ -19,6 +19,30 @@ class Command(BaseCommand):
                             required=True,
                             type=workers,
                             help='Num of workers')
+        parser.add_argument('--direct',
+                            dest='direct',
+                            action='store_true',
+                            help='Workers accept the client connections directly '
+                                 'instead of being proxied by the master')
+        parser.add_argument('--balance',
+                            dest='balance',
+                            choices=BALANCES,
+                            default=ROUND_ROBIN,
+                            help='How the master picks the worker of a connection: '
+                                 'in turn, the one with fewer open connections or '
+                                 'the one with fewer of two random ones')
+        parser.add_argument('--graceful-timeout',
+                            dest='graceful_timeout',
+                            type=float,
+                            default=30,
+                            help='Seconds the workers have on shutdown to send the '
+                                 'queued group messages and close the connections')
+        parser.add_argument('--loop',
+                            dest='loop',
+                            choices=LOOPS,
+                            default=AUTO,
+                            help='Event loop of the master and the workers, auto '
+                                 'uses uvloop when it is installed')
         
     def execute(self, *args, **options):
-        asyncio.run(main(options['bind'], settings=options.get('settings'), workers=options['workers']))
+        main(options['bind'], settings=options.get('settings'), workers=options['workers'], direct=options['direct'], balance=options['balance'], graceful_timeout=options['graceful_timeout'], event_loop=options['loop'])
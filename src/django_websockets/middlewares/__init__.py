@@ -1,6 +1,9 @@
 from functools import partial
+import importlib
+import sys
 from typing import Awaitable, Callable
 from websockets.server import WebSocketServerProtocol
+from django.core.signals import setting_changed
 from django.utils.module_loading import import_string
 
 
@@ -49,6 +52,66 @@ class Middleware(object):
             "A middleware must implement a async method __call__(Self@Middleware, WebSocketServerProtocol, Awaitable[() -> Middleware])")
 
 
-async def call_middleware_stack(websocket: WebSocketServerProtocol, idx=0):
-    if len(active_middlewares) > idx:
-        return await active_middlewares[idx]()(websocket, partial(call_middleware_stack, websocket, idx+1))
+MiddlewareStack = Callable[[WebSocketServerProtocol], Awaitable]
+
+__middleware_stack: MiddlewareStack = None
+
+
+async def __end_of_stack(websocket: WebSocketServerProtocol):
+    return None
+
+
+def __chain(middleware: Middleware, call_next: MiddlewareStack) -> MiddlewareStack:
+    async def stack(websocket: WebSocketServerProtocol):
+        return await middleware(websocket, partial(call_next, websocket))
+    return stack
+
+
+def build_middleware_stack() -> MiddlewareStack:
+    """
+    Imports and instantiates the WEBSOCKET_MIDDLEWARE once, chaining them
+    in a single callable that runs them for a connection
+    """
+    stack = __end_of_stack
+    for middleware_class in reversed([*active_middlewares]):
+        stack = __chain(middleware_class(), stack)
+    return stack
+
+
+def get_middleware_stack() -> MiddlewareStack:
+    """
+    Returns the middleware stack of this process, building it on first use
+    """
+    global __middleware_stack
+    if __middleware_stack is None:
+        __middleware_stack = build_middleware_stack()
+    return __middleware_stack
+
+
+def reload_middleware_stack():
+    """
+    Drops the middleware stack so the next connection rebuilds it from the
+    settings, and reloads the route module so its edited urlpatterns are
+    used. Meant for development: the modules of the middlewares and the
+    consumers aren't reloaded, changing them still takes a restart
+    """
+    global __middleware_stack
+    __middleware_stack = None
+
+    from django.conf import settings
+    route_module = sys.modules.get(getattr(settings, 'WEBSOCKET_ROUTE_MODULE', None))
+    if route_module is not None:
+        importlib.reload(route_module)
+
+
+def __on_setting_changed(setting, **kwargs):
+    global __middleware_stack
+    if setting in ('WEBSOCKET_MIDDLEWARE', 'WEBSOCKET_ROUTE_MODULE'):
+        __middleware_stack = None
+
+
+setting_changed.connect(__on_setting_changed)
+
+
+async def call_middleware_stack(websocket: WebSocketServerProtocol):
+    return await get_middleware_stack()(websocket)
@@ -1,7 +1,6 @@
 from django_websockets.middlewares import Middleware
 from websockets.server import WebSocketServerProtocol
-from django.contrib.auth import get_user
-from django_websockets.middlewares.utils import database_sync_to_async
+from django_websockets.middlewares.users import get_user_resolver
 
 
 class AuthMiddleware(Middleware):
@@ -16,6 +15,6 @@ class AuthMiddleware(Middleware):
         if not websocket.scope.get('session'):
             raise RuntimeError("This middleware requires ScopeMiddleware")
         
-        websocket.scope['user'] = await database_sync_to_async(get_user)(websocket.scope)
+        websocket.scope['user'] = await get_user_resolver().get_user(websocket.scope)
 
         return await call_next_middleware()
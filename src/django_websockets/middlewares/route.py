@@ -3,42 +3,41 @@ from django_websockets.middlewares import Middleware
 from websockets.server import WebSocketServerProtocol
 from django.conf import settings
 import importlib
+from django_websockets.middlewares.router import Router
 from django_websockets.middlewares.utils import database_sync_to_async
 
 
 class RouteMiddleware(Middleware):
 
-    async def __call__(self, websocket: WebSocketServerProtocol, call_next_middleware):
-        module = importlib.import_module(settings.WEBSOCKET_ROUTE_MODULE)
+    def __init__(self):
+        # Imported and compiled once, when the middleware stack is built
+        self.module = importlib.import_module(settings.WEBSOCKET_ROUTE_MODULE)
+        self.router = Router(self.module.urlpatterns)
 
-        found = False
-        for pattern in module.urlpatterns:
-            resolver_match = pattern.resolve(websocket.path)
-            if resolver_match:
-                found = True
-                websocket.scope['url_route'] = {
-                    'url': websocket.path,
-                    'args': resolver_match.args,
-                    'kwargs': resolver_match.kwargs
-                }
-                if asyncio.iscoroutinefunction(resolver_match.func):
-                    await resolver_match.func(
-                        websocket,
-                        *resolver_match.args,
-                        **resolver_match.kwargs
-                    )
-                else:
-                    await database_sync_to_async(
-                        resolver_match.func
-                    )(
-                        websocket,
-                        *resolver_match.args,
-                        **resolver_match.kwargs
-                    )
-        if not found:
-            print(websocket.path)
-            for p in module.urlpatterns:
-                print(p)
+    async def __call__(self, websocket: WebSocketServerProtocol, call_next_middleware):
+        resolver_match = self.router.resolve(websocket.path)
+        if not resolver_match:
             return await websocket.close(1003, "not_found")
 
+        # The match is cached, so the connection gets its own kwargs
+        websocket.scope['url_route'] = {
+            'url': websocket.path,
+            'args': resolver_match.args,
+            'kwargs': {**resolver_match.kwargs}
+        }
+        if asyncio.iscoroutinefunction(resolver_match.func):
+            await resolver_match.func(
+                websocket,
+                *resolver_match.args,
+                **resolver_match.kwargs
+            )
+        else:
+            await database_sync_to_async(
+                resolver_match.func
+            )(
+                websocket,
+                *resolver_match.args,
+                **resolver_match.kwargs
+            )
+
         return await call_next_middleware()
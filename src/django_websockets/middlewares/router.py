@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.urls import Resolver404, URLPattern
+from django.urls.resolvers import ResolverMatch
+
+
+# Characters that end the literal start of a regex
+_REGEX_METACHARS = frozenset('.^$*+?{}[]|()')
+_QUANTIFIERS = frozenset('*+?{')
+
+# Capturing groups, turned into non capturing ones in the combined regex
+_GROUP = re.compile(r'(?<!\\)\((?:\?P<\w+>)?(?!\?)')
+
+# Backreferences would point to other groups once joined
+_BACKREFERENCE = re.compile(r'\(\?P=|\\\d')
+
+
+def _has_alternation(regex: str) -> bool:
+    """
+    Whether the regex has a `|` outside of its groups and sets, splitting
+    it in alternatives that may start differently
+    """
+    depth = 0
+    in_set = False
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == '\\':
+            index += 2
+            continue
+        if in_set:
+            if char == ']':
+                in_set = False
+        elif char == '[':
+            in_set = True
+            # A ] right after [ or [^ is part of the set
+            if regex[index + 1:index + 2] == '^':
+                index += 1
+            if regex[index + 1:index + 2] == ']':
+                index += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        index += 1
+    return False
+
+
+def _static_prefix(regex: str) -> Optional[str]:
+    """
+    Returns the literal text every match of an anchored regex starts with,
+    or None if the regex isn't anchored at the start or has alternatives
+    at the top level, e.g. `^/a|/b`
+    """
+    if _has_alternation(regex):
+        return None
+
+    if regex.startswith('^'):
+        regex = regex[1:]
+    elif regex.startswith('\\A'):
+        regex = regex[2:]
+    else:
+        return None
+
+    prefix = []
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == '\\':
+            escaped = regex[index + 1:index + 2]
+            if not escaped or escaped.isalnum():
+                break
+            char, step = escaped, 2
+        elif char in _REGEX_METACHARS:
+            break
+        else:
+            step = 1
+
+        # A quantified char may not be there
+        if regex[index + step:index + step + 1] in _QUANTIFIERS:
+            break
+        prefix.append(char)
+        index += step
+
+    return ''.join(prefix)
+
+
+class _TrieNode(object):
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.routes: List[int] = []
+
+
+class Router(object):
+    """
+    Resolves a path against url patterns made with django's path() and
+    re_path(), returning the match of the first pattern in the list that
+    resolves it, like the url resolver does.
+
+    The static prefixes of the patterns are kept in a trie, so only the
+    patterns whose prefix starts the path are candidates. The regexes of
+    the candidates are joined in a single one that finds the first of them
+    matching, which is then resolved by django to keep its semantics (e.g.
+    path converters). Results are kept in a LRU cache of *cache_size*
+    paths.
+    """
+
+    def __init__(self, urlpatterns: Iterable, cache_size=1024):
+        self.urlpatterns = list(urlpatterns)
+        self.cache_size = cache_size
+        self.__cache: "OrderedDict[str, Optional[ResolverMatch]]" = OrderedDict()
+        self.__combined: Dict[Tuple[int, ...], Optional[re.Pattern]] = {}
+        self.__trie = _TrieNode()
+        # Regex of the patterns that can be joined, by index
+        self.__regexes: Dict[int, str] = {}
+
+        for index, pattern in enumerate(self.urlpatterns):
+            regex = pattern.pattern.regex.pattern
+            prefix = _static_prefix(regex)
+            node = self.__trie
+            for char in prefix or '':
+                node = node.children.setdefault(char, _TrieNode())
+            node.routes.append(index)
+
+            # Includes resolve the rest of the path on their own patterns
+            if isinstance(pattern, URLPattern) \
+               and prefix is not None \
+               and not _BACKREFERENCE.search(regex):
+                self.__regexes[index] = regex
+
+    def __candidates(self, path: str) -> Tuple[int, ...]:
+        node = self.__trie
+        candidates = list(node.routes)
+        for char in path:
+            node = node.children.get(char)
+            if node is None:
+                break
+            candidates.extend(node.routes)
+        return tuple(sorted(candidates))
+
+    def __get_combined(self, candidates: Tuple[int, ...]) -> Optional[re.Pattern]:
+        if candidates not in self.__combined:
+            alternatives = [
+                f'(?P<_route{index}>{_GROUP.sub("(?:", self.__regexes[index])})'
+                for index in candidates if index in self.__regexes
+            ]
+            try:
+                combined = re.compile('|'.join(alternatives)) if alternatives else None
+            except re.error:
+                combined = None
+            self.__combined[candidates] = combined
+        return self.__combined[candidates]
+
+    def __resolve(self, path: str) -> Optional[ResolverMatch]:
+        candidates = self.__candidates(path)
+        combined = self.__get_combined(candidates)
+
+        # Joined patterns before the first one matching can't resolve
+        first = -1
+        if combined is not None:
+            match = combined.match(path)
+            first = int(match.lastgroup[6:]) if match else len(self.urlpatterns)
+
+        for index in candidates:
+            if index < first and index in self.__regexes and combined is not None:
+                continue
+            try:
+                resolver_match = self.urlpatterns[index].resolve(path)
+            except Resolver404:
+                # An include matching the start of the path but none of its
+                # patterns, django tries the next pattern
+                continue
+            if resolver_match:
+                return resolver_match
+        return None
+
+    def resolve(self, path: str) -> Optional[ResolverMatch]:
+        """
+        Returns the match of the first pattern resolving the path or None
+        """
+        try:
+            self.__cache.move_to_end(path)
+            return self.__cache[path]
+        except KeyError:
+            pass
+
+        resolver_match = self.__resolve(path)
+        self.__cache[path] = resolver_match
+        if len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+        return resolver_match
@@ -4,9 +4,8 @@ from django.conf import settings
 from django_websockets.middlewares.utils import get_cookie
 from django_websockets.middlewares import Middleware
 from websockets.server import WebSocketServerProtocol
-from django.contrib.sessions.middleware import SessionMiddleware
 
-from django_websockets.middlewares.utils import database_sync_to_async
+from django_websockets.middlewares.session import load_session
 
 
 class Scope(dict):
@@ -33,11 +32,8 @@ class ScopeMiddleware(Middleware):
         scope['HEADERS'] = websocket.request_headers
         scope['COOKIES'] = get_cookie(websocket)
 
-        sm = SessionMiddleware()
-        await database_sync_to_async(sm.process_request)(scope)
-
         session_key = scope['COOKIES'].get(settings.SESSION_COOKIE_NAME)
-        scope['session'] = sm.SessionStore(session_key)
+        scope['session'] = await load_session(session_key)
 
         websocket.scope = scope
 
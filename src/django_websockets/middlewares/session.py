@@ -0,0 +1,181 @@
+import asyncio
+from collections import OrderedDict
+import copy
+from importlib import import_module
+import time
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.signals import setting_changed
+
+from django_websockets.middlewares.utils import database_sync_to_async
+
+
+class SessionCache(object):
+    """
+    LRU cache of session data by session key. Entries expire *ttl* seconds
+    after they were loaded, a *ttl* of 0 disables the cache.
+
+    Concurrent loads of the same key are coalesced, so a reconnect storm
+    queries every session once.
+
+    Only the sessions saved or deleted by this process are evicted, a
+    logout handled by another process is seen once the entry expires.
+    """
+
+    def __init__(self, ttl=0, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.__entries: "OrderedDict[str, Tuple[float, Optional[str], dict]]" = OrderedDict()
+        self.__loading: Dict[str, asyncio.Future] = {}
+
+    def get(self, session_key: str) -> Optional[Tuple[Optional[str], dict]]:
+        """
+        Returns the (session key, data) loaded for the key if it didn't
+        expire. The key is None if the session doesn't exist
+        """
+        entry = self.__entries.get(session_key)
+        if entry is None:
+            return None
+
+        expires, loaded_key, data = entry
+        if expires < time.monotonic():
+            del self.__entries[session_key]
+            return None
+
+        self.__entries.move_to_end(session_key)
+        return loaded_key, data
+
+    def set(self, session_key: str, loaded_key: Optional[str], data: dict):
+        if self.ttl <= 0:
+            return
+        self.__entries[session_key] = (time.monotonic() + self.ttl, loaded_key, data)
+        self.__entries.move_to_end(session_key)
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self, session_key: str):
+        self.__entries.pop(session_key, None)
+
+    def clear(self):
+        self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    async def load(self, store: SessionBase) -> Tuple[Optional[str], dict]:
+        """
+        Loads the store data in the database thread
+        """
+        session_key = store.session_key
+        cached = self.get(session_key)
+        if cached is not None:
+            return cached
+
+        if session_key in self.__loading:
+            return await asyncio.shield(self.__loading[session_key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.__loading[session_key] = future
+        try:
+            data = await database_sync_to_async(store.load)()
+            # A missing or expired session has its key reset by load()
+            result = (store.session_key, data)
+            self.set(session_key, *result)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved so a load nobody waits for isn't logged
+            future.exception()
+            raise
+        finally:
+            del self.__loading[session_key]
+        return result
+
+
+def __create_session_cache() -> SessionCache:
+    return SessionCache(
+        ttl=getattr(settings, 'WEBSOCKET_SESSION_CACHE_TTL', 0),
+        maxsize=getattr(settings, 'WEBSOCKET_SESSION_CACHE_SIZE', 10000))
+
+
+session_cache: SessionCache = None
+
+
+class CachedSessionMixin(object):
+    """
+    Evicts the session from the session cache when it's saved or deleted,
+    which flush() and cycle_key() do too
+    """
+
+    def __evict(self, session_key=None):
+        session_key = session_key or self.session_key
+        if session_key and session_cache is not None:
+            session_cache.invalidate(session_key)
+
+    def save(self, *args, **kwargs):
+        self.__evict()
+        return super().save(*args, **kwargs)
+
+    def delete(self, session_key=None):
+        self.__evict(session_key)
+        return super().delete(session_key)
+
+    async def asave(self, *args, **kwargs):
+        self.__evict()
+        return await super().asave(*args, **kwargs)
+
+    async def adelete(self, session_key=None):
+        self.__evict(session_key)
+        return await super().adelete(session_key)
+
+
+__session_stores: Dict[type, type] = {}
+
+
+def get_session_cache() -> SessionCache:
+    global session_cache
+    if session_cache is None:
+        session_cache = __create_session_cache()
+    return session_cache
+
+
+async def load_session(session_key: Optional[str]) -> SessionBase:
+    """
+    Returns a SessionStore of the SESSION_ENGINE with its data loaded
+    """
+    engine = import_module(settings.SESSION_ENGINE)
+    store_class = __session_stores.get(engine.SessionStore)
+    if store_class is None:
+        store_class = __session_stores[engine.SessionStore] = type(
+            engine.SessionStore.__name__, (CachedSessionMixin, engine.SessionStore), {})
+    store: SessionBase = store_class(session_key)
+    if not store.session_key:
+        # No cookie or not a valid key
+        return store
+
+    loaded_key, data = await get_session_cache().load(store)
+    if loaded_key != store.session_key:
+        store = store_class(loaded_key)
+
+    # Every connection gets its own copy to change
+    store._session_cache = copy.deepcopy(data)
+    return store
+
+
+def __on_user_logged_out(sender, request=None, **kwargs):
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key and session_cache is not None:
+        session_cache.invalidate(session.session_key)
+
+
+def __on_setting_changed(setting, **kwargs):
+    global session_cache
+    if setting in ('WEBSOCKET_SESSION_CACHE_TTL', 'WEBSOCKET_SESSION_CACHE_SIZE', 'SESSION_ENGINE'):
+        session_cache = None
+
+
+user_logged_out.connect(__on_user_logged_out)
+setting_changed.connect(__on_setting_changed)
@@ -0,0 +1,181 @@
+import asyncio
+from collections import OrderedDict
+import copy
+import time
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user, get_user_model, load_backend)
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.utils.crypto import constant_time_compare
+
+from django_websockets.middlewares.utils import database_sync_to_async
+
+
+class UserResolver(object):
+    """
+    Resolves the user of a connection scope like django.contrib.auth.get_user,
+    sharing the queries between connections:
+
+    Users are cached by backend and id for *ttl* seconds, up to *maxsize*
+    of them, when *ttl* is positive. Concurrent lookups of the same user wait for the same query and
+    the misses of a loop iteration are fetched together, with a single
+    `pk__in` query for the ModelBackend.
+    """
+
+    def __init__(self, ttl=0, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.__entries: "OrderedDict[Tuple[str, Any], Tuple[float, Any]]" = OrderedDict()
+        self.__loading: Dict[Tuple[str, Any], asyncio.Future] = {}
+        self.__batch: Dict[str, List[Any]] = {}
+        self.__tasks = set()
+
+    def invalidate(self, user_id):
+        for backend_path in settings.AUTHENTICATION_BACKENDS:
+            self.__entries.pop((backend_path, user_id), None)
+
+    def clear(self):
+        self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __get(self, key):
+        entry = self.__entries.get(key)
+        if entry is None:
+            return False, None
+
+        expires, user = entry
+        if expires < time.monotonic():
+            del self.__entries[key]
+            return False, None
+
+        self.__entries.move_to_end(key)
+        return True, user
+
+    def __set(self, key, user):
+        if self.ttl <= 0:
+            return
+        self.__entries[key] = (time.monotonic() + self.ttl, user)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+
+    @staticmethod
+    def __query(backend_path: str, user_ids: List[Any]) -> Dict[Any, Any]:
+        from django.contrib.auth.backends import ModelBackend
+
+        backend = load_backend(backend_path)
+        if isinstance(backend, ModelBackend) \
+           and type(backend).get_user is ModelBackend.get_user:
+            users = get_user_model()._default_manager.filter(pk__in=user_ids)
+            return {
+                user.pk: user for user in users
+                if backend.user_can_authenticate(user)
+            }
+        return {user_id: backend.get_user(user_id) for user_id in user_ids}
+
+    async def __fetch(self, backend_path: str, user_ids: List[Any]):
+        try:
+            users = await database_sync_to_async(self.__query)(backend_path, user_ids)
+        except BaseException as e:
+            for user_id in user_ids:
+                future = self.__loading.pop((backend_path, user_id))
+                future.set_exception(e)
+                # Retrieved so a lookup nobody waits for isn't logged
+                future.exception()
+        else:
+            for user_id in user_ids:
+                key = (backend_path, user_id)
+                self.__set(key, users.get(user_id))
+                self.__loading.pop(key).set_result(users.get(user_id))
+
+    def __flush(self):
+        batch, self.__batch = self.__batch, {}
+        for backend_path, user_ids in batch.items():
+            task = asyncio.create_task(self.__fetch(backend_path, user_ids))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __load(self, backend_path: str, user_id):
+        key = (backend_path, user_id)
+        found, user = self.__get(key)
+        if found:
+            return user
+
+        future = self.__loading.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.__loading[key] = loop.create_future()
+            if not self.__batch:
+                loop.call_soon(self.__flush)
+            self.__batch.setdefault(backend_path, []).append(user_id)
+
+        return await asyncio.shield(future)
+
+    async def get_user(self, scope):
+        """
+        Returns the user of the scope session or an AnonymousUser
+        """
+        from django.contrib.auth.models import AnonymousUser
+
+        session = scope['session']
+        try:
+            user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+            backend_path = session[BACKEND_SESSION_KEY]
+        except (KeyError, ValidationError):
+            return AnonymousUser()
+
+        if backend_path not in settings.AUTHENTICATION_BACKENDS:
+            return AnonymousUser()
+
+        user = await self.__load(backend_path, user_id)
+        if user is None:
+            return AnonymousUser()
+
+        if hasattr(user, "get_session_auth_hash"):
+            session_hash = session.get(HASH_SESSION_KEY)
+            if not session_hash or not constant_time_compare(
+                    session_hash, user.get_session_auth_hash()):
+                # Fallback secrets cycle the session key and invalid hashes
+                # flush it, so django handles them
+                return await database_sync_to_async(get_user)(scope)
+
+        # Every connection gets its own instance to change
+        return copy.copy(user)
+
+
+user_resolver: UserResolver = None
+
+
+def get_user_resolver() -> UserResolver:
+    global user_resolver
+    if user_resolver is None:
+        user_resolver = UserResolver(
+            ttl=getattr(settings, 'WEBSOCKET_USER_CACHE_TTL', 0),
+            maxsize=getattr(settings, 'WEBSOCKET_USER_CACHE_SIZE', 10000))
+        user_model = get_user_model()
+        post_save.connect(__on_user_changed, sender=user_model,
+                          dispatch_uid='django_websockets.users')
+        post_delete.connect(__on_user_changed, sender=user_model,
+                            dispatch_uid='django_websockets.users')
+    return user_resolver
+
+
+def __on_user_changed(sender, instance, **kwargs):
+    if user_resolver is not None:
+        user_resolver.invalidate(instance.pk)
+
+
+def __on_setting_changed(setting, **kwargs):
+    global user_resolver
+    if setting in ('WEBSOCKET_USER_CACHE_TTL', 'WEBSOCKET_USER_CACHE_SIZE',
+                   'AUTHENTICATION_BACKENDS', 'AUTH_USER_MODEL'):
+        user_resolver = None
+
+
+setting_changed.connect(__on_setting_changed)
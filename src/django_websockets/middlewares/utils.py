@@ -1,5 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 from asgiref.sync import SyncToAsync
-from django.db import close_old_connections
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections
 from http.cookies import _unquote
 from websockets.server import WebSocketServerProtocol
 
@@ -22,12 +26,169 @@ def get_cookie(websocket: WebSocketServerProtocol):
     return cookies_data
 
 
+class DatabaseExecutorSaturated(Exception):
+    """
+    Raised when the database executor has no thread nor queue slot left
+    """
+
+
+class DatabaseExecutor(ThreadPoolExecutor):
+    """
+    Thread pool running the database work of a worker.
+
+    At most *max_queue* calls wait for one of the *max_workers* threads,
+    more are rejected with DatabaseExecutorSaturated. Each thread keeps its
+    database connections open between calls: they are closed after an error
+    or when a health check, done at most every *health_check_interval*
+    seconds, finds them unusable.
+    """
+
+    def __init__(self, max_workers=4, max_queue=1000, health_check_interval=30):
+        super().__init__(max_workers, thread_name_prefix='websockets-db')
+        self.max_queue = max_queue
+        self.health_check_interval = health_check_interval
+        self.__lock = threading.Lock()
+        self.__thread_state = threading.local()
+        self.__pending = 0
+        self.__peak = 0
+        self.__submitted = 0
+        self.__rejected = 0
+        self.__wait_total = 0.0
+        self.__wait_max = 0.0
+
+    @staticmethod
+    def __initialized_connections():
+        try:
+            return connections.all(initialized_only=True)
+        except TypeError:
+            # Before Django 4.1 every alias gets a wrapper, unconnected
+            # until it's used
+            return connections.all()
+
+    def __check_connections(self):
+        now = time.monotonic()
+        checked_at = getattr(self.__thread_state, 'checked_at', None)
+        health_check = checked_at is None \
+            or now - checked_at >= self.health_check_interval
+        if health_check:
+            self.__thread_state.checked_at = now
+
+        for conn in self.__initialized_connections():
+            if conn.connection is None or conn.in_atomic_block:
+                continue
+            if conn.errors_occurred or health_check:
+                if conn.is_usable():
+                    conn.errors_occurred = False
+                else:
+                    conn.close()
+
+    def __run(self, enqueued_at, fn, args, kwargs):
+        waited = time.monotonic() - enqueued_at
+        with self.__lock:
+            self.__wait_total += waited
+            self.__wait_max = max(self.__wait_max, waited)
+
+        self.__check_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self.__lock:
+            if self.__pending >= self._max_workers + self.max_queue:
+                self.__rejected += 1
+                raise DatabaseExecutorSaturated(
+                    "{} database calls are already running or queued".format(self.__pending))
+            self.__pending += 1
+            self.__submitted += 1
+            self.__peak = max(self.__peak, self.__pending)
+
+        try:
+            return super().submit(self.__run, time.monotonic(), fn, args, kwargs)
+        except:
+            with self.__lock:
+                self.__pending -= 1
+            raise
+
+    def metrics(self) -> dict:
+        """
+        Returns the state of the executor:
+
+        *running*/*queued*: calls on a thread / waiting for one.
+
+        *saturation*: the share of thread and queue slots in use.
+
+        *wait_avg*/*wait_max*: seconds the calls waited for a thread.
+        """
+        with self.__lock:
+            started = self.__submitted - max(self.__pending - self._max_workers, 0)
+            return {
+                'max_workers': self._max_workers,
+                'max_queue': self.max_queue,
+                'running': min(self.__pending, self._max_workers),
+                'queued': max(self.__pending - self._max_workers, 0),
+                'peak': self.__peak,
+                'saturation': self.__pending / (self._max_workers + self.max_queue),
+                'submitted': self.__submitted,
+                'rejected': self.__rejected,
+                'wait_avg': self.__wait_total / started if started else 0.0,
+                'wait_max': self.__wait_max,
+            }
+
+
+database_executor: DatabaseExecutor = None
+
+
+def get_database_executor() -> DatabaseExecutor:
+    """
+    Returns the database executor of this process, configured by the
+    WEBSOCKET_DB_EXECUTOR setting, or None if its MAX_WORKERS is 0
+    """
+    global database_executor
+    if database_executor is None:
+        from django.conf import settings
+        config = getattr(settings, 'WEBSOCKET_DB_EXECUTOR', {})
+        if config.get('MAX_WORKERS', 4) <= 0:
+            return None
+        database_executor = DatabaseExecutor(
+            max_workers=config.get('MAX_WORKERS', 4),
+            max_queue=config.get('MAX_QUEUE', 1000),
+            health_check_interval=config.get('HEALTH_CHECK_INTERVAL', 30))
+    return database_executor
+
+
+def __on_setting_changed(setting, **kwargs):
+    global database_executor
+    if setting == 'WEBSOCKET_DB_EXECUTOR' and database_executor is not None:
+        database_executor.shutdown(wait=False)
+        database_executor = None
+
+
+setting_changed.connect(__on_setting_changed)
+
+
 class DatabaseSyncToAsync(SyncToAsync):
     """
-    SyncToAsync version that cleans up old database connections when it exits.
+    SyncToAsync version running on the database executor, whose threads
+    keep their connections open.
+
+    Without executor, it runs on the thread sensitive thread and cleans up
+    old database connections when it exits.
     """
 
+    def __init__(self, func, thread_sensitive=None, executor=None, **kwargs):
+        if thread_sensitive is None:
+            executor = executor or get_database_executor()
+            thread_sensitive = executor is None
+        super().__init__(func, thread_sensitive=thread_sensitive, executor=executor, **kwargs)
+
     def thread_handler(self, loop, *args, **kwargs):
+        if isinstance(self._executor, DatabaseExecutor):
+            # The executor checks its connections
+            return super().thread_handler(loop, *args, **kwargs)
+
         close_old_connections()
         try:
             return super().thread_handler(loop, *args, **kwargs)
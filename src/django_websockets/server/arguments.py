@@ -2,6 +2,8 @@
 import argparse
 import re
 
+from django_websockets.server.horchestration import AUTO, BALANCES, LOOPS, ROUND_ROBIN
+
 
 IPV6_REGEX = r'(([0-9a-fA-F]{1,4}:){7,7}[0-9a-fA-F]{1,4}|([0-9a-fA-F]{1,4}:){1,7}:|([0-9a-fA-F]{1,4}:){1,6}:[0-9a-fA-F]{1,4}|([0-9a-fA-F]{1,4}:){1,5}(:[0-9a-fA-F]{1,4}){1,2}|([0-9a-fA-F]{1,4}:){1,4}(:[0-9a-fA-F]{1,4}){1,3}|([0-9a-fA-F]{1,4}:){1,3}(:[0-9a-fA-F]{1,4}){1,4}|([0-9a-fA-F]{1,4}:){1,2}(:[0-9a-fA-F]{1,4}){1,5}|[0-9a-fA-F]{1,4}:((:[0-9a-fA-F]{1,4}){1,6})|:((:[0-9a-fA-F]{1,4}){1,7}|:)|fe80:(:[0-9a-fA-F]{0,4}){0,4}%[0-9a-zA-Z]{1,}|::(ffff(:0{1,4}){0,1}:){0,1}((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])|([0-9a-fA-F]{1,4}:){1,4}:((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\.){3,3}(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9]))'
 IPV4_REGEX = r'(\b25[0-5]|\b2[0-4][0-9]|\b[01]?[0-9][0-9]?)(\.(25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)){3}'
@@ -185,4 +187,8 @@ parser.add_argument('-b', '--bind', nargs=1, required=True, type=BindType())
 parser.add_argument('-s', '--settings', nargs=1, required=True,
                     type=RegexType(r'([a-zA-Z0-9_](\.[a-zA-Z0-9_]){0,})'))
 parser.add_argument('-w', '--workers', nargs=1, required=True, type=workers)
+parser.add_argument('--direct', action='store_true')
+parser.add_argument('--balance', choices=BALANCES, default=ROUND_ROBIN)
+parser.add_argument('--graceful-timeout', type=float, default=30)
+parser.add_argument('--loop', choices=LOOPS, default=AUTO)
 
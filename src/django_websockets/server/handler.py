@@ -8,6 +8,7 @@ from websockets.client import WebSocketClientProtocol
 
 from django_websockets.middlewares import call_middleware_stack
 from django_websockets.consumers import StopConsumer
+from django_websockets.middlewares.utils import DatabaseExecutorSaturated
 from django_websockets.server.arguments import WebsocketBindAddress
 from django_websockets.server.horchestration import RoundRobQueue
 
@@ -19,6 +20,9 @@ async def connection_handler(websocket: WebSocketServerProtocol, path=""):
         await call_middleware_stack(websocket)
     except StopConsumer:
         await websocket.close(1000)
+    except DatabaseExecutorSaturated:
+        # Try again later
+        await websocket.close(1013)
 
 
 async def _recv_from_client(server_socket: WebSocketClientProtocol, client_socket: WebSocketServerProtocol):
@@ -27,22 +31,30 @@ async def _recv_from_client(server_socket: WebSocketClientProtocol, client_socke
         await server_socket.send(message)
 
 async def _recv_from_worker(server_socket: WebSocketClientProtocol, client_socket: WebSocketServerProtocol):
-    while True:
-        message = await server_socket.recv()
-        await client_socket.send(message)
+    try:
+        while True:
+            message = await server_socket.recv()
+            await client_socket.send(message)
+    except websockets.exceptions.ConnectionClosed as e:
+        # Relays the close code of the worker, like 1001 when it's draining
+        if e.rcvd:
+            await client_socket.close(e.rcvd.code, e.rcvd.reason)
+        raise
 
 
 async def handle_connection(bind, worker_queue, extra_headers, path, client_socket):
+    # Counted as open on the worker until the client leaves
+    worker = worker_queue.acquire()
     try:
         if bind.is_unix:
             # Get next worker websocket address
-            address = bind.get_namespaced_address(worker_queue.next())
+            address = bind.get_namespaced_address(worker)
             connection = websockets.unix_connect(
                 address,
                 uri=f'ws://localhost:8080{path}',
                 extra_headers=extra_headers)
         else:
-            worker_index = int(re.sub(r'[^0-9]', '', worker_queue.next())) + 1
+            worker_index = int(re.sub(r'[^0-9]', '', worker)) + 1
             address = f'ws://{bind.address}:{bind.port + worker_index}{path}'
             connection = websockets.connect(
                 address, extra_headers=extra_headers)
@@ -57,6 +69,8 @@ async def handle_connection(bind, worker_queue, extra_headers, path, client_sock
         raise StopConsumer
     else:
         return connection
+    finally:
+        worker_queue.release(worker)
 
 async def _master_handler(bind: WebsocketBindAddress, worker_queue: RoundRobQueue, client_socket: WebSocketServerProtocol, path=""):
     try:
@@ -88,5 +102,12 @@ async def _master_handler(bind: WebsocketBindAddress, worker_queue: RoundRobQueu
         traceback.print_exc()
 
 def master_handler(bind: WebsocketBindAddress, workers_list):
-    worker_queue = RoundRobQueue(workers_list)
+    """
+    Proxies the client connections to the workers. *workers_list* is the
+    list of workers or a RoundRobQueue picking them
+    """
+    if isinstance(workers_list, RoundRobQueue):
+        worker_queue = workers_list
+    else:
+        worker_queue = RoundRobQueue(workers_list)
     return partial(_master_handler, bind, worker_queue)
\ No newline at end of file
@@ -1,25 +1,177 @@
-from typing import Iterator
+import asyncio
+import multiprocessing
+import random
+import time
+import warnings
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+ROUND_ROBIN = 'round-robin'
+LEAST_CONNECTIONS = 'least-connections'
+POWER_OF_TWO_CHOICES = 'p2c'
+BALANCES = (ROUND_ROBIN, LEAST_CONNECTIONS, POWER_OF_TWO_CHOICES)
+
+ASYNCIO = 'asyncio'
+UVLOOP = 'uvloop'
+AUTO = 'auto'
+LOOPS = (ASYNCIO, UVLOOP, AUTO)
+
+
+def set_event_loop_policy(event_loop=AUTO) -> str:
+    """
+    Makes the event loops created by this process, like the one of
+    asyncio.run(), of *event_loop*: asyncio, uvloop, or auto for uvloop
+    when it's installed. Returns the one used.
+
+    Falls back to asyncio without uvloop, warning if it was asked for.
+    """
+    if event_loop not in LOOPS:
+        raise ValueError(
+            "Event loop must be one of {}, not '{}'".format(", ".join(LOOPS), event_loop))
+
+    if event_loop != ASYNCIO:
+        try:
+            import uvloop
+        except ImportError:
+            if event_loop == UVLOOP:
+                warnings.warn("uvloop is not installed, using the asyncio event loop")
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            return UVLOOP
+
+    asyncio.set_event_loop_policy(None)
+    return ASYNCIO
+
+
+class WorkerMembership(object):
+    """
+    Workers accepting connections, updated by the supervisor and read by
+    the master and the forwarder running in its process.
+
+    Every change replaces the snapshot tuple and bumps the version, so
+    readers keeping a copy compare the version to know it's stale.
+    """
+
+    def __init__(self, workers: Iterable[str] = ()):
+        self.snapshot: Tuple[str, ...] = tuple(workers)
+        self.version = 0
+
+    def add(self, worker: str) -> bool:
+        """
+        Adds the worker. Returns false if it was a member
+        """
+        if worker in self.snapshot:
+            return False
+        self.snapshot = (*self.snapshot, worker)
+        self.version += 1
+        return True
+
+    def discard(self, worker: str) -> bool:
+        """
+        Removes the worker. Returns false if it wasn't a member
+        """
+        if worker not in self.snapshot:
+            return False
+        self.snapshot = tuple(member for member in self.snapshot if member != worker)
+        self.version += 1
+        return True
+
+    def __contains__(self, worker) -> bool:
+        return worker in self.snapshot
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot)
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __repr__(self) -> str:
+        return f'<WorkerMembership version={self.version} workers={list(self.snapshot)}>'
 
 
 class RoundRobQueue(object):
+    """
+    Picks the worker of the next connection.
+
+    The workers are read from a local copy of *iterator*. A WorkerMembership
+    is copied again when its version changes. Other iterables, like a
+    multiprocessing.Manager list, are copied every *refresh_interval*
+    seconds or when refresh() is called.
+
+    *balance* is one of:
+
+    round-robin: the workers in turn.
+
+    least-connections: the worker with fewer open connections.
+
+    p2c: the one with fewer open connections of two random workers.
 
-    def __init__(self, iterator:Iterator):
+    Open connections are only counted when the worker is picked with
+    acquire() and given back with release().
+    """
+
+    def __init__(self, iterator:Iterator, balance=ROUND_ROBIN, refresh_interval=5):
+        if balance not in BALANCES:
+            raise ValueError(
+                "Balance must be one of {}, not '{}'".format(", ".join(BALANCES), balance))
         self._iterator = iterator
+        self.balance = balance
+        self.refresh_interval = refresh_interval
         self.idx = 0
+        self._workers: List[str] = []
+        self.connections: Dict[str, int] = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Copies the workers list
+        """
+        self._version = getattr(self._iterator, 'version', None)
+        self._workers = [*self._iterator]
+        self.connections = {
+            worker: self.connections.get(worker, 0) for worker in self._workers}
+        self._refreshed_at = time.monotonic()
 
     def next(self):
         return self.__next__()
-    
+
     def __next__(self):
-        try:
-            return [
-                *self._iterator
-            ][self.idx % len(self._iterator)]
-        finally:
-            self.idx += 1
+        if self._version is not None:
+            if self._iterator.version != self._version:
+                self.refresh()
+        elif not self._workers or time.monotonic() - self._refreshed_at > self.refresh_interval:
+            self.refresh()
+        workers = self._workers
+
+        if self.balance == ROUND_ROBIN:
+            try:
+                return workers[self.idx % len(workers)]
+            finally:
+                self.idx += 1
+
+        connections = self.connections
+        if self.balance == POWER_OF_TWO_CHOICES and len(workers) > 2:
+            first, second = random.sample(workers, 2)
+            return first if connections[first] <= connections[second] else second
+        return min(workers, key=connections.__getitem__)
+
+    def acquire(self) -> str:
+        """
+        Picks a worker and counts a connection to it
+        """
+        worker = self.__next__()
+        self.connections[worker] += 1
+        return worker
+
+    def release(self, worker: str):
+        """
+        Counts a connection to the worker closed
+        """
+        if self.connections.get(worker):
+            self.connections[worker] -= 1
 
     def __len__(self):
-        return len(self._iterator)
+        return len(self._workers)
 
     def __iter__(self):
         return self
@@ -35,6 +187,232 @@ class RoundRobQueue(object):
 
     def __getitem__(self, key):
         return self._iterator.__getitem__(key)
-    
+
     def update(self, queue: 'RoundRobQueue'):
         self._iterator = queue._iterator
+        self.refresh()
+
+
+class WorkerSupervisor(object):
+    """
+    Runs a process per worker and restarts it as soon as it exits, watching
+    the process sentinels on the event loop instead of polling them.
+
+    *target* is called in the worker process with the arguments returned by
+    *args* for its namespace and the pipe end it must send a message on
+    once it's accepting connections. It's then added to *membership* until
+    it exits.
+
+    A worker exiting less than *stable_after* seconds after starting is
+    restarted after *backoff* seconds, doubled on each of these crashes up
+    to *max_backoff*. Otherwise it's restarted at once.
+
+    reload() replaces the workers one at a time, so they run new code
+    without closing every connection at once. The replacements take the
+    first free worker_N namespace.
+    """
+
+    def __init__(self, target: Callable, args: Callable[[str, object], tuple], namespaces: Iterable[str],
+                 membership: WorkerMembership, backoff=0.1, max_backoff=10, stable_after=10):
+        self.target = target
+        self.args = args
+        self.namespaces = list(namespaces)
+        self.membership = membership
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        # Consecutive crashes, start and exit times of the workers
+        self.crashes: Dict[str, int] = {}
+        self.started_at: Dict[str, float] = {}
+        self.exited_at: Dict[str, float] = {}
+        self.__restarts: Dict[str, asyncio.TimerHandle] = {}
+        # Resolved with whether the worker accepted connections, and on exit
+        self.__ready: Dict[str, asyncio.Future] = {}
+        self.__exit: Dict[str, asyncio.Future] = {}
+        # Workers being replaced, not restarted when they exit
+        self.__retiring = set()
+        self.__reloading = False
+        self.__stopping = False
+        self.__exited: asyncio.Event = None
+        # A fork server started before any grpc channel or thread of this
+        # process forks the workers, which is safe and faster than spawn
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context('forkserver')
+            self.context.set_forkserver_preload([target.__module__])
+        else:
+            self.context = multiprocessing.get_context('spawn')
+
+    def start(self):
+        self.__exited = asyncio.Event()
+        for namespace in self.namespaces:
+            self.__spawn(namespace)
+
+    def __spawn(self, namespace):
+        self.__restarts.pop(namespace, None)
+        if self.__stopping:
+            return
+
+        loop = asyncio.get_running_loop()
+        print(f"starting {namespace}...")
+        reader, writer = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=self.target, args=self.args(namespace, writer), name=namespace)
+        process.start()
+        writer.close()
+
+        self.processes[namespace] = process
+        self.started_at[namespace] = time.monotonic()
+        self.__ready[namespace] = loop.create_future()
+        self.__exit[namespace] = loop.create_future()
+        loop.add_reader(reader.fileno(), self.__on_ready, namespace, reader)
+        loop.add_reader(process.sentinel, self.__on_exit, namespace, process, reader)
+
+    def __on_ready(self, namespace, reader):
+        asyncio.get_running_loop().remove_reader(reader.fileno())
+        try:
+            reader.recv()
+        except EOFError:
+            # Exited before accepting connections
+            self.__resolve(self.__ready, namespace, False)
+        else:
+            self.membership.add(namespace)
+            self.__resolve(self.__ready, namespace, True)
+        reader.close()
+
+    @staticmethod
+    def __resolve(futures: Dict[str, asyncio.Future], namespace, result):
+        future = futures.get(namespace)
+        if future and not future.done():
+            future.set_result(result)
+
+    def __on_exit(self, namespace, process: multiprocessing.Process, reader):
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(process.sentinel)
+        if not reader.closed:
+            loop.remove_reader(reader.fileno())
+            reader.close()
+        process.join()
+        self.membership.discard(namespace)
+        self.exited_at[namespace] = time.monotonic()
+        self.__resolve(self.__ready, namespace, False)
+        self.__resolve(self.__exit, namespace, process.exitcode)
+
+        if namespace in self.__retiring:
+            self.__retiring.discard(namespace)
+            self.namespaces.remove(namespace)
+            del self.processes[namespace]
+
+        if self.__stopping:
+            if not any(process.is_alive() for process in self.processes.values()):
+                self.__exited.set()
+            return
+        if namespace not in self.processes:
+            return
+
+        if self.exited_at[namespace] - self.started_at[namespace] < self.stable_after:
+            self.crashes[namespace] = self.crashes.get(namespace, 0) + 1
+            delay = min(self.backoff * 2 ** (self.crashes[namespace] - 1), self.max_backoff)
+        else:
+            self.crashes[namespace] = 0
+            delay = 0
+        print(f"{namespace} exited with code {process.exitcode}, restarting in {delay:.1f}s")
+        self.__restarts[namespace] = loop.call_later(delay, self.__spawn, namespace)
+
+    async def reload(self, timeout=30):
+        """
+        Replaces the workers one at a time: starts a replacement, waits
+        until it accepts connections, takes the old worker out of the
+        membership so it gets no new connections, then drains it with
+        SIGTERM, killing it after *timeout* seconds.
+
+        The replacements are spawned instead of forked from the fork
+        server, which still has the old modules. Stops at the first
+        replacement exiting before accepting connections, leaving the
+        remaining workers as they are. Returns whether every worker was
+        replaced.
+        """
+        if self.__reloading or self.__stopping:
+            return False
+        self.__reloading = True
+        self.context = multiprocessing.get_context('spawn')
+        try:
+            for namespace in list(self.namespaces):
+                if self.__stopping:
+                    return False
+                if namespace not in self.processes or namespace in self.__retiring:
+                    continue
+
+                replacement = self.__free_namespace()
+                self.namespaces.append(replacement)
+                self.__spawn(replacement)
+                if not await self.__ready[replacement]:
+                    if self.__stopping:
+                        return False
+                    print(f"{replacement} failed to start, reload aborted")
+                    self.__retire(replacement)
+                    return False
+
+                print(f"{replacement} replaces {namespace}, draining it...")
+                self.__retire(namespace)
+                try:
+                    await asyncio.wait_for(asyncio.shield(self.__exit[namespace]), timeout)
+                except asyncio.TimeoutError:
+                    self.processes[namespace].kill()
+                    await self.__exit[namespace]
+            return True
+        finally:
+            self.__reloading = False
+
+    def __free_namespace(self) -> str:
+        index = 0
+        while f'worker_{index}' in self.processes:
+            index += 1
+        return f'worker_{index}'
+
+    def __retire(self, namespace):
+        """
+        Stops sending connections to the worker and drains it. Removed
+        from the workers once it exits
+        """
+        self.__retiring.add(namespace)
+        self.membership.discard(namespace)
+        handle = self.__restarts.pop(namespace, None)
+        if handle:
+            # Already exited, waiting to be restarted
+            handle.cancel()
+            self.__retiring.discard(namespace)
+            self.namespaces.remove(namespace)
+            del self.processes[namespace]
+        elif self.processes[namespace].is_alive():
+            self.processes[namespace].terminate()
+
+    async def stop(self, timeout=30):
+        """
+        Asks the workers to drain with SIGTERM and kills the ones still
+        running after *timeout* seconds
+        """
+        self.__stopping = True
+        for handle in self.__restarts.values():
+            handle.cancel()
+        self.__restarts.clear()
+
+        alive = [process for process in self.processes.values() if process.is_alive()]
+        if not alive:
+            return
+        for process in alive:
+            process.terminate()
+        try:
+            await asyncio.wait_for(self.__exited.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.kill()
+            await self.__exited.wait()
+
+    def kill(self):
+        """
+        Kills the workers without draining them
+        """
+        self.__stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.kill()
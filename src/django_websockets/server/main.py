@@ -1,18 +1,14 @@
 import asyncio
-from multiprocessing import Event, Manager
-import multiprocessing
 import re
-import time
 import traceback
-from typing import Dict
 import signal
+import socket
 import websockets
-import sys
 import os
-from django_websockets.middlewares.utils import database_sync_to_async
+from django_websockets.middlewares import get_middleware_stack
 import django_websockets.server.arguments as arguments
 from django_websockets.server.handler import connection_handler, master_handler
-from concurrent.futures import ProcessPoolExecutor
+from django_websockets.server.horchestration import AUTO, ROUND_ROBIN, RoundRobQueue, WorkerMembership, WorkerSupervisor, set_event_loop_policy
 from multiprocessing import queues
 
 # Fix multiprocessing error
@@ -22,25 +18,57 @@ except:
     queues.SimpleQueue = queues.Queue
 
 
-def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespace="", workers_list=None):
+def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespace="", workers_list=None, direct=False, sock=None, ready=None, stopping=None, graceful_timeout=30, event_loop=AUTO):
+    """
+    Runs the master or a worker.
+
+    *ready*: pipe end a message is sent on once connections are accepted.
+
+    *stopping*: event draining the server when set. Without it, SIGTERM and
+    SIGINT drain it.
+
+    *event_loop*: event loop of a worker started in its own process.
+    """
 
     from django_websockets.transport import get_channel_layer, channel_layers
     
     async def run():
         loop = asyncio.get_running_loop()
-        if settings:
-            import django
-            import os
-
-            if not django.apps.apps.ready:
-                try:
-                    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings)
-                    await database_sync_to_async(django.setup)()
-                except:
-                    traceback.print_exc()
+        stop_event = stopping
+        if stop_event is None:
+            stop_event = asyncio.Event()
+            for sig in [signal.SIGTERM, signal.SIGINT]:
+                loop.add_signal_handler(sig, stop_event.set)
+        import django
+        from django.apps import apps
+
+        # Workers run in a new interpreter, not in a copy of the master
+        # where django is already set up
+        if not apps.ready:
+            if settings:
+                os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings)
+            django.setup()
+
+        if handler is connection_handler:
+            # Imports the middlewares and the routes before the first
+            # connection instead of during it
+            get_middleware_stack()
     
         address: str = bind.address
-        if bind.is_unix:
+        if not handler:
+            # Master on direct mode only supervises and forwards groups
+            target = None
+            server = None
+        elif direct:
+            # Every worker accepts the client connections itself
+            if bind.is_unix:
+                target = address
+                server = websockets.unix_serve(handler, sock=sock)
+            else:
+                target = f"{bind.address}:{bind.port}"
+                server = websockets.serve(
+                    handler, bind.address, bind.port, reuse_port=True)
+        elif bind.is_unix:
             address = bind.get_namespaced_address(namespace)
             target = address
             server = websockets.unix_serve(
@@ -62,7 +90,10 @@ def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespa
                 
 
         
-        print(f'running {namespace} at {target}')
+        if target:
+            print(f'running {namespace} at {target}')
+        else:
+            print(f'running {namespace}')
 
         def run_channel_layer(layer):
             if namespace == 'master':
@@ -70,13 +101,65 @@ def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespa
             else:
                 return get_channel_layer(using=layer).as_server(namespace=namespace)
 
+        async def run_channel_layers():
+            futures_stack = [
+                run_channel_layer(layer)
+                for layer in channel_layers
+            ]
+            await asyncio.gather(*futures_stack, return_exceptions=True)
+
+        async def drain(ws_server):
+            """
+            Stops accepting connections, waits until the group messages
+            queued for the consumers are sent, or the proxied connections
+            closed by the workers on the master, then closes the remaining
+            connections with 1001 (going away)
+            """
+            ws_server.server.close()
+            deadline = loop.time() + graceful_timeout
+            while loop.time() < deadline:
+                if handler is connection_handler:
+                    if not any(
+                            get_channel_layer(using=layer).backend.queued_messages
+                            for layer in channel_layers):
+                        break
+                elif not ws_server.websockets:
+                    break
+                await asyncio.sleep(0.05)
+            ws_server.close()
+            await ws_server.wait_closed()
+
+        async def serve(ws_server):
+            layers_task = asyncio.ensure_future(run_channel_layers())
+            stop_task = asyncio.ensure_future(stop_event.wait())
+            try:
+                await asyncio.wait(
+                    [layers_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+                if stop_event.is_set():
+                    print(f"draining {namespace}...")
+                    if ws_server:
+                        await drain(ws_server)
+                    # Sends the pending group messages and stops the layers
+                    await asyncio.gather(*[
+                        get_channel_layer(using=layer).stop()
+                        for layer in channel_layers
+                    ], return_exceptions=True)
+                await asyncio.gather(layers_task, return_exceptions=True)
+            finally:
+                stop_task.cancel()
+
         try:
-            async with server:
-                futures_stack = [
-                    run_channel_layer(layer)
-                    for layer in channel_layers
-                ]
-                await asyncio.gather(*futures_stack, return_exceptions=True)
+            if server:
+                async with server as ws_server:
+                    if ready:
+                        ready.send(namespace)
+                        ready.close()
+                    await serve(ws_server)
+            else:
+                if ready:
+                    ready.send(namespace)
+                    ready.close()
+                await serve(None)
 
         except asyncio.CancelledError:
             pass
@@ -94,6 +177,7 @@ def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespa
 
     if namespace and not has_event_loop:
         try:
+            set_event_loop_policy(event_loop)
             return asyncio.run(run())
         except:
             traceback.print_exc()
@@ -102,116 +186,132 @@ def __main(bind: arguments.WebsocketBindAddress, handler, settings=None, namespa
     return run()
 
 
-def _start_worker(loop, executor, bind, handler, settings, namespace, workers_list):
-    print(f"starting {namespace}...")
-    return loop.run_in_executor(
-        executor,
-        __main,
-        bind,
-        handler,
-        settings,
-        namespace,
-        workers_list
-    )
-
-
-async def __start(loop:asyncio.BaseEventLoop, bind: arguments.WebsocketBindAddress, settings, workers: int, stop_event:Event):
-
-    from django.conf import settings
+def _listen_unix(bind: arguments.WebsocketBindAddress):
+    """
+    Creates the unix socket shared by all workers on direct mode
+    """
+    try:
+        os.unlink(bind.address)
+    except FileNotFoundError:
+        pass
 
-    workers_map: Dict[str, asyncio.Future] = {}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(bind.address)
+    sock.listen(socket.SOMAXCONN)
+    return sock
+
+
+async def __start(bind: arguments.WebsocketBindAddress, settings, workers: int, direct=False, balance=ROUND_ROBIN, graceful_timeout=30, event_loop=AUTO):
+    """
+    Runs the master and supervises the workers until SIGTERM or SIGINT,
+    which drains them. A second one kills them. SIGHUP replaces the workers
+    one at a time
+    """
+    loop = asyncio.get_running_loop()
+
+    # On direct mode the workers accepts the connections and the master
+    # doesn't proxy anything
+    sock = None
+    if direct and bind.is_unix:
+        sock = _listen_unix(bind)
+
+    # The master and the forwarder run in this process and read the
+    # membership directly, the workers don't need it
+    workers_list = WorkerMembership()
+    worker_queue = RoundRobQueue(workers_list, balance)
+    stopping = asyncio.Event()
+
+    supervisor = WorkerSupervisor(
+        __main,
+        lambda namespace, ready: (
+            bind, connection_handler, settings, namespace, None, direct, sock,
+            ready, None, graceful_timeout, event_loop),
+        [f'worker_{i}' for i in range(workers)],
+        workers_list)
+
+    master_worker: asyncio.Task = None
+
+    def start_master():
+        nonlocal master_worker
+        master_worker = loop.create_task(__main(
+            bind, None if direct else master_handler(bind, worker_queue), settings,
+            'master', workers_list, stopping=stopping, graceful_timeout=graceful_timeout))
+        master_worker.add_done_callback(restart_master)
+
+    def restart_master(task: asyncio.Task):
+        if not stopping.is_set():
+            if not task.cancelled() and task.exception():
+                e = task.exception()
+                traceback.print_exception(type(e), e, e.__traceback__)
+            loop.call_later(1, start_master)
+
+    def stop():
+        if stopping.is_set():
+            print("killing...")
+            supervisor.kill()
+            return
+        print("stopping...")
+        stopping.set()
+
+    def reload():
+        print("reloading...")
+        loop.create_task(supervisor.reload(graceful_timeout)).add_done_callback(reloaded)
+
+    def reloaded(task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception():
+            e = task.exception()
+            traceback.print_exception(type(e), e, e.__traceback__)
+        else:
+            print("reloaded" if task.result() else "reload stopped")
 
-    master_worker: asyncio.Future = None
-    master_worker_namespace = 'master'
+    for sig in [signal.SIGTERM, signal.SIGINT]:
+        loop.add_signal_handler(sig, stop)
+    loop.add_signal_handler(signal.SIGHUP, reload)
 
-    
-    process_manager = Manager()
+    supervisor.start()
+    start_master()
+    await stopping.wait()
 
-    workers_list = process_manager.list(workers_map.keys())
+    await supervisor.stop(graceful_timeout)
     try:
-        while not stop_event.get('stoped'):
-            # has master started?
-            if master_worker:
-                # isn't master running?
-                if master_worker.cancelled() or master_worker.done():
-                    master_worker = loop.create_task(
-                        __main(bind, master_handler(bind, workers_list), settings, master_worker_namespace, workers_list))
-                    continue
-            else:
-                # start master
-                master_worker = loop.create_task(
-                    __main(bind, master_handler(bind, workers_list), settings, master_worker_namespace, workers_list))
-                continue
+        await asyncio.wait_for(asyncio.shield(master_worker), graceful_timeout)
+    except (asyncio.TimeoutError, Exception):
+        master_worker.cancel()
 
-            for i in range(workers):
-                namespace = f'worker_{i}'
+    if sock:
+        sock.close()
 
-                if namespace in workers_map:
-                    if workers_map[namespace].cancelled() or workers_map[namespace].done():
-                        break
-                    namespace = None
-                else:
-                    break
 
-            if namespace:
-                workers_map[namespace] = _start_worker(
-                    loop, None, bind, connection_handler, settings, namespace, workers_list)
-            else:
-                for namespace in workers_map.keys():
-                    if namespace not in workers_list:
-                        workers_list.append(namespace)
+def main(bind: arguments.WebsocketBindAddress, settings=None, workers=1, direct=False, balance=ROUND_ROBIN, graceful_timeout=30, event_loop=AUTO):
+    """
+    Starts the server.
 
-                await asyncio.sleep(2)
-    except asyncio.CancelledError:
-        pass
+    *direct*: workers accepts the client connections themselves instead of
+    being proxied by the master. TCP binds are shared with SO_REUSEPORT and
+    unix binds share the socket created by the master.
 
-    print("Canceling master")
-    for n, w in workers_map.items():
-        print("Canceling {}".format(n))
-        w.cancel()
-    master_worker.cancel()
+    *balance*: how the master picks the worker of a connection, one of
+    round-robin, least-connections or p2c (see RoundRobQueue).
 
+    *graceful_timeout*: seconds SIGTERM, or SIGHUP for each replaced
+    worker, waits for the workers to send the queued group messages and
+    close the connections before killing them.
 
+    *event_loop*: event loop of the master, the forwarder and the workers,
+    one of asyncio, uvloop or auto for uvloop when it's installed.
+    """
+    if direct and not bind.is_unix and not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError("Direct mode on TCP requires SO_REUSEPORT")
 
-def main(bind: arguments.WebsocketBindAddress, settings=None, workers=1):
     if settings:
         import django
         os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings)
         django.setup()
     
+    print(f"using the {set_event_loop_policy(event_loop)} event loop")
     if workers == 1:
-        return __main(bind, connection_handler)
-    
-    stop_event =  {}
-
-    executor = ProcessPoolExecutor(max_workers=workers)
-
-    started_at = time.time()
-    
-    def stop(task: asyncio.Task):
-        print("stoping...")
-        stop_event['stoped'] =  True
-        print("stop event set")
-        executor.shutdown(wait=False, cancel_futures=True)
-
-        runing_time = time.time() - started_at
-        if runing_time > 0 and runing_time < 10:
-            # Wait all multiprocess spawn before kill
-            time.sleep(10 - runing_time)
-        
-        for children in multiprocessing.active_children():
-            os.kill(children.pid, signal.SIGKILL)
+        return asyncio.run(__main(bind, connection_handler, graceful_timeout=graceful_timeout))
 
-        print("loop stop scheduled")
-        sys.exit(0)
-
-
-    loop = asyncio.new_event_loop()
-    loop.set_default_executor(executor)
-    try:
-        task = loop.create_task(__start(loop, bind, settings, workers, stop_event))
-        for sig in [signal.SIGTERM, signal.SIGINT]:
-            loop.add_signal_handler(sig, stop, task)
-        loop.run_forever()
-    except:
-        executor.shutdown()
+    asyncio.run(__start(bind, settings, workers, direct, balance, graceful_timeout, event_loop))
@@ -1,14 +1,16 @@
-import asyncio
-from django_websockets.server import arguments, main, parser
+from django_websockets.server import arguments, main
 import sys, os, django
 
 
 sys.path.append('/usr/local/webchat')
 
-args = parser.parse_args()
+# Guarded, the workers import this module without running it
+if __name__ == '__main__':
+    args = arguments.parser.parse_args()
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE",
-                      arguments.parser.settings[0] or "webchat.settings")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE",
+                          args.settings[0] or "webchat.settings")
 
-django.setup()
-asyncio.run(main.main(args.bind[0]))
+    django.setup()
+    main.main(args.bind[0], workers=args.workers[0], direct=args.direct, balance=args.balance,
+              graceful_timeout=args.graceful_timeout, event_loop=args.loop)
@@ -1,19 +1,27 @@
+import asyncio
 from concurrent import futures
+import logging
+import socket
 import traceback
+import warnings
 
 from django_websockets.utils import Atom
 from django_websockets.groups import GroupMessage
 from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.groups.queues import DROP_OLDEST, DROPPED, GroupQueue
+from django_websockets.groups.registry import GroupRegistry
 from django_websockets.transport.proto import wstransport_pb2_grpc, wstransport_pb2
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.module_loading import import_string
-from typing import Any, Union
+from typing import Any, Callable, Dict, List, Union
 import grpc.aio as grpc
-import grpc as sync_grpc
 import re
 
 
+logger = logging.getLogger(__name__)
+
+
 class TransportConfig(dict):
     __inited = False
 
@@ -76,8 +84,17 @@ class TransportManager:
                     raise ImproperlyConfigured(
                         "'WEBSOCKET_TRANSPORT_BACKENDS' item must have a 'CONFIG'.")
 
-                self.__backends[namespace] = transport_layer(BaseGroupBackend(
-                    prefix=transport_config.prefix or namespace), transport_config)
+                try:
+                    backend = BaseGroupBackend(
+                        prefix=transport_config.prefix or namespace,
+                        max_queue_size=transport_config.max_queue_size,
+                        overflow_policy=transport_config.overflow_policy,
+                        coalesce_key=transport_config.coalesce_key)
+                except ValueError as e:
+                    raise ImproperlyConfigured(
+                        "'WEBSOCKET_TRANSPORT_BACKENDS' item has an invalid 'CONFIG': {}".format(e))
+
+                self.__backends[namespace] = transport_layer(backend, transport_config)
 
     def __iter__(self):
         return self.__backends.__iter__()
@@ -96,12 +113,19 @@ class BaseTransportLayer(object):
         + "alphanumerics, hyphens, underscores, or periods."
     )
 
+    # Payload compressions of the `compression` config
+    compressions = ('zlib',)
+
     def __init__(self, backend: BaseGroupBackend, config: TransportConfig):
         self.__backend = backend
         self.__config = config
         self.__role: Atom = CLIENT
         self._namespace = ""
         self._workers_queue = None
+        if self.compression is not None and self.compression not in self.compressions:
+            raise ImproperlyConfigured(
+                "Transport compression must be one of {}, not '{}'".format(
+                    ", ".join(self.compressions), self.compression))
 
     @property
     def role(self):
@@ -120,6 +144,28 @@ class BaseTransportLayer(object):
     def backend(self) -> BaseGroupBackend:
         return self.__backend
 
+    @property
+    def compression(self):
+        return self.config.compression or None
+
+    @property
+    def compression_threshold(self):
+        """
+        Payload size from which the messages sent are compressed, None
+        without compression
+        """
+        if self.compression is None:
+            return None
+        if self.config.compression_threshold is None:
+            return 1024
+        return self.config.compression_threshold
+
+    @property
+    def compression_level(self):
+        if self.config.compression_level is None:
+            return 1
+        return self.config.compression_level
+
 
     async def group_add(self, group, consumer):
         assert self.valid_group_name(group), "Invalid group name"
@@ -169,12 +215,101 @@ class BaseTransportLayer(object):
 
 
 
+class InterestIndex(object):
+    """
+    Groups the workers, or the peer nodes, of a forwarder have members in.
+
+    Each of them sends numbered updates of the groups it joined and left,
+    or a snapshot of all its groups. An update after a gap is refused and
+    its groups are dropped until the next snapshot.
+    """
+
+    def __init__(self):
+        # The members are the worker namespaces or the node names
+        self.registry = GroupRegistry()
+        # Last update sequence of the ones that reported their groups
+        self.sequences: Dict[str, int] = {}
+        # Called with a group name and true when the group gets its first
+        # member, false when its last one leaves
+        self.listener: Callable[[str, bool], None] = None
+
+    def __notify(self, group, joined):
+        if self.listener is not None:
+            self.listener(group, joined)
+
+    def __discard_member(self, member):
+        for group in self.registry.discard_member(member):
+            if group not in self.registry:
+                self.__notify(group, False)
+
+    def update(self, request: wstransport_pb2.WSInterestUpdate) -> bool:
+        """
+        Applies the update. Returns false when the previous one was lost
+        """
+        member = request.worker
+        if request.snapshot:
+            self.__discard_member(member)
+        elif self.sequences.get(member) != request.sequence - 1:
+            self.__discard_member(member)
+            self.sequences.pop(member, None)
+            return False
+
+        for group in request.left:
+            if self.registry.discard(group, member) and group not in self.registry:
+                self.__notify(group, False)
+        for group in request.joined:
+            joined = group not in self.registry
+            if self.registry.add(group, member) and joined:
+                self.__notify(group, True)
+        self.sequences[member] = request.sequence
+        return True
+
+    def targets(self, group, members) -> List[str]:
+        """
+        The members having the group or that didn't report their groups
+        """
+        interested = self.registry.members(group)
+        return [
+            member for member in members
+            if member in interested or member not in self.sequences]
+
+    def __contains__(self, group) -> bool:
+        return group in self.registry
+
+    def __iter__(self):
+        return iter(self.registry)
+
+
 class gRPCRoudRobStub(object):
+    """
+    Forwards the group messages to the workers. Once a worker reported the
+    groups it has members in, it's only sent the messages of those groups.
+
+    In a cluster, messages are also relayed in batches to the forwarders
+    of the *peers* nodes having members in their group, which deliver them
+    to their own workers only. The forwarders report each other the groups
+    of their workers as the workers do.
+    """
 
-    def __init__(self, address, workers_queue):
+    def __init__(self, address, workers_queue, node=None, peers=None, batch_size=128, batch_interval=0.005):
         self.address = address
         self._workers_queue = workers_queue
         self._stubs = {}
+        self.workers_interest = InterestIndex()
+        self.node = node
+        self.peers: Dict[str, str] = peers or {}
+        self.peers_interest = InterestIndex()
+        self._peer_pools = {
+            name: gRPCChannelPool(peer_address)
+            for name, peer_address in self.peers.items()}
+        self._peer_producers = {
+            name: gRPCBatchProducer(pool, batch_size, batch_interval)
+            for name, pool in self._peer_pools.items()}
+        self._peer_reporters = {
+            name: gRPCInterestReporter(pool, node, self.__node_groups)
+            for name, pool in self._peer_pools.items()}
+        if self.peers:
+            self.workers_interest.listener = self.__report_peers
 
 
     def get_namespaced_address(self, namespace):
@@ -189,22 +324,416 @@ class gRPCRoudRobStub(object):
             else:
                 address = f'{address}{namespace}.socket'
         return address
+
+    def get_stub(self, worker):
+        if worker in self._stubs:
+            return self._stubs[worker]
+
+        address = self.get_namespaced_address(worker)
+        conn = grpc.insecure_channel(address)
+        stub = wstransport_pb2_grpc.WSGroupManagerStub(conn)
+        self._stubs[worker] = stub
+        return stub
+
+    def __node_groups(self) -> List[str]:
+        return list(self.workers_interest)
+
+    def __report_peers(self, group, joined):
+        for reporter in self._peer_reporters.values():
+            reporter.report(group, joined)
+
+    def start(self):
+        """
+        Sends the peers the groups of the node
+        """
+        for reporter in self._peer_reporters.values():
+            reporter.start()
+
+    def update_interest(self, request: wstransport_pb2.WSInterestUpdate) -> bool:
+        """
+        Applies the groups a worker or a peer joined and left. Returns false
+        when an update was lost, it's then sent every message until it
+        sends a snapshot
+        """
+        if request.worker in self.peers:
+            return self.peers_interest.update(request)
+        return self.workers_interest.update(request)
+
+    def __relay(self, request: wstransport_pb2.WSSendMessageRequest):
+        """
+        Queues the message for the peers with members in its group
+        """
+        peers = self.peers_interest.targets(request.group, self._peer_producers)
+        if peers:
+            # The peers only deliver it to their workers. The request isn't
+            # copied, the local workers ignore the flag
+            request.relayed = True
+            for peer in peers:
+                self._peer_producers[peer].offer(request)
+        return bool(peers)
+
+    async def __fan_out(self, workers, call):
+        """
+        Calls the workers concurrently
+        """
+        for worker, result in zip(workers, await asyncio.gather(
+                *[call(worker, self.get_stub(worker)) for worker in workers],
+                return_exceptions=True)):
+            if isinstance(result, Exception):
+                warnings.warn(
+                    "Failed to forward group message to {}: {}".format(worker, result))
     
     async def SendMessage(self, request, context):
-        if self._workers_queue:
-            for worker in self._workers_queue:
-                if worker in self._stubs:
-                    stub = self._stubs[worker]
-                else:
-                    address = self.get_namespaced_address(worker)
-                    conn = grpc.insecure_channel(address)
-                    stub = wstransport_pb2_grpc.WSGroupManagerStub(conn)
-                    self._stubs[worker] = stub
-                await stub.SendMessage(request)
+        """
+        Forwards the message to the workers and peers of its group.
+        Acks false if there is none
+        """
+        relayed = False if request.relayed else self.__relay(request)
+        workers = [*self._workers_queue] if self._workers_queue else []
+        if not workers:
+            return wstransport_pb2.WSResponse(ack=relayed)
 
-            return wstransport_pb2.WSResponse(ack=True)
+        await self.__fan_out(
+            self.workers_interest.targets(request.group, workers),
+            lambda worker, stub: stub.SendMessage(request))
+        return wstransport_pb2.WSResponse(ack=True)
 
-        return wstransport_pb2.WSResponse(ack=False)
+    async def SendMessages(self, batches: List[wstransport_pb2.WSSendMessageBatch], context=None):
+        """
+        Forwards every worker a batch of the messages of its groups
+        """
+        relayed = False
+        if self.peers:
+            for batch in batches:
+                for request in batch.messages:
+                    if not request.relayed:
+                        relayed = self.__relay(request) or relayed
+
+        workers = [*self._workers_queue] if self._workers_queue else []
+        if not workers:
+            return wstransport_pb2.WSResponse(ack=relayed)
+
+        routed = {worker: [] for worker in workers}
+        total = 0
+        for batch in batches:
+            for request in batch.messages:
+                total += 1
+                for worker in self.workers_interest.targets(request.group, workers):
+                    routed[worker].append(request)
+
+        def call(worker, stub):
+            if len(routed[worker]) == total:
+                return stub.SendMessages(iter(batches))
+            return stub.SendMessages(iter([
+                wstransport_pb2.WSSendMessageBatch(messages=routed[worker])]))
+
+        await self.__fan_out([worker for worker in workers if routed[worker]], call)
+        return wstransport_pb2.WSResponse(ack=True)
+
+    async def close(self):
+        """
+        Sends the messages queued for the peers and closes their channels
+        """
+        for reporter in self._peer_reporters.values():
+            await reporter.close()
+        for producer in self._peer_producers.values():
+            await producer.close()
+        for pool in self._peer_pools.values():
+            await pool.close()
+
+
+class gRPCChannelPool(object):
+    """
+    Keeps *size* grpc.aio channels open to the same address and hands out
+    their stubs round robin.
+    """
+
+    def __init__(self, address, size=1):
+        self.address = address
+        self.size = max(size, 1)
+        self._channels = []
+        self._stubs = []
+        self._next = 0
+
+    @property
+    def stub(self) -> wstransport_pb2_grpc.WSGroupManagerStub:
+        # Created lazily because the channels belong to the running loop
+        if not self._stubs:
+            for _ in range(self.size):
+                # A local subchannel pool gives each channel its own
+                # connection instead of sharing the global one
+                channel = grpc.insecure_channel(
+                    self.address, options=[('grpc.use_local_subchannel_pool', 1)])
+                self._channels.append(channel)
+                self._stubs.append(wstransport_pb2_grpc.WSGroupManagerStub(channel))
+
+        stub = self._stubs[self._next]
+        self._next = (self._next + 1) % len(self._stubs)
+        return stub
+
+    async def close(self):
+        channels, self._channels, self._stubs = self._channels, [], []
+        await asyncio.gather(*[channel.close() for channel in channels])
+
+
+class gRPCAsyncSender(object):
+    """
+    Sends the group messages as unary SendMessage calls without blocking
+    the event loop. Up to *max_in_flight* calls are pipelined over the
+    channel pool; send() waits for a free slot when all of them are in use.
+
+    When *wait* is false send() returns as soon as the call is issued and
+    failures are only reported.
+    """
+
+    def __init__(self, pool: gRPCChannelPool, max_in_flight=100, wait=True):
+        self.pool = pool
+        self.max_in_flight = max_in_flight
+        self.wait = wait
+        self._semaphore: asyncio.Semaphore = None
+        self._pending = set()
+
+    async def send(self, request: wstransport_pb2.WSSendMessageRequest, wait=None):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        await self._semaphore.acquire()
+        try:
+            call = asyncio.ensure_future(self.pool.stub.SendMessage(request))
+        except:
+            self._semaphore.release()
+            raise
+        self._pending.add(call)
+        call.add_done_callback(self.__release)
+
+        if not (self.wait if wait is None else wait):
+            call.add_done_callback(self.__report)
+            return True
+        return (await call).ack
+
+    def __release(self, call):
+        self._pending.discard(call)
+        self._semaphore.release()
+
+    def __report(self, call):
+        if not call.cancelled() and call.exception():
+            warnings.warn(
+                "Failed to send group message: {}".format(call.exception()))
+
+    async def close(self):
+        """
+        Waits for the calls in flight
+        """
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+
+class gRPCBatchProducer(object):
+    """
+    Collects the group messages and sends them as a WSSendMessageBatch on a
+    SendMessages stream when the batch is full or the batch interval is over.
+
+    Up to *max_pending* messages wait to be sent. send() waits for room
+    when they're all taken and returns the ack of the batch of the message,
+    or raises its error, unless *wait* is false. offer() never waits, it
+    drops the oldest message instead, counted in `dropped`. Failures are
+    logged.
+    """
+
+    def __init__(self, pool: gRPCChannelPool, batch_size, batch_interval, max_pending=10000):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._dropping = False
+        self._queue: GroupQueue = None
+        self._full: asyncio.Event = None
+        self._task: asyncio.Task = None
+
+    def __start(self):
+        # Created lazily because they must belong to the running loop
+        if self._task is None or self._task.done():
+            self._queue = GroupQueue(self.max_pending, DROP_OLDEST)
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self.__run())
+
+    def __queued(self):
+        if self._queue.qsize() + 1 >= self.batch_size:
+            self._full.set()
+
+    async def send(self, request: wstransport_pb2.WSSendMessageRequest, wait=True):
+        self.__start()
+        ack = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, ack))
+        self.__queued()
+
+        if not wait:
+            return True
+        return await ack
+
+    def offer(self, request: wstransport_pb2.WSSendMessageRequest):
+        """
+        Queues a message nobody waits the ack for without waiting
+        """
+        self.__start()
+        if self._queue.offer((request, None)) is DROPPED:
+            self.dropped += 1
+            # Logged once until a batch is sent again
+            if not self._dropping:
+                self._dropping = True
+                logger.warning(
+                    "Batch queue to %s is full, dropping the oldest group messages",
+                    self.pool.address)
+        self.__queued()
+
+    async def __run(self):
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+
+            if self._queue.qsize() + 1 < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.batch_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            try:
+                response = await self.pool.stub.SendMessages(iter([
+                    wstransport_pb2.WSSendMessageBatch(
+                        messages=[request for request, _ in batch])]))
+            except grpc.AioRpcError as e:
+                logger.warning(
+                    "Failed to send a batch of %d group messages to %s: %s",
+                    len(batch), self.pool.address, e.details())
+                for _, ack in batch:
+                    if ack is not None and not ack.done():
+                        ack.set_exception(e)
+                        # Retrieved so an ack nobody waits for isn't logged
+                        ack.exception()
+            else:
+                self._dropping = False
+                for _, ack in batch:
+                    if ack is not None and not ack.done():
+                        ack.set_result(response.ack)
+
+    async def close(self):
+        """
+        Sends the pending messages and stops the producer
+        """
+        if self._task and not self._task.done():
+            await self._queue.put(None)
+            self._full.set()
+            await self._task
+
+
+class gRPCInterestReporter(object):
+    """
+    Reports the groups a worker gets its first member in and loses its last
+    one to the forwarder, which only forwards it the messages of its groups.
+
+    Updates are sent one at a time and numbered. The first one, and the
+    next one after a failure, is a snapshot of all the worker groups: it
+    resyncs the forwarder after the worker or the forwarder restarted.
+    An update not acked within *timeout* seconds failed, so an unreachable
+    forwarder doesn't hold up flush().
+    """
+
+    def __init__(self, pool: gRPCChannelPool, worker, groups: Callable[[], List[str]], retry_interval=1, timeout=1):
+        self.pool = pool
+        self.worker = worker
+        self.groups = groups
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._pending: Dict[str, bool] = {}
+        self._snapshot = True
+        self._sequence = 0
+        # Reports received and reports sent or failed to be sent
+        self._reported = 0
+        self._done = 0
+        self._wakeup: asyncio.Event = None
+        self._attempt: asyncio.Future = None
+        self._task: asyncio.Task = None
+
+    def start(self):
+        # Created lazily because they must belong to the running loop
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._attempt = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self.__run())
+        self._wakeup.set()
+
+    def report(self, group, joined):
+        """
+        Interest listener of the worker group backend
+        """
+        self._pending[group] = joined
+        self._reported += 1
+        self.start()
+
+    async def flush(self):
+        """
+        Waits until the groups reported so far were sent to the forwarder,
+        or failed to be
+        """
+        reported = self._reported
+        while self._done < reported and self._task and not self._task.done():
+            await asyncio.shield(self._attempt)
+
+    async def __run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            reported = self._reported
+
+            pending, self._pending = self._pending, {}
+            if self._snapshot:
+                request = wstransport_pb2.WSInterestUpdate(
+                    worker=self.worker, sequence=self._sequence + 1,
+                    snapshot=True, joined=self.groups())
+            else:
+                request = wstransport_pb2.WSInterestUpdate(
+                    worker=self.worker, sequence=self._sequence + 1,
+                    joined=[group for group, joined in pending.items() if joined],
+                    left=[group for group, joined in pending.items() if not joined])
+
+            try:
+                ack = (await self.pool.stub.UpdateInterest(
+                    request, timeout=self.timeout)).ack
+            except grpc.AioRpcError as e:
+                warnings.warn(
+                    "Failed to report the groups of {}: {}".format(self.worker, e.details()))
+                ack = False
+
+            if ack:
+                self._sequence = request.sequence
+                self._snapshot = False
+            else:
+                self._snapshot = True
+
+            self._done = reported
+            attempt, self._attempt = self._attempt, asyncio.get_running_loop().create_future()
+            attempt.set_result(ack)
+
+            if not ack:
+                await asyncio.sleep(self.retry_interval)
+                self._wakeup.set()
+
+    async def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
 
 
 class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManagerServicer):
@@ -235,40 +764,207 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
     @property
     def graceful(self):
         return self.config.gareceul or 0
+
+    @property
+    def batch_size(self):
+        return self.config.batch_size or 1
+
+    @property
+    def batch_interval(self):
+        return self.config.batch_interval or 0.005
+
+    @property
+    def channels(self):
+        return self.config.channels or 1
+
+    @property
+    def max_in_flight(self):
+        return self.config.max_in_flight or 100
+
+    @property
+    def fire_and_forget(self):
+        return bool(self.config.fire_and_forget)
+
+    @property
+    def interest_routing(self):
+        if self.config.interest_routing is None:
+            return True
+        return bool(self.config.interest_routing)
+
+    @property
+    def node(self):
+        """
+        Name of this node in the cluster
+        """
+        return self.config.node or socket.gethostname()
+
+    @property
+    def cluster_address(self):
+        """
+        Address the forwarder listens to the peers on
+        """
+        return self.config.cluster_address or None
+
+    @property
+    def peers(self) -> Dict[str, str]:
+        """
+        Forwarder addresses of the other nodes by name
+        """
+        return dict(self.config.peers or {})
+
+    @property
+    def peer_batch_size(self):
+        return self.config.peer_batch_size or 128
     
     async def group_add(self, group, consumer):
         await super().group_add(group, consumer)
+        if self.interest_reporter:
+            # The forwarder knows the group before the consumer is sent to it
+            await self.interest_reporter.flush()
 
     async def group_discard(self, group, consumer):
         await super().group_discard(group, consumer)
 
 
     async def SendMessage(self, request, context=None):
-        message = GroupMessage(
-            request.message.type,
-            request.message.message
-        )
-
         try:
             if self.role is FORWARDER:
+                # Forwarded as received, without decompressing the payload
                 return await self.forward_stub.SendMessage(request, context)
             else:
-                await super().group_send(request.group, message)
+                await super().group_send(
+                    request.group,
+                    GroupMessage.from_proto(request.message))
         except:
             traceback.print_exc()
             return wstransport_pb2.WSResponse(ack=False)
         else:
             return wstransport_pb2.WSResponse(ack=True)
 
+    async def SendMessages(self, request_iterator, context=None):
+        try:
+            if self.role is FORWARDER:
+                batches = [batch async for batch in request_iterator]
+                return await self.forward_stub.SendMessages(batches, context)
+
+            async for batch in request_iterator:
+                for request in batch.messages:
+                    await super().group_send(
+                        request.group,
+                        GroupMessage.from_proto(request.message))
+        except:
+            traceback.print_exc()
+            return wstransport_pb2.WSResponse(ack=False)
+        else:
+            return wstransport_pb2.WSResponse(ack=True)
+
+    async def UpdateInterest(self, request, context=None):
+        if self.role is FORWARDER and self.forward_stub:
+            return wstransport_pb2.WSResponse(
+                ack=self.forward_stub.update_interest(request))
+        return wstransport_pb2.WSResponse(ack=True)
+
     @property
     def forward_stub(self):
-        if self._workers_queue:
+        # Created with the workers list even empty, workers report their
+        # groups before being added to it
+        if self._workers_queue is not None:
             if not hasattr(self, '_forward_stub'):
                 address = self.config.address or "unix:/tmp/rpc.socket"
                 self._forward_stub = gRPCRoudRobStub(
-                    address, self._workers_queue)
+                    address, self._workers_queue,
+                    node=self.node,
+                    peers=self.peers,
+                    batch_size=self.peer_batch_size,
+                    batch_interval=self.batch_interval)
         return getattr(self, '_forward_stub', None)
 
+    def __bind_loop(self):
+        """
+        The channels and the objects sending over them belong to the event
+        loop they were created in. Sync callers run async_to_sync() on a
+        new loop each time, so a client creates them again when the running
+        loop changed. The channels of the previous loop are closed by the
+        next group_send() or stop(). Servers and forwarders keep the loop
+        serving them
+        """
+        if self.role is not CLIENT:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if getattr(self, '_loop', None) is not loop:
+            self._loop = loop
+            if '_channel_pool' in self.__dict__:
+                self.__dict__.setdefault('_retired_pools', []).append(
+                    self.__dict__.pop('_channel_pool'))
+            for attribute in ['_sender', '_batch_producer']:
+                self.__dict__.pop(attribute, None)
+            self.__connection = None
+            self.__stub = None
+
+    async def __close_retired_pools(self):
+        """
+        Closes the channels created on the previous event loops
+        """
+        self.__bind_loop()
+        pools = self.__dict__.get('_retired_pools')
+        while pools:
+            await pools.pop().close()
+
+    @property
+    def channel_pool(self):
+        """
+        grpc.aio channels to the forwarder/server
+        """
+        self.__bind_loop()
+        if not hasattr(self, '_channel_pool'):
+            self._channel_pool = gRPCChannelPool(
+                self.config.address or "unix:/tmp/rpc.socket",
+                self.channels)
+        return self._channel_pool
+
+    @property
+    def sender(self):
+        self.__bind_loop()
+        if not hasattr(self, '_sender'):
+            self._sender = gRPCAsyncSender(
+                self.channel_pool,
+                self.max_in_flight,
+                wait=not self.fire_and_forget)
+        return self._sender
+
+    @property
+    def interest_reporter(self):
+        """
+        Reports the worker groups to the forwarder, workers only
+        """
+        if self.role is not SERVER or not self._namespace or not self.interest_routing:
+            return None
+        if not hasattr(self, '_interest_reporter'):
+            self._interest_reporter = gRPCInterestReporter(
+                self.channel_pool,
+                self._namespace,
+                self.backend.group_names)
+        return self._interest_reporter
+
+    @property
+    def batch_producer(self):
+        """
+        Batches the messages sent to the forwarder/server when batch_size > 1
+        """
+        if self.batch_size <= 1:
+            return None
+        self.__bind_loop()
+        if not hasattr(self, '_batch_producer'):
+            self._batch_producer = gRPCBatchProducer(
+                self.channel_pool,
+                self.batch_size,
+                self.batch_interval,
+                self.max_in_flight * self.batch_size)
+        return self._batch_producer
+
     @property
     def stub(self):
         # The connection and stub are created lazily.
@@ -279,6 +975,7 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
     
     @property
     def connection(self):
+        self.__bind_loop()
         if self.__connection:
             return self.__connection
         
@@ -286,6 +983,8 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
             self.__connection = grpc.server(
                 maximum_concurrent_rpcs=self.num_connections)
             self.__connection.add_insecure_port(self.address)
+            if self.role is FORWARDER and self.cluster_address:
+                self.__connection.add_insecure_port(self.cluster_address)
             wstransport_pb2_grpc.add_WSGroupManagerServicer_to_server(
                 self, self.__connection)
             self.__stub = self
@@ -293,50 +992,49 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
             if self.role is SERVER:
                 if self._namespace:
                     # If is server and has namespace, stub is the forwarder server
-                    address = self.config.address or "unix:/tmp/rpc.socket"
-                    self.__stub = wstransport_pb2_grpc.WSGroupManagerStub(
-                        sync_grpc.insecure_channel(address))
+                    self.__stub = self.sender
         else:
-            self.__connection = sync_grpc.insecure_channel(self.address)
-            self.__stub = wstransport_pb2_grpc.WSGroupManagerStub(
-                self.__connection)
+            self.__connection = self.channel_pool
+            self.__stub = self.sender
             
         return self.__connection
     
 
-    async def group_send(self, group:str, message:Union[dict, GroupMessage]):
+    async def group_send(self, group:str, message:Union[dict, GroupMessage], wait=None):
         '''
         Broadcast a message 
+
+        *wait*: when false, returns once the message is sent to the
+        forwarder/server without waiting for its ack. Defaults to the
+        `fire_and_forget` config.
         '''
+        if not isinstance(message, GroupMessage):
+            message = GroupMessage(**message)
+
+        if self.role is CLIENT:
+            await self.__close_retired_pools()
 
         if self.role is FORWARDER:
-            # Fowards the message to to all workers
+            # Fowards the message to the workers and peers of the group
             await self.forward_stub.SendMessage(
                 wstransport_pb2.WSSendMessageRequest(
                     group=group,
-                    message=wstransport_pb2.WSMessage(
-                        **message
-                    )))
-        elif self.role is SERVER:
-            if self._namespace:
-                # If it has namespace, redirext message to forwarder
-                self.stub.SendMessage(
-                    wstransport_pb2.WSSendMessageRequest(
-                        group=group,
-                        message=wstransport_pb2.WSMessage(
-                            **message
-                        )))
-            else:
-                # Otherwise, dispatch to groups
-                return print("2.2", await super().group_send(message))
+                    message=message.to_proto(
+                        self.compression_threshold, self.compression_level)))
+        elif self.role is SERVER and not self._namespace:
+            # Without namespace, dispatch to groups
+            return await super().group_send(group, message)
         else:
             # Send message to the forwarder/server
-            self.stub.SendMessage(
-                wstransport_pb2.WSSendMessageRequest(
-                    group=group,
-                    message=wstransport_pb2.WSMessage(
-                        **message
-                    )))
+            request = wstransport_pb2.WSSendMessageRequest(
+                group=group,
+                message=message.to_proto(
+                    self.compression_threshold, self.compression_level))
+
+            if self.batch_producer:
+                return await self.batch_producer.send(
+                    request, not self.fire_and_forget if wait is None else wait)
+            return await self.sender.send(request, wait)
     
     async def __call__(self, namespace, workers_queue=None):
         '''
@@ -354,6 +1052,11 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
             if self.role in [SERVER, FORWARDER]:
                 self.__connection = None
                 await self.connection.start()
+                if self.interest_reporter:
+                    self.backend.interest_listener = self.interest_reporter.report
+                    self.interest_reporter.start()
+                if self.role is FORWARDER and self.forward_stub:
+                    self.forward_stub.start()
                 await self.connection.wait_for_termination()
                 return 'ok'
 
@@ -363,8 +1066,21 @@ class gGPCTransportLayer(BaseTransportLayer, wstransport_pb2_grpc.WSGroupManager
             return e
 
     async def stop(self):
+        if self.role is CLIENT:
+            await self.__close_retired_pools()
+        if hasattr(self, '_forward_stub'):
+            await self._forward_stub.close()
+        if hasattr(self, '_interest_reporter'):
+            self.backend.interest_listener = None
+            await self._interest_reporter.close()
+        if self.batch_producer:
+            await self.batch_producer.close()
+        if hasattr(self, '_sender'):
+            await self._sender.close()
+        if hasattr(self, '_channel_pool'):
+            await self._channel_pool.close()
         if self.role in [SERVER, FORWARDER]:
-            self.connection.stop()
+            await self.connection.stop(self.graceful)
 
 
 def get_channel_layer(using='default') -> BaseTransportLayer:
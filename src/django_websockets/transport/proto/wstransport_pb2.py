@@ -13,19 +13,25 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11wstransport.proto\"\x19\n\nWSResponse\x12\x0b\n\x03\x61\x63k\x18\x01 \x01(\x08\"[\n\tWSMessage\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x14\n\x07message\x18\x02 \x01(\tH\x00\x88\x01\x01\x12\x13\n\x06params\x18\x03 \x01(\tH\x01\x88\x01\x01\x42\n\n\x08_messageB\t\n\x07_params\"B\n\x14WSSendMessageRequest\x12\r\n\x05group\x18\x01 \x01(\t\x12\x1b\n\x07message\x18\x02 \x01(\x0b\x32\n.WSMessage2E\n\x0eWSGroupManager\x12\x33\n\x0bSendMessage\x12\x15.WSSendMessageRequest\x1a\x0b.WSResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11wstransport.proto\"\x19\n\nWSResponse\x12\x0b\n\x03\x61\x63k\x18\x01 \x01(\x08\"\x94\x01\n\tWSMessage\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x11\n\x07message\x18\x02 \x01(\tH\x00\x12\x0e\n\x04\x64\x61ta\x18\x04 \x01(\x0cH\x00\x12\x13\n\x06params\x18\x03 \x01(\tH\x01\x88\x01\x01\x12\x1d\n\x08\x65ncoding\x18\x05 \x01(\x0e\x32\x0b.WSEncoding\x12\x0c\n\x04text\x18\x06 \x01(\x08\x42\t\n\x07payloadB\t\n\x07_params\"S\n\x14WSSendMessageRequest\x12\r\n\x05group\x18\x01 \x01(\t\x12\x1b\n\x07message\x18\x02 \x01(\x0b\x32\n.WSMessage\x12\x0f\n\x07relayed\x18\x03 \x01(\x08\"=\n\x12WSSendMessageBatch\x12\'\n\x08messages\x18\x01 \x03(\x0b\x32\x15.WSSendMessageRequest\"d\n\x10WSInterestUpdate\x12\x0e\n\x06worker\x18\x01 \x01(\t\x12\x10\n\x08sequence\x18\x02 \x01(\x04\x12\x10\n\x08snapshot\x18\x03 \x01(\x08\x12\x0e\n\x06joined\x18\x04 \x03(\t\x12\x0c\n\x04left\x18\x05 \x03(\t*$\n\nWSEncoding\x12\x0c\n\x08IDENTITY\x10\x00\x12\x08\n\x04ZLIB\x10\x01\x32\xaf\x01\n\x0eWSGroupManager\x12\x33\n\x0bSendMessage\x12\x15.WSSendMessageRequest\x1a\x0b.WSResponse\"\x00\x12\x34\n\x0cSendMessages\x12\x13.WSSendMessageBatch\x1a\x0b.WSResponse\"\x00(\x01\x12\x32\n\x0eUpdateInterest\x12\x11.WSInterestUpdate\x1a\x0b.WSResponse\"\x00\x62\x06proto3')
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'wstransport_pb2', globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
+  _WSENCODING._serialized_start=449
+  _WSENCODING._serialized_end=485
   _WSRESPONSE._serialized_start=21
   _WSRESPONSE._serialized_end=46
-  _WSMESSAGE._serialized_start=48
-  _WSMESSAGE._serialized_end=139
-  _WSSENDMESSAGEREQUEST._serialized_start=141
-  _WSSENDMESSAGEREQUEST._serialized_end=207
-  _WSGROUPMANAGER._serialized_start=209
-  _WSGROUPMANAGER._serialized_end=278
+  _WSMESSAGE._serialized_start=49
+  _WSMESSAGE._serialized_end=197
+  _WSSENDMESSAGEREQUEST._serialized_start=199
+  _WSSENDMESSAGEREQUEST._serialized_end=282
+  _WSSENDMESSAGEBATCH._serialized_start=284
+  _WSSENDMESSAGEBATCH._serialized_end=345
+  _WSINTERESTUPDATE._serialized_start=347
+  _WSINTERESTUPDATE._serialized_end=447
+  _WSGROUPMANAGER._serialized_start=488
+  _WSGROUPMANAGER._serialized_end=663
 # @@protoc_insertion_point(module_scope)
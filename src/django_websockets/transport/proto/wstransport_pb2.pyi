@@ -1,18 +1,42 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from typing import ClassVar as _ClassVar, Mapping as _Mapping, Optional as _Optional, Union as _Union
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
+IDENTITY: WSEncoding
+ZLIB: WSEncoding
+
+class WSInterestUpdate(_message.Message):
+    __slots__ = ["joined", "left", "sequence", "snapshot", "worker"]
+    JOINED_FIELD_NUMBER: _ClassVar[int]
+    LEFT_FIELD_NUMBER: _ClassVar[int]
+    SEQUENCE_FIELD_NUMBER: _ClassVar[int]
+    SNAPSHOT_FIELD_NUMBER: _ClassVar[int]
+    WORKER_FIELD_NUMBER: _ClassVar[int]
+    joined: _containers.RepeatedScalarFieldContainer[str]
+    left: _containers.RepeatedScalarFieldContainer[str]
+    sequence: int
+    snapshot: bool
+    worker: str
+    def __init__(self, worker: _Optional[str] = ..., sequence: _Optional[int] = ..., snapshot: bool = ..., joined: _Optional[_Iterable[str]] = ..., left: _Optional[_Iterable[str]] = ...) -> None: ...
 
 class WSMessage(_message.Message):
-    __slots__ = ["message", "params", "type"]
+    __slots__ = ["data", "encoding", "message", "params", "text", "type"]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    ENCODING_FIELD_NUMBER: _ClassVar[int]
     MESSAGE_FIELD_NUMBER: _ClassVar[int]
     PARAMS_FIELD_NUMBER: _ClassVar[int]
+    TEXT_FIELD_NUMBER: _ClassVar[int]
     TYPE_FIELD_NUMBER: _ClassVar[int]
+    data: bytes
+    encoding: WSEncoding
     message: str
     params: str
+    text: bool
     type: str
-    def __init__(self, type: _Optional[str] = ..., message: _Optional[str] = ..., params: _Optional[str] = ...) -> None: ...
+    def __init__(self, type: _Optional[str] = ..., message: _Optional[str] = ..., data: _Optional[bytes] = ..., params: _Optional[str] = ..., encoding: _Optional[_Union[WSEncoding, str]] = ..., text: bool = ...) -> None: ...
 
 class WSResponse(_message.Message):
     __slots__ = ["ack"]
@@ -20,10 +44,21 @@ class WSResponse(_message.Message):
     ack: bool
     def __init__(self, ack: bool = ...) -> None: ...
 
+class WSSendMessageBatch(_message.Message):
+    __slots__ = ["messages"]
+    MESSAGES_FIELD_NUMBER: _ClassVar[int]
+    messages: _containers.RepeatedCompositeFieldContainer[WSSendMessageRequest]
+    def __init__(self, messages: _Optional[_Iterable[_Union[WSSendMessageRequest, _Mapping]]] = ...) -> None: ...
+
 class WSSendMessageRequest(_message.Message):
-    __slots__ = ["group", "message"]
+    __slots__ = ["group", "message", "relayed"]
     GROUP_FIELD_NUMBER: _ClassVar[int]
     MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    RELAYED_FIELD_NUMBER: _ClassVar[int]
     group: str
     message: WSMessage
-    def __init__(self, group: _Optional[str] = ..., message: _Optional[_Union[WSMessage, _Mapping]] = ...) -> None: ...
+    relayed: bool
+    def __init__(self, group: _Optional[str] = ..., message: _Optional[_Union[WSMessage, _Mapping]] = ..., relayed: bool = ...) -> None: ...
+
+class WSEncoding(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = []
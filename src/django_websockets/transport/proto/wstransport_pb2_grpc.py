@@ -19,6 +19,16 @@ class WSGroupManagerStub(object):
                 request_serializer=wstransport__pb2.WSSendMessageRequest.SerializeToString,
                 response_deserializer=wstransport__pb2.WSResponse.FromString,
                 )
+        self.SendMessages = channel.stream_unary(
+                '/WSGroupManager/SendMessages',
+                request_serializer=wstransport__pb2.WSSendMessageBatch.SerializeToString,
+                response_deserializer=wstransport__pb2.WSResponse.FromString,
+                )
+        self.UpdateInterest = channel.unary_unary(
+                '/WSGroupManager/UpdateInterest',
+                request_serializer=wstransport__pb2.WSInterestUpdate.SerializeToString,
+                response_deserializer=wstransport__pb2.WSResponse.FromString,
+                )
 
 
 class WSGroupManagerServicer(object):
@@ -30,6 +40,19 @@ class WSGroupManagerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SendMessages(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateInterest(self, request, context):
+        """Workers report the groups they have members in to the forwarder
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_WSGroupManagerServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -38,6 +61,16 @@ def add_WSGroupManagerServicer_to_server(servicer, server):
                     request_deserializer=wstransport__pb2.WSSendMessageRequest.FromString,
                     response_serializer=wstransport__pb2.WSResponse.SerializeToString,
             ),
+            'SendMessages': grpc.stream_unary_rpc_method_handler(
+                    servicer.SendMessages,
+                    request_deserializer=wstransport__pb2.WSSendMessageBatch.FromString,
+                    response_serializer=wstransport__pb2.WSResponse.SerializeToString,
+            ),
+            'UpdateInterest': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateInterest,
+                    request_deserializer=wstransport__pb2.WSInterestUpdate.FromString,
+                    response_serializer=wstransport__pb2.WSResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'WSGroupManager', rpc_method_handlers)
@@ -64,3 +97,37 @@ class WSGroupManager(object):
             wstransport__pb2.WSResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SendMessages(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/WSGroupManager/SendMessages',
+            wstransport__pb2.WSSendMessageBatch.SerializeToString,
+            wstransport__pb2.WSResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def UpdateInterest(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/WSGroupManager/UpdateInterest',
+            wstransport__pb2.WSInterestUpdate.SerializeToString,
+            wstransport__pb2.WSResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
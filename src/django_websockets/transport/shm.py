@@ -0,0 +1,567 @@
+import asyncio
+from contextlib import contextmanager
+import fcntl
+import hashlib
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import stat
+import struct
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple, Union
+import warnings
+
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.backends import BaseGroupBackend
+from django_websockets.transport import (
+    FORWARDER, SERVER, BaseTransportLayer, TransportConfig)
+
+# Header: reserved and written positions, ring size and reader slots,
+# then the pid, the read position, a flag byte waiting for records and a
+# flag byte waiting for room of every slot
+_POSITIONS = struct.Struct('<QQ')
+_LAYOUT = struct.Struct('<II')
+_LAYOUT_OFFSET = _POSITIONS.size
+_PIDS_OFFSET = _LAYOUT_OFFSET + _LAYOUT.size
+_PID = struct.Struct('<I')
+_POSITION = struct.Struct('<Q')
+
+# Record: length of the rest, length of the group name
+_RECORD = struct.Struct('<IH')
+
+
+class SharedMemoryRing(object):
+    """
+    Broadcast ring buffer in a shared memory segment of *size* bytes, for
+    the processes of a host.
+
+    Writers append records under a file lock. Every reader has a slot with
+    a FIFO used to wake it up and reads all the records from its own
+    position, so a record is written once whatever the number of readers.
+    append() refuses to overwrite records a reader didn't read unless it's
+    forced to, then the reader loses them. A writer that also reads the
+    ring can flag its slot as waiting for room, the readers wake it up
+    through its FIFO when they move on.
+
+    The segment and files are named after *path*. The first process
+    creates them and unlink() removes them.
+    """
+
+    def __init__(self, path: str, size=16 * 2 ** 20, max_readers=64):
+        self.path = path
+        self.max_readers = max_readers
+        self.__thread_lock = threading.Lock()
+        self.__lock_file = os.open(f'{path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        self.__signals: Dict[int, int] = {}
+
+        name = 'dws_' + hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+        with self.__locked():
+            try:
+                self.__shm = SharedMemory(name)
+                self.size, self.max_readers = _LAYOUT.unpack_from(self.__shm.buf, _LAYOUT_OFFSET)
+                if (self.size, self.max_readers) != (size, max_readers):
+                    warnings.warn(
+                        "Shared memory transport '{}' exists with size={} and max_readers={}, using them"
+                        .format(path, self.size, self.max_readers))
+            except FileNotFoundError:
+                self.size = size
+                self.__shm = SharedMemory(
+                    name, create=True, size=self.__layout(max_readers) + size)
+                _LAYOUT.pack_into(self.__shm.buf, _LAYOUT_OFFSET, size, max_readers)
+            # The segment outlives the processes using it, the resource
+            # tracker would unlink it when the first of them exits
+            resource_tracker.unregister(self.__shm._name, 'shared_memory')
+
+        self.__buf = self.__shm.buf
+        self.__pids = struct.Struct(f'<{self.max_readers}I')
+        self.__read_positions = struct.Struct(f'<{self.max_readers}Q')
+        self.__positions_offset = _PIDS_OFFSET + _PID.size * self.max_readers
+        self.__waiting_offset = self.__positions_offset + _POSITION.size * self.max_readers
+        self.__room_offset = self.__waiting_offset + self.max_readers
+        self.__data_offset = self.__layout(self.max_readers)
+        self.__none_waiting = bytes(self.max_readers)
+        # Position up to which the readers left room, checked again past it
+        self.__free_until = 0
+
+    @staticmethod
+    def __layout(max_readers: int) -> int:
+        """
+        Size of the header
+        """
+        return _PIDS_OFFSET + (_PID.size + _POSITION.size + 2) * max_readers
+
+    @property
+    def name(self) -> str:
+        return self.__shm.name
+
+    @contextmanager
+    def __locked(self):
+        # flock() doesn't exclude the threads sharing the file
+        with self.__thread_lock:
+            fcntl.flock(self.__lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.__lock_file, fcntl.LOCK_UN)
+
+    def positions(self) -> Tuple[int, int]:
+        """
+        Returns the reserved and the written positions
+        """
+        return _POSITIONS.unpack_from(self.__buf, 0)
+
+    def fifo_path(self, slot: int) -> str:
+        return f'{self.path}.{slot}.fifo'
+
+    def __write(self, position: int, data: bytes):
+        buf = self.__buf
+        offset = position % self.size
+        first = min(len(data), self.size - offset)
+        start = self.__data_offset + offset
+        buf[start:start + first] = data[:first]
+        if first < len(data):
+            buf[self.__data_offset:self.__data_offset + len(data) - first] = data[first:]
+
+    def __read(self, position: int, length: int) -> bytes:
+        buf = self.__buf
+        offset = position % self.size
+        first = min(length, self.size - offset)
+        start = self.__data_offset + offset
+        data = bytes(buf[start:start + first])
+        if first < length:
+            data += bytes(buf[self.__data_offset:self.__data_offset + length - first])
+        return data
+
+    def __has_room(self, written: int, end: int) -> bool:
+        """
+        Whether the records up to *end* can be written without overwriting
+        records a reader didn't read. Readers that already lost records
+        don't count
+        """
+        if end <= self.__free_until:
+            return True
+
+        pids = self.__pids.unpack_from(self.__buf, _PIDS_OFFSET)
+        read_positions = self.__read_positions.unpack_from(self.__buf, self.__positions_offset)
+        behind = [
+            position for pid, position in zip(pids, read_positions)
+            if pid and position >= written - self.size
+        ]
+        self.__free_until = min(behind, default=written) + self.size
+        return end <= self.__free_until
+
+    def append(self, group: str, message: bytes, force=False, blocking=True) -> bool:
+        """
+        Writes a record and wakes up the readers waiting for it. Returns
+        false if it wasn't written because a reader is *size* bytes behind,
+        unless *force* is true.
+
+        Without *blocking*, raises BlockingIOError instead of waiting for
+        another writer holding the lock
+        """
+        group = group.encode('utf-8')
+        record = _RECORD.pack(_RECORD.size - 4 + len(group) + len(message), len(group)) \
+            + group + message
+        if len(record) > self.size:
+            raise ValueError(
+                "Group message of {} bytes doesn't fit the shared memory ring".format(len(record)))
+
+        buf = self.__buf
+        # Not a context manager, this is the hot path
+        if not self.__thread_lock.acquire(blocking):
+            raise BlockingIOError("The shared memory ring is locked")
+        try:
+            fcntl.flock(self.__lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BaseException:
+            self.__thread_lock.release()
+            raise
+        try:
+            _, written = _POSITIONS.unpack_from(buf, 0)
+            if not force and not self.__has_room(written, written + len(record)):
+                return False
+            # Readers check the reserved position to detect overwritten records
+            _POSITIONS.pack_into(buf, 0, written + len(record), written)
+            self.__write(written, record)
+            _POSITIONS.pack_into(buf, 0, written + len(record), written + len(record))
+
+            offset = self.__waiting_offset
+            waiting = bytes(buf[offset:offset + self.max_readers])
+            if waiting != self.__none_waiting:
+                slot = waiting.find(1)
+                while slot >= 0:
+                    buf[offset + slot] = 0
+                    self.__signal(slot)
+                    slot = waiting.find(1, slot + 1)
+            return True
+        finally:
+            fcntl.flock(self.__lock_file, fcntl.LOCK_UN)
+            self.__thread_lock.release()
+
+    def __signal(self, slot: int):
+        fd = self.__signals.get(slot)
+        try:
+            if fd is None:
+                fd = self.__signals[slot] = os.open(
+                    self.fifo_path(slot), os.O_WRONLY | os.O_NONBLOCK)
+            os.write(fd, b'\0')
+        except BlockingIOError:
+            # Full of wake ups already
+            pass
+        except OSError:
+            # The reader is gone
+            if slot in self.__signals:
+                os.close(self.__signals.pop(slot))
+
+    def read(self, position: int) -> Tuple[int, list, int]:
+        """
+        Reads the records written from *position*. Returns the next position,
+        the (group, message bytes) records and how many bytes were lost
+        """
+        _, written = self.positions()
+        if written - position > self.size:
+            return written, [], written - position
+
+        buf = self.__buf
+        size = self.size
+        data_offset = self.__data_offset
+        first = position
+        records = []
+        while position < written:
+            offset = position % size
+            if offset + _RECORD.size <= size:
+                length, group_length = _RECORD.unpack_from(buf, data_offset + offset)
+            else:
+                length, group_length = _RECORD.unpack(self.__read(position, _RECORD.size))
+            if length > size:
+                # Being overwritten
+                break
+
+            end = offset + 4 + length
+            if end <= size:
+                data = bytes(buf[data_offset + offset + _RECORD.size:data_offset + end])
+            else:
+                data = self.__read(position + _RECORD.size, length - (_RECORD.size - 4))
+            records.append((data[:group_length].decode('utf-8', 'replace'), data[group_length:]))
+            position += 4 + length
+
+        # A writer started to overwrite them while they were read
+        reserved, written = self.positions()
+        if reserved - first > size or position < written and length > size:
+            return written, [], written - first
+        return position, records, 0
+
+    def attach_reader(self) -> Tuple[int, int, int]:
+        """
+        Claims a reader slot. Returns it, the FIFO file descriptor that
+        becomes readable when records arrive and the position to read from
+        """
+        with self.__locked():
+            for slot in range(self.max_readers):
+                pid, = _PID.unpack_from(self.__buf, _PIDS_OFFSET + _PID.size * slot)
+                if pid and pid != os.getpid():
+                    try:
+                        os.kill(pid, 0)
+                        continue
+                    except ProcessLookupError:
+                        pass
+                    except PermissionError:
+                        continue
+                elif pid:
+                    continue
+
+                path = self.fifo_path(slot)
+                try:
+                    os.mkfifo(path, 0o600)
+                except FileExistsError:
+                    if not stat.S_ISFIFO(os.stat(path).st_mode):
+                        raise
+                # Read and write so it doesn't report EOF without writers
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+                _, written = self.positions()
+                _PID.pack_into(self.__buf, _PIDS_OFFSET + _PID.size * slot, os.getpid())
+                self.set_read_position(slot, written)
+                self.__buf[self.__waiting_offset + slot] = 0
+                self.__buf[self.__room_offset + slot] = 0
+                return slot, fd, written
+
+        raise RuntimeError(
+            "Shared memory transport '{}' has no free reader slot".format(self.path))
+
+    def set_read_position(self, slot: int, position: int):
+        """
+        Publishes the position of the reader, the writers keep the records
+        after it
+        """
+        _POSITION.pack_into(self.__buf, self.__positions_offset + _POSITION.size * slot, position)
+
+    def set_waiting(self, slot: int, waiting: bool):
+        """
+        Flags the reader as waiting for a wake up before the next record
+        """
+        self.__buf[self.__waiting_offset + slot] = int(waiting)
+
+    def set_waiting_room(self, slot: int, waiting: bool):
+        """
+        Flags the writer reading on the slot as waiting for the readers to
+        make room
+        """
+        self.__buf[self.__room_offset + slot] = int(waiting)
+
+    def wake_writers(self):
+        """
+        Wakes up the writers waiting for room, called by the readers when
+        they moved on
+        """
+        buf = self.__buf
+        offset = self.__room_offset
+        waiting = bytes(buf[offset:offset + self.max_readers])
+        if waiting != self.__none_waiting:
+            slot = waiting.find(1)
+            while slot >= 0:
+                buf[offset + slot] = 0
+                self.__signal(slot)
+                slot = waiting.find(1, slot + 1)
+
+    def detach_reader(self, slot: int, fd: int):
+        with self.__locked():
+            _PID.pack_into(self.__buf, _PIDS_OFFSET + _PID.size * slot, 0)
+            self.__buf[self.__waiting_offset + slot] = 0
+            self.__buf[self.__room_offset + slot] = 0
+        os.close(fd)
+
+    def close(self):
+        for fd in self.__signals.values():
+            os.close(fd)
+        self.__signals.clear()
+        self.__shm.close()
+        os.close(self.__lock_file)
+
+    def unlink(self):
+        """
+        Removes the segment and the files of the ring
+        """
+        with self.__locked():
+            # Registered again as unlink() unregisters it
+            resource_tracker.register(self.__shm._name, 'shared_memory')
+            try:
+                self.__shm.unlink()
+            except FileNotFoundError:
+                pass
+            for slot in range(self.max_readers):
+                try:
+                    os.unlink(self.fifo_path(slot))
+                except FileNotFoundError:
+                    pass
+        try:
+            os.unlink(f'{self.path}.lock')
+        except FileNotFoundError:
+            pass
+
+
+class SharedMemoryTransportLayer(BaseTransportLayer):
+    """
+    Transport for workers on the same host: group messages are written once
+    to a shared memory ring buffer and every worker reads them from there,
+    without going through the master.
+
+    CONFIG:
+
+    *path*: base name of the lock and wake up files, /tmp/django_websockets
+    by default. Layers with the same path share the ring.
+
+    *size*: bytes of the ring, 16 MiB by default.
+
+    *send_timeout*: seconds group_send() waits for a worker that is *size*
+    bytes behind, 1 by default. The message is written after it and the
+    worker loses the oldest messages.
+
+    *max_readers*: workers that can read the ring, 64 by default.
+
+    *poll_interval*: seconds between checks of the ring when no wake up
+    arrived, a safeguard for a missed one. 1 by default.
+
+    *compression*, *compression_threshold*, *compression_level*: as for
+    the gRPC transport.
+    """
+
+    def __init__(self, backend: BaseGroupBackend, config: TransportConfig):
+        super().__init__(backend, config)
+        self.__ring: Optional[SharedMemoryRing] = None
+        self.__reader: Optional[Tuple[int, int, int]] = None
+        self.__wakeup: Optional[asyncio.Event] = None
+        self.__room: Optional[asyncio.Event] = None
+        self.__room_waiters = 0
+        self.__stopped: Optional[asyncio.Event] = None
+        self.__finished: Optional[asyncio.Event] = None
+
+    @property
+    def path(self):
+        return self.config.path or '/tmp/django_websockets'
+
+    @property
+    def size(self):
+        return self.config.size or 16 * 2 ** 20
+
+    @property
+    def max_readers(self):
+        return self.config.max_readers or 64
+
+    @property
+    def send_timeout(self):
+        if self.config.send_timeout is None:
+            return 1
+        return self.config.send_timeout
+
+    @property
+    def poll_interval(self):
+        return self.config.poll_interval or 1
+
+    @property
+    def ring(self) -> SharedMemoryRing:
+        if self.__ring is None:
+            self.__ring = SharedMemoryRing(self.path, self.size, self.max_readers)
+        return self.__ring
+
+    async def group_send(self, group: str, message: Union[dict, GroupMessage]):
+        '''
+        Broadcast a message to the workers of the host, this one included
+        '''
+        if not isinstance(message, GroupMessage):
+            message = GroupMessage(**message)
+        data = message.to_bytes(self.compression_threshold, self.compression_level)
+        deadline = time.monotonic() + self.send_timeout
+        delay = 0.001
+        waiting = False
+        try:
+            while True:
+                try:
+                    if self.ring.append(
+                            group, data, force=time.monotonic() >= deadline, blocking=False):
+                        return
+                except BlockingIOError:
+                    # Another writer holds the lock for a copy
+                    await asyncio.sleep(0)
+                    continue
+
+                if self.__reader is None:
+                    # Without a FIFO to be woken up on
+                    await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                    delay = min(delay * 2, 0.05)
+                    continue
+
+                if waiting:
+                    try:
+                        await asyncio.wait_for(
+                            self.__room.wait(),
+                            min(max(deadline - time.monotonic(), 0), self.poll_interval))
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    waiting = True
+                    self.__room_waiters += 1
+                # Flagged before trying again, so a reader moving on in
+                # between wakes it up
+                self.__room.clear()
+                self.ring.set_waiting_room(self.__reader[0], True)
+        finally:
+            if waiting:
+                self.__room_waiters -= 1
+                if not self.__room_waiters and self.__reader is not None:
+                    self.ring.set_waiting_room(self.__reader[0], False)
+
+    async def __deliver(self, records):
+        for group, data in records:
+            try:
+                await super().group_send(group, GroupMessage.from_bytes(data))
+            except:
+                traceback.print_exc()
+
+    def __on_readable(self):
+        try:
+            while os.read(self.__reader[1], 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.__wakeup.set()
+        self.__room.set()
+
+    async def __read_loop(self):
+        slot, fd, position = self.__reader
+        loop = asyncio.get_running_loop()
+        loop.add_reader(fd, self.__on_readable)
+        try:
+            while True:
+                self.ring.set_waiting(slot, False)
+                position, records, lost = self.ring.read(position)
+                self.ring.set_read_position(slot, position)
+                if records or lost:
+                    self.ring.wake_writers()
+                if lost:
+                    warnings.warn(
+                        "Worker '{}' fell behind the shared memory transport, {} bytes of group messages were lost"
+                        .format(self._namespace, lost))
+                if records:
+                    await self.__deliver(records)
+                    continue
+
+                # Writers wake up the waiting readers only
+                self.ring.set_waiting(slot, True)
+                if self.ring.positions()[1] != position:
+                    continue
+
+                self.__wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.__wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            loop.remove_reader(fd)
+
+    async def __call__(self, namespace=None, workers_queue=None):
+        '''
+        Starts the layer. Workers read the ring until stop() is called, the
+        master only creates it
+        '''
+        self.__stopped = asyncio.Event()
+        self.__finished = asyncio.Event()
+        try:
+            self._namespace = namespace
+            self._workers_queue = workers_queue
+            if self.role is SERVER:
+                self.__wakeup = asyncio.Event()
+                self.__room = asyncio.Event()
+                self.__reader = self.ring.attach_reader()
+                read_task = asyncio.create_task(self.__read_loop())
+                try:
+                    await self.__stopped.wait()
+                finally:
+                    read_task.cancel()
+                    await asyncio.gather(read_task, return_exceptions=True)
+                    self.ring.detach_reader(*self.__reader[:2])
+                    self.__reader = None
+                return 'ok'
+
+            if self.role is FORWARDER:
+                self.ring
+                await self.__stopped.wait()
+                return 'ok'
+
+            return self.role
+        except Exception as e:
+            traceback.print_exc()
+            return e
+        finally:
+            self.__finished.set()
+
+    async def stop(self):
+        if self.__stopped is not None:
+            self.__stopped.set()
+            # The reader leaves its slot
+            await self.__finished.wait()
+        if self.__ring is not None:
+            if self.role is FORWARDER:
+                self.__ring.unlink()
+            self.__ring.close()
+            self.__ring = None
@@ -0,0 +1,27 @@
+"""
+Set up shared by the unit tests, which import the package from src/ and
+run with minimal django settings
+"""
+import os
+import sys
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+def setup_django():
+    import django
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(
+            SECRET_KEY='tests',
+            INSTALLED_APPS=['django.contrib.auth', 'django.contrib.contenttypes'],
+            WEBSOCKET_TRANSPORT_BACKENDS={'default': {
+                'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+                'CONFIG': {}}},
+            USE_TZ=True)
+        django.setup()
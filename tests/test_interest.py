@@ -0,0 +1,79 @@
+"""
+InterestIndex updates from the workers and the peers of a forwarder
+"""
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django_websockets.transport import InterestIndex
+from django_websockets.transport.proto.wstransport_pb2 import WSInterestUpdate
+
+
+class InterestIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = InterestIndex()
+        self.notified = []
+        self.index.listener = lambda group, joined: self.notified.append((group, joined))
+
+    def update(self, worker, sequence, joined=(), left=(), snapshot=False):
+        return self.index.update(WSInterestUpdate(
+            worker=worker, sequence=sequence, snapshot=snapshot,
+            joined=joined, left=left))
+
+    def test_unreported_get_everything(self):
+        self.assertEqual(self.index.targets('room', ['worker_0', 'worker_1']),
+                         ['worker_0', 'worker_1'])
+
+    def test_snapshot(self):
+        self.assertTrue(self.update('worker_0', 1, joined=['room', 'lobby'], snapshot=True))
+        self.assertEqual(self.index.targets('room', ['worker_0', 'worker_1']),
+                         ['worker_0', 'worker_1'])
+        self.assertEqual(self.index.targets('other', ['worker_0', 'worker_1']), ['worker_1'])
+        self.assertEqual(set(self.index), {'room', 'lobby'})
+        self.assertIn('room', self.index)
+
+        # A new snapshot replaces the groups
+        self.assertTrue(self.update('worker_0', 1, joined=['other'], snapshot=True))
+        self.assertEqual(set(self.index), {'other'})
+
+    def test_updates(self):
+        self.update('worker_0', 1, joined=['room'], snapshot=True)
+        self.assertTrue(self.update('worker_0', 2, joined=['lobby']))
+        self.assertTrue(self.update('worker_0', 3, left=['room']))
+        self.assertEqual(self.index.targets('room', ['worker_0']), [])
+        self.assertEqual(self.index.targets('lobby', ['worker_0']), ['worker_0'])
+
+    def test_gap(self):
+        self.update('worker_0', 1, joined=['room'], snapshot=True)
+        # Update 2 was lost
+        self.assertFalse(self.update('worker_0', 3, joined=['lobby']))
+        self.assertNotIn('room', self.index)
+        # Gets every message until it sends a snapshot
+        self.assertEqual(self.index.targets('anything', ['worker_0']), ['worker_0'])
+        self.assertFalse(self.update('worker_0', 4, joined=['lobby']))
+
+        self.assertTrue(self.update('worker_0', 4, joined=['lobby'], snapshot=True))
+        self.assertEqual(self.index.targets('anything', ['worker_0']), [])
+
+    def test_listener(self):
+        self.update('worker_0', 1, joined=['room'], snapshot=True)
+        self.update('worker_1', 1, joined=['room', 'lobby'], snapshot=True)
+        self.assertEqual(self.notified, [('room', True), ('lobby', True)])
+
+        # Only the last member leaving is notified
+        self.notified.clear()
+        self.update('worker_0', 2, left=['room'])
+        self.assertEqual(self.notified, [])
+        self.update('worker_1', 2, left=['room'])
+        self.assertEqual(self.notified, [('room', False)])
+
+        self.notified.clear()
+        self.update('worker_1', 4, joined=['other'])
+        self.assertEqual(self.notified, [('lobby', False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
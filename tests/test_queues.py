@@ -0,0 +1,101 @@
+"""
+GroupQueue bounds and overflow policies
+"""
+import asyncio
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django_websockets.groups import GroupMessage
+from django_websockets.groups.queues import (
+    COALESCE, COALESCED, DELIVERED, DISCONNECT, DISCONNECTED, DROP_NEWEST,
+    DROP_OLDEST, DROPPED, GroupQueue, QueueOverflow)
+
+
+def message(type, text):
+    return GroupMessage(type, text)
+
+
+def drain(queue):
+    return [queue.get_nowait().message for _ in range(queue.qsize())]
+
+
+class GroupQueueTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def test_unbounded(self):
+        queue = GroupQueue()
+        for i in range(1000):
+            self.assertIs(queue.offer(message('chat', str(i))), DELIVERED)
+        self.assertEqual(queue.qsize(), 1000)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            GroupQueue(2, 'drop_all')
+
+    def test_policy_by_name(self):
+        self.assertIs(GroupQueue(2, 'drop_newest').policy, DROP_NEWEST)
+
+    def test_drop_oldest(self):
+        queue = GroupQueue(2, DROP_OLDEST)
+        self.assertIs(queue.offer(message('chat', '1')), DELIVERED)
+        self.assertIs(queue.offer(message('chat', '2')), DELIVERED)
+        self.assertIs(queue.offer(message('chat', '3')), DROPPED)
+        self.assertEqual(drain(queue), ['2', '3'])
+
+    def test_drop_newest(self):
+        queue = GroupQueue(2, DROP_NEWEST)
+        queue.offer(message('chat', '1'))
+        queue.offer(message('chat', '2'))
+        self.assertIs(queue.offer(message('chat', '3')), DROPPED)
+        self.assertEqual(drain(queue), ['1', '2'])
+
+    def test_coalesce_by_type(self):
+        queue = GroupQueue(2, COALESCE)
+        queue.offer(message('price', '1'))
+        queue.offer(message('chat', '2'))
+        self.assertIs(queue.offer(message('price', '3')), COALESCED)
+        # The replaced message keeps its place
+        self.assertEqual(drain(queue), ['3', '2'])
+
+    def test_coalesce_without_match_drops_oldest(self):
+        queue = GroupQueue(2, COALESCE)
+        queue.offer(message('price', '1'))
+        queue.offer(message('chat', '2'))
+        self.assertIs(queue.offer(message('typing', '3')), DROPPED)
+        self.assertEqual(drain(queue), ['2', '3'])
+
+    def test_coalesce_key(self):
+        queue = GroupQueue(2, COALESCE, key='params')
+        queue.offer(GroupMessage('price', '1', params='btc'))
+        queue.offer(GroupMessage('price', '2', params='eth'))
+        self.assertIs(queue.offer(GroupMessage('price', '3', params='eth')), COALESCED)
+        self.assertEqual(drain(queue), ['1', '3'])
+
+        queue = GroupQueue(1, COALESCE, key=lambda message: message.message[0])
+        queue.offer(message('chat', 'a1'))
+        self.assertIs(queue.offer(message('chat', 'a2')), COALESCED)
+        self.assertEqual(drain(queue), ['a2'])
+
+    async def test_disconnect(self):
+        queue = GroupQueue(2, DISCONNECT)
+        queue.offer(message('chat', '1'))
+        queue.offer(message('chat', '2'))
+        self.assertIs(queue.offer(message('chat', '3')), DISCONNECTED)
+        self.assertTrue(queue.overflowed)
+        # Queued messages are dropped and later ones refused
+        self.assertIs(queue.offer(message('chat', '4')), DISCONNECTED)
+        with self.assertRaises(QueueOverflow):
+            await queue.get()
+
+    async def test_get_waits(self):
+        queue = GroupQueue(1)
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        queue.offer(message('chat', '1'))
+        self.assertEqual((await getter).message, '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
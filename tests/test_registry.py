@@ -0,0 +1,85 @@
+"""
+GroupRegistry memberships and counters
+"""
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django_websockets.groups.registry import GroupRegistry
+
+
+class GroupRegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = GroupRegistry()
+
+    def test_add(self):
+        self.assertTrue(self.registry.add('room', 'a'))
+        self.assertTrue(self.registry.add('room', 'b'))
+        self.assertTrue(self.registry.add('lobby', 'a'))
+        # Already a member
+        self.assertFalse(self.registry.add('room', 'a'))
+
+        self.assertEqual(self.registry.members('room'), {'a', 'b'})
+        self.assertEqual(self.registry.groups('a'), {'room', 'lobby'})
+        self.assertEqual(self.registry.group_size('room'), 2)
+        self.assertEqual(self.registry.memberships, 3)
+        self.assertEqual(self.registry.num_members, 2)
+        self.assertEqual(len(self.registry), 2)
+        self.assertIn('room', self.registry)
+        self.assertEqual(set(self.registry), {'room', 'lobby'})
+        self.assertEqual(set(self.registry.all_members()), {'a', 'b'})
+
+    def test_discard(self):
+        self.registry.add('room', 'a')
+        self.registry.add('room', 'b')
+        self.registry.add('lobby', 'a')
+
+        self.assertTrue(self.registry.discard('room', 'a'))
+        self.assertFalse(self.registry.discard('room', 'a'))
+        self.assertFalse(self.registry.discard('missing', 'a'))
+        self.assertEqual(self.registry.members('room'), {'b'})
+        self.assertEqual(self.registry.groups('a'), {'lobby'})
+        self.assertEqual(self.registry.memberships, 2)
+
+        # The last member leaving removes the group
+        self.assertTrue(self.registry.discard('room', 'b'))
+        self.assertNotIn('room', self.registry)
+        self.assertEqual(self.registry.members('room'), set())
+        self.assertEqual(self.registry.groups('b'), set())
+        self.assertEqual(self.registry.num_members, 1)
+
+    def test_discard_member(self):
+        self.registry.add('room', 'a')
+        self.registry.add('room', 'b')
+        self.registry.add('lobby', 'a')
+
+        self.assertEqual(sorted(self.registry.discard_member('a')), ['lobby', 'room'])
+        self.assertEqual(self.registry.discard_member('a'), [])
+        self.assertEqual(self.registry.members('room'), {'b'})
+        self.assertNotIn('lobby', self.registry)
+        self.assertEqual(self.registry.memberships, 1)
+        self.assertEqual(self.registry.num_members, 1)
+
+    def test_counters(self):
+        self.registry.add('room', 'a')
+        counter = self.registry.counter('room')
+        counter['delivered'] += 2
+        self.assertEqual(self.registry.counter('room')['delivered'], 2)
+
+        # They live as long as the group does
+        self.registry.discard('room', 'a')
+        self.assertEqual(self.registry.counter('room')['delivered'], 0)
+        self.registry.add('room', 'a')
+        self.assertEqual(self.registry.counter('room')['delivered'], 0)
+
+    def test_missing_counter_isnt_kept(self):
+        self.registry.counter('missing')['delivered'] += 1
+        self.assertNotIn('missing', self.registry)
+        self.assertEqual(self.registry.counter('missing')['delivered'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Router against the django url resolver on the same patterns
+"""
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django.urls import Resolver404, include, path, re_path
+from django.urls.resolvers import RegexPattern, URLResolver
+
+from django_websockets.middlewares.router import Router, _static_prefix
+
+
+def view(websocket, *args, **kwargs): ...
+
+
+def other_view(websocket, *args, **kwargs): ...
+
+
+URLPATTERNS = [
+    re_path(r'^/ws/chat/(?P<room>\w+)/?$', view),
+    re_path(r'^/ws/chat/lobby/?$', other_view),
+    path('/ws/users/<int:pk>/', view),
+    path('/ws/users/<slug:name>/', other_view),
+    re_path(r'^/a|/b$', view),
+    re_path(r'^/(x|y)/(\d+)$', other_view),
+    re_path(r'^/opt?ional$', view),
+    re_path(r'^/dot\.json$', other_view),
+    re_path(r'/unanchored/(?P<id>\d+)$', view),
+    re_path(r'^/set/[|a]$', other_view),
+    re_path(r'^/back/(?P<word>\w)(?P=word)$', view),
+    path('/ws/nested/', include([
+        path('<int:pk>/', view),
+        re_path(r'^(?P<name>[a-z]+)/$', other_view),
+    ])),
+]
+
+PATHS = [
+    '/ws/chat/general/', '/ws/chat/lobby/', '/ws/chat/lobby', '/ws/chat/',
+    '/ws/users/42/', '/ws/users/someone/', '/ws/users/', '/a', '/a/more',
+    '/b', '/c/b', '/x/1', '/y/22', '/z/1', '/opional', '/optional',
+    '/dot.json', '/dotxjson', '/unanchored/7', '/prefix/unanchored/7',
+    '/set/|', '/set/a', '/set/b', '/back/aa', '/back/ab', '/ws/nested/3/',
+    '/ws/nested/abc/', '/ws/nested/', '/', '',
+]
+
+
+def result(resolver_match):
+    if resolver_match is None:
+        return None
+    return resolver_match.func, resolver_match.args, resolver_match.kwargs
+
+
+class StaticPrefixTestCase(unittest.TestCase):
+
+    def test_prefix(self):
+        for regex, prefix in [
+                (r'^/ws/chat/$', '/ws/chat/'),
+                (r'\A/ws/chat', '/ws/chat'),
+                (r'^/ws/(?P<room>\w+)', '/ws/'),
+                (r'^/opt?ional', '/op'),
+                (r'^/dot\.json', '/dot.json'),
+                (r'^/\d+', '/'),
+                (r'^/(a|b)', '/'),
+                (r'^/[|]', '/'),
+                (r'/ws/chat', None),
+                (r'^/a|/b$', None),
+                (r'^/a|^/b', None)]:
+            with self.subTest(regex=regex):
+                self.assertEqual(_static_prefix(regex), prefix)
+
+
+class RouterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = URLResolver(RegexPattern(r'^'), URLPATTERNS)
+
+    def resolve(self, path):
+        try:
+            return result(self.resolver.resolve(path))
+        except Resolver404:
+            return None
+
+    def test_same_as_django(self):
+        router = Router(URLPATTERNS)
+        for path_ in PATHS:
+            with self.subTest(path=path_):
+                self.assertEqual(result(router.resolve(path_)), self.resolve(path_))
+
+    def test_cached(self):
+        router = Router(URLPATTERNS, cache_size=2)
+        for _ in range(2):
+            for path_ in PATHS:
+                with self.subTest(path=path_):
+                    self.assertEqual(result(router.resolve(path_)), self.resolve(path_))
+
+    def test_alternation(self):
+        router = Router([re_path(r'^/a|/b$', view)])
+        self.assertEqual(result(router.resolve('/b')), (view, (), {}))
+        self.assertEqual(result(router.resolve('/a')), (view, (), {}))
+        self.assertIsNone(router.resolve('/c'))
+
+    def test_first_pattern_wins(self):
+        router = Router(URLPATTERNS)
+        self.assertEqual(result(router.resolve('/ws/chat/lobby/')),
+                         (view, (), {'room': 'lobby'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
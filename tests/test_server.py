@@ -0,0 +1,170 @@
+"""
+Smoke test of the websockets_server command: starts a project with the
+middlewares of the README on 2 workers and checks that connections are
+accepted by both workers and receive the group messages.
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+
+import websockets
+
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+SETTINGS = '''
+SECRET_KEY = 'smoke'
+INSTALLED_APPS = [
+    'django.contrib.auth', 'django.contrib.contenttypes',
+    'django.contrib.sessions', 'django_websockets']
+DATABASES = {{'default': {{
+    'ENGINE': 'django.db.backends.sqlite3', 'NAME': '{directory}/db.sqlite3'}}}}
+WEBSOCKET_MIDDLEWARE = [
+    'django_websockets.middlewares.scope.ScopeMiddleware',
+    'django_websockets.middlewares.auth.AuthMiddleware',
+    'django_websockets.middlewares.route.RouteMiddleware',
+]
+WEBSOCKET_ROUTE_MODULE = 'smoke.routing'
+WEBSOCKET_TRANSPORT_BACKENDS = {{'default': {{
+    'BACKEND': 'django_websockets.transport.gGPCTransportLayer',
+    'CONFIG': {{'address': 'unix:{directory}/rpc.sock'}}}}}}
+USE_TZ = True
+'''
+
+ROUTING = '''
+import os
+from django.urls import re_path
+from django_websockets.consumers import BaseConsumer
+from django_websockets.groups import GroupMessage
+from django_websockets.transport import get_channel_layer
+
+
+class Echo(BaseConsumer):
+
+    async def connect(self):
+        await get_channel_layer().group_add('room', self)
+
+    async def receive(self, data):
+        if data == 'broadcast':
+            await get_channel_layer().group_send('room', GroupMessage('chat_message', 'hello'))
+        else:
+            await self.send(f'{os.getpid()}:{data}')
+
+    async def chat_message(self, event):
+        await self.send(f'group:{event["message"]}')
+
+
+urlpatterns = [re_path(r'^/ws/echo/?$', Echo.as_handler())]
+'''
+
+
+def free_port(workers):
+    """
+    Port free along with the ports of the workers after it
+    """
+    while True:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        try:
+            for offset in range(1, workers + 1):
+                with socket.socket() as sock:
+                    sock.bind(('127.0.0.1', port + offset))
+        except OSError:
+            continue
+        return port
+
+
+class ServerTestCase(unittest.TestCase):
+
+    workers = 2
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        package = os.path.join(self.directory, 'smoke')
+        os.mkdir(package)
+        for name, content in [('__init__.py', ''),
+                              ('settings.py', SETTINGS.format(directory=self.directory)),
+                              ('routing.py', ROUTING)]:
+            with open(os.path.join(package, name), 'w') as f:
+                f.write(textwrap.dedent(content))
+
+        self.port = free_port(self.workers)
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='smoke.settings',
+            PYTHONPATH=os.pathsep.join([self.directory, SRC]))
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'django', 'websockets_server',
+             '-b', f'127.0.0.1:{self.port}', '-w', str(self.workers)],
+            cwd=self.directory, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    def tearDown(self):
+        self.stop()
+
+    def stop(self) -> str:
+        """
+        Drains the server with SIGTERM, returning its output
+        """
+        if self.server.returncode is not None:
+            return ''
+        self.server.send_signal(signal.SIGTERM)
+        try:
+            return self.server.communicate(timeout=30)[0]
+        except subprocess.TimeoutExpired:
+            self.server.kill()
+            return self.server.communicate()[0]
+
+    async def echo(self, deadline, message):
+        """
+        Connects and exchanges a message, retrying until the server and its
+        workers accept connections
+        """
+        while True:
+            try:
+                connection = await websockets.connect(
+                    f'ws://127.0.0.1:{self.port}/ws/echo', origin='http://localhost')
+                await connection.send(message)
+                pid, echoed = (await asyncio.wait_for(connection.recv(), 10)).split(':')
+                self.assertEqual(echoed, message)
+                return connection, pid
+            except (OSError, websockets.ConnectionClosed):
+                if time.monotonic() > deadline or self.server.poll() is not None:
+                    raise
+                await asyncio.sleep(0.2)
+
+    async def exchange(self):
+        deadline = time.monotonic() + 30
+        connections, pids = [], set()
+        while len(pids) < self.workers and time.monotonic() < deadline:
+            connection, pid = await self.echo(deadline, f'hello {len(connections)}')
+            connections.append(connection)
+            pids.add(pid)
+
+        await connections[0].send('broadcast')
+        received = [
+            await asyncio.wait_for(connection.recv(), 10)
+            for connection in connections]
+        for connection in connections:
+            await connection.close()
+        return pids, received
+
+    def test_workers(self):
+        try:
+            pids, received = asyncio.run(self.exchange())
+        except Exception as e:
+            raise AssertionError(f'{e!r}, server output:\n{self.stop()}') from e
+        self.assertEqual(len(pids), self.workers)
+        self.assertEqual(received, ['group:hello'] * len(received))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+SessionCache expiry, coalesced loads and eviction of the saved sessions
+"""
+import asyncio
+import time
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django.contrib.sessions.backends.base import SessionBase
+
+from django_websockets.middlewares import session
+from django_websockets.middlewares.session import CachedSessionMixin, SessionCache
+
+
+class Store(object):
+    """
+    Session store counting its loads
+    """
+
+    loads = 0
+
+    def __init__(self, session_key, data=None):
+        self.session_key = session_key
+        self.data = data or {'user': session_key}
+
+    def load(self):
+        type(self).loads += 1
+        time.sleep(0.01)
+        return self.data
+
+
+class MemoryStore(SessionBase):
+
+    def exists(self, session_key):
+        return False
+
+    def create(self):
+        self._session_key = self._get_new_session_key()
+
+    def save(self, must_create=False):
+        pass
+
+    def delete(self, session_key=None):
+        pass
+
+    def load(self):
+        return {}
+
+
+class CachedStore(CachedSessionMixin, MemoryStore): ...
+
+
+class SessionCacheTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Store.loads = 0
+
+    async def test_disabled(self):
+        cache = SessionCache()
+        await cache.load(Store('a'))
+        await cache.load(Store('a'))
+        self.assertEqual(Store.loads, 2)
+        self.assertEqual(len(cache), 0)
+
+    async def test_cached(self):
+        cache = SessionCache(ttl=60)
+        self.assertEqual(await cache.load(Store('a')), ('a', {'user': 'a'}))
+        self.assertEqual(await cache.load(Store('a')), ('a', {'user': 'a'}))
+        self.assertEqual(Store.loads, 1)
+
+    async def test_expired(self):
+        cache = SessionCache(ttl=0.05)
+        await cache.load(Store('a'))
+        await asyncio.sleep(0.1)
+        self.assertIsNone(cache.get('a'))
+        await cache.load(Store('a'))
+        self.assertEqual(Store.loads, 2)
+
+    async def test_lru(self):
+        cache = SessionCache(ttl=60, maxsize=2)
+        for key in ['a', 'b', 'a', 'c']:
+            await cache.load(Store(key))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    async def test_coalesced(self):
+        cache = SessionCache(ttl=60)
+        results = await asyncio.gather(*[cache.load(Store('a')) for _ in range(10)])
+        self.assertEqual(results, [('a', {'user': 'a'})] * 10)
+        self.assertEqual(Store.loads, 1)
+
+    async def test_missing_session(self):
+        class Missing(Store):
+            def load(self):
+                # As django does for a session that doesn't exist
+                self.session_key = None
+                return {}
+
+        cache = SessionCache(ttl=60)
+        self.assertEqual(await cache.load(Missing('a')), (None, {}))
+        self.assertEqual(cache.get('a'), (None, {}))
+
+    async def test_failed_load(self):
+        class Failing(Store):
+            def load(self):
+                raise RuntimeError('database down')
+
+        cache = SessionCache(ttl=60)
+        results = await asyncio.gather(
+            *[cache.load(Failing('a')) for _ in range(3)], return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertIsNone(cache.get('a'))
+
+
+class CachedSessionMixinTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        session.session_cache = SessionCache(ttl=60)
+
+    def tearDown(self):
+        session.session_cache = None
+
+    def test_evicted(self):
+        for method in ['save', 'delete', 'flush', 'cycle_key']:
+            with self.subTest(method=method):
+                store = CachedStore('k' * 32)
+                session.session_cache.set(store.session_key, store.session_key, {})
+                getattr(store, method)()
+                self.assertIsNone(session.session_cache.get('k' * 32))
+
+    async def test_evicted_async(self):
+        for method in ['asave', 'adelete']:
+            with self.subTest(method=method):
+                store = CachedStore('k' * 32)
+                session.session_cache.set(store.session_key, store.session_key, {})
+                await getattr(store, method)()
+                self.assertIsNone(session.session_cache.get('k' * 32))
+
+
+if __name__ == '__main__':
+    unittest.main()
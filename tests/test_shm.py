@@ -0,0 +1,110 @@
+"""
+SharedMemoryRing records, wraparound and readers falling behind
+"""
+import fcntl
+import os
+import tempfile
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django_websockets.transport.shm import SharedMemoryRing
+
+
+class SharedMemoryRingTestCase(unittest.TestCase):
+
+    size = 64
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'ring')
+        self.ring = SharedMemoryRing(self.path, self.size, max_readers=2)
+        self.slot, self.fd, self.position = self.ring.attach_reader()
+
+    def tearDown(self):
+        self.ring.detach_reader(self.slot, self.fd)
+        self.ring.unlink()
+        self.ring.close()
+
+    def read(self):
+        self.position, records, lost = self.ring.read(self.position)
+        self.ring.set_read_position(self.slot, self.position)
+        return records, lost
+
+    def test_records(self):
+        self.assertTrue(self.ring.append('room', b'hello'))
+        self.assertTrue(self.ring.append('lobby', b''))
+        self.assertEqual(self.read(), ([('room', b'hello'), ('lobby', b'')], 0))
+        self.assertEqual(self.read(), ([], 0))
+
+    def test_wraparound(self):
+        # Records of 6 + 4 + 10 bytes don't divide the ring, so they end up
+        # split between its end and its start, headers included
+        for i in range(20):
+            message = str(i).encode() * 10
+            self.assertTrue(self.ring.append('room', message[:10]))
+            self.assertEqual(self.read(), ([('room', message[:10])], 0))
+        self.assertEqual(self.position, 20 * 20)
+        self.assertEqual(self.ring.positions(), (400, 400))
+
+    def test_reader_behind(self):
+        record = 6 + 4 + 10
+        for _ in range(self.size // record):
+            self.assertTrue(self.ring.append('room', b'x' * 10))
+        # Would overwrite the first record, which wasn't read
+        self.assertFalse(self.ring.append('room', b'y' * 10))
+
+        records, lost = self.read()
+        self.assertEqual(len(records), self.size // record)
+        self.assertEqual(lost, 0)
+        self.assertTrue(self.ring.append('room', b'y' * 10))
+        self.assertEqual(self.read(), ([('room', b'y' * 10)], 0))
+
+    def test_forced_overwrite(self):
+        for _ in range(5):
+            self.assertTrue(self.ring.append('room', b'x' * 10, force=True))
+        records, lost = self.read()
+        self.assertEqual(records, [])
+        self.assertEqual(lost, 5 * 20)
+        # Reads the next records again
+        self.ring.append('room', b'z')
+        self.assertEqual(self.read(), ([('room', b'z')], 0))
+
+    def test_too_large(self):
+        with self.assertRaises(ValueError):
+            self.ring.append('room', b'x' * self.size)
+
+    def test_shared(self):
+        other = SharedMemoryRing(self.path, self.size, max_readers=2)
+        try:
+            other.append('room', b'from the other')
+            self.assertEqual(self.read(), ([('room', b'from the other')], 0))
+        finally:
+            other.close()
+
+    def test_locked(self):
+        other = SharedMemoryRing(self.path, self.size, max_readers=2)
+        lock = os.open(f'{self.path}.lock', os.O_RDWR)
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            with self.assertRaises(BlockingIOError):
+                other.append('room', b'x', blocking=False)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            self.assertTrue(other.append('room', b'x', blocking=False))
+        finally:
+            os.close(lock)
+            other.close()
+
+    def test_wake_writers(self):
+        self.ring.set_waiting_room(self.slot, True)
+        self.ring.wake_writers()
+        self.assertEqual(os.read(self.fd, 16), b'\0')
+        # The flag is cleared by the wake up
+        self.ring.wake_writers()
+        with self.assertRaises(BlockingIOError):
+            os.read(self.fd, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
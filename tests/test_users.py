@@ -0,0 +1,103 @@
+"""
+UserResolver caching, batching and expiry of the users
+"""
+import asyncio
+import unittest
+
+from support import setup_django
+
+setup_django()
+
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings
+
+from django_websockets.middlewares.users import UserResolver
+
+
+BACKEND = f'{__name__}.Backend'
+
+
+class User(object):
+
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class Backend(object):
+    """
+    Authentication backend recording the users it's asked for
+    """
+
+    lookups = []
+
+    def get_user(self, user_id):
+        self.lookups.append(user_id)
+        return User(user_id) if user_id < 100 else None
+
+
+def scope(user_id, backend=BACKEND):
+    return {'session': {SESSION_KEY: str(user_id), BACKEND_SESSION_KEY: backend}}
+
+
+class UserResolverTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        Backend.lookups.clear()
+        settings = override_settings(AUTHENTICATION_BACKENDS=[BACKEND])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    async def test_disabled(self):
+        resolver = UserResolver()
+        await resolver.get_user(scope(1))
+        await resolver.get_user(scope(1))
+        self.assertEqual(Backend.lookups, [1, 1])
+        self.assertEqual(len(resolver), 0)
+
+    async def test_cached(self):
+        resolver = UserResolver(ttl=60)
+        first = await resolver.get_user(scope(1))
+        second = await resolver.get_user(scope(1))
+        self.assertEqual((first.pk, second.pk), (1, 1))
+        # Every connection gets its own instance
+        self.assertIsNot(first, second)
+        self.assertEqual(Backend.lookups, [1])
+
+    async def test_expired(self):
+        resolver = UserResolver(ttl=0.05)
+        await resolver.get_user(scope(1))
+        await asyncio.sleep(0.1)
+        await resolver.get_user(scope(1))
+        self.assertEqual(Backend.lookups, [1, 1])
+
+    async def test_lru(self):
+        resolver = UserResolver(ttl=60, maxsize=2)
+        for user_id in [1, 2, 1, 3, 1, 2]:
+            await resolver.get_user(scope(user_id))
+        self.assertEqual(Backend.lookups, [1, 2, 3, 2])
+
+    async def test_invalidate(self):
+        resolver = UserResolver(ttl=60)
+        await resolver.get_user(scope(1))
+        resolver.invalidate(1)
+        await resolver.get_user(scope(1))
+        self.assertEqual(Backend.lookups, [1, 1])
+
+    async def test_coalesced(self):
+        resolver = UserResolver(ttl=60)
+        users = await asyncio.gather(*[resolver.get_user(scope(1)) for _ in range(10)])
+        self.assertEqual([user.pk for user in users], [1] * 10)
+        self.assertEqual(Backend.lookups, [1])
+
+    async def test_anonymous(self):
+        resolver = UserResolver(ttl=60)
+        for case in [{'session': {}}, scope(1, 'unknown.Backend'), scope(100)]:
+            with self.subTest(case=case):
+                self.assertIsInstance(await resolver.get_user(case), AnonymousUser)
+
+
+if __name__ == '__main__':
+    unittest.main()